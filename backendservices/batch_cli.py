@@ -0,0 +1,95 @@
+"""
+Procesa un lote de reportes desde la línea de comandos (equivalente a /upload/batch).
+
+Uso (desde la carpeta que contiene el paquete `app`):
+    python -m app.batch_cli reporte1.pdf reporte2.pdf ... --excels ESTRUCTURA_matriz.xlsx ELECTRICA_matriz.xlsx
+        [--export-folder carpeta] [--workers 4] [--output resumen.json]
+
+Las matrices se asignan a su especialidad por el nombre del archivo (el
+texto antes del primer "_"), igual que en el endpoint. Las matrices
+modificadas se escriben en la carpeta de exportación; los archivos de
+entrada no se modifican.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from types import SimpleNamespace
+
+from app.core.config import configure_app
+from app.core.logger import configure_logging
+from app.routes.pdf_routes import build_classifier, cleaner
+from app.services.model_registry import ModelRegistry
+from app.services.page_store import PageStore
+from app.services.pipeline import export_folder_for, process_batch
+from app.services.result_cache import ResultCache
+from app.utils.file_utils import first_chunk_before_underscore, norm_esp
+
+logger = logging.getLogger(__name__)
+
+def excel_index_for(paths):
+    """
+    {especialidad: ruta}; como en la subida, se conserva el primer Excel de cada especialidad.
+    """
+    index = {}
+    for path in paths:
+        esp_key = norm_esp(first_chunk_before_underscore(path))
+        if esp_key and esp_key not in index:
+            index[esp_key] = path
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesa varios reportes contra un mismo juego de matrices")
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--excels", nargs="+", required=True)
+    parser.add_argument("--export-folder", default=None, help="Por defecto EXPORT_FOLDER o Documentos")
+    parser.add_argument("--workers", type=int, default=None, help="Reportes extraídos a la vez (BATCH_WORKERS)")
+    parser.add_argument("--output", default=None, help="Archivo JSON con los resultados por reporte")
+    args = parser.parse_args()
+
+    app = SimpleNamespace(config={})
+    configure_app(app)
+    config = app.config
+    if args.workers is not None:
+        config['BATCH_WORKERS'] = args.workers
+    if args.export_folder:
+        config['EXPORT_FOLDER'] = args.export_folder
+    configure_logging(config['LOG_LEVEL'], config['LOG_FORMAT'])
+
+    missing = [p for p in args.pdfs + args.excels if not os.path.isfile(p)]
+    if missing:
+        sys.exit(f"❌ No existen: {', '.join(missing)}")
+
+    models = ModelRegistry(build_classifier)
+    models.start({**config, 'MODEL_WARMUP': "eager"})
+
+    outcome = process_batch(
+        [(os.path.basename(p), p) for p in args.pdfs],
+        excel_index_for(args.excels),
+        export_folder_for(config),
+        cleaner,
+        models.get(),
+        config,
+        result_cache=ResultCache.from_config(config),
+        page_store=PageStore.from_config(config),
+    )
+
+    for report in outcome["reportes"]:
+        if report["error"]:
+            print(f"❌ {report['reporte']}: {report['error']}")
+        else:
+            print(f"✅ {report['reporte']}: {report['observaciones']} observaciones, {report['agregadas']} agregadas")
+    for esp, error in outcome["errores"].items():
+        print(f"❌ Matriz {esp}: {error}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(outcome, f, ensure_ascii=False, indent=4)
+        print(f"✅ Resultados guardados en {args.output}")
+
+    if outcome["errores"] or any(r["error"] for r in outcome["reportes"]):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
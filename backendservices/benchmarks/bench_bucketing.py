@@ -0,0 +1,70 @@
+"""
+Benchmark: clasificación con y sin agrupación por longitud.
+
+Uso (desde la carpeta que contiene el paquete `app`):
+    python -m app.benchmarks.bench_bucketing <reporte.pdf> [--batch-size 32] [--max-tokens 8192] [--output resultados.json]
+
+Reporta, para un reporte real, la proporción de tokens de relleno y los
+párrafos por segundo de ambos esquemas.
+"""
+import argparse
+import json
+import time
+
+from app.services.pdf_extractor import extract_paragraphs
+from app.services.text_cleaner import TextCleaner
+from app.services.classifier import TextClassifier
+from app.services.batch_scheduler import build_token_batches, padding_stats, sequential_batches
+
+def _run(classifier, sequences, batches) -> float:
+    start = time.perf_counter()
+    for batch in batches:
+        classifier.labels_from_logits(classifier.run_batch([sequences[i] for i in batch]))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de agrupación por longitud")
+    parser.add_argument("pdf")
+    parser.add_argument("--model", default=None, help="Ruta al modelo ONNX")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-tokens", type=int, default=8192)
+    parser.add_argument("--output", default=None, help="Archivo JSON de salida")
+    args = parser.parse_args()
+
+    cleaner = TextCleaner()
+    classifier = TextClassifier(model_path=args.model)
+
+    texts = [cleaner.clean_text(p["texto"]) for p in extract_paragraphs(args.pdf)]
+    sequences = classifier.encode(texts)
+    lengths = [len(seq) for seq in sequences]
+
+    schemes = {
+        "secuencial": sequential_batches(len(sequences), args.batch_size),
+        "por_longitud": build_token_batches(lengths, args.max_tokens, args.batch_size),
+    }
+
+    # Calentamiento para no medir la inicialización de la sesión
+    classifier.run_batch(sequences[:1])
+
+    results = {"pdf": args.pdf, "parrafos": len(texts), "esquemas": {}}
+    for name, batches in schemes.items():
+        elapsed = _run(classifier, sequences, batches)
+        stats = padding_stats(lengths, batches)
+        results["esquemas"][name] = {
+            **stats,
+            "lotes": len(batches),
+            "segundos": elapsed,
+            "parrafos_por_segundo": len(texts) / elapsed if elapsed else 0.0,
+        }
+        print(
+            f"{name:>13}: {len(batches):4d} lotes | relleno {stats['pad_ratio']:.1%} "
+            f"| {results['esquemas'][name]['parrafos_por_segundo']:.1f} párrafos/s"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+        print(f"✅ Resultados guardados en {args.output}")
+
+if __name__ == "__main__":
+    main()
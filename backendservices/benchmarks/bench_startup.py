@@ -0,0 +1,96 @@
+"""
+Benchmark: tiempo de arranque de un worker.
+
+Uso (desde la carpeta que contiene el paquete `app`):
+    python -m app.benchmarks.bench_startup [--repeat 5] [--max-ready 20] [--output resultados.json]
+
+Cada repetición corre en un proceso nuevo (importaciones en frío) y mide:
+importar `app.main`, `create_app()` con MODEL_WARMUP=lazy, cargar y
+calentar el modelo (hasta que /ready respondería 200) y la primera
+clasificación. También reporta qué dependencias pesadas quedan importadas
+antes de cargar el modelo, que deberían ser ninguna.
+
+Con --max-import / --max-ready termina con código 1 si la mediana supera el
+límite, para usarlo como control de regresiones.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("transformers", "onnxruntime", "tokenizers", "pdfplumber", "openpyxl", "torch")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app.main import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+from app.routes.pdf_routes import models
+classifier = models.get()
+ready = time.perf_counter()
+classifier.predict_batch(["Se debe corregir la cota del plano de la estructura."])
+first = time.perf_counter()
+print(json.dumps({{
+    "importar": imported - start,
+    "create_app": created - imported,
+    "modelo_listo": ready - created,
+    "primera_clasificacion": first - ready,
+    "hasta_listo": ready - start,
+    "cargadas_antes_del_modelo": heavy,
+    "registro": models.status(),
+}}))
+"""
+
+def _run_once(cwd: str) -> dict:
+    env = dict(os.environ, MODEL_WARMUP="lazy")
+    probe = _PROBE.format(heavy=HEAVY_MODULES)
+    completed = subprocess.run(
+        [sys.executable, "-c", probe], cwd=cwd, env=env, capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"❌ El proceso de prueba falló:\n{completed.stderr}")
+    # La última línea es el JSON; antes van los logs del arranque
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-import", type=float, default=None, help="Límite (s) para importar + create_app")
+    parser.add_argument("--max-ready", type=float, default=None, help="Límite (s) hasta tener el modelo listo")
+    parser.add_argument("--output", default=None, help="Archivo JSON de salida")
+    args = parser.parse_args()
+
+    # Carpeta que contiene el paquete `app`
+    cwd = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    runs = [_run_once(cwd) for _ in range(args.repeat)]
+
+    etapas = ["importar", "create_app", "modelo_listo", "primera_clasificacion", "hasta_listo"]
+    medianas = {etapa: statistics.median(run[etapa] for run in runs) for etapa in etapas}
+    for etapa in etapas:
+        print(f"{etapa:>22}: {medianas[etapa] * 1000:8.1f} ms (mediana de {len(runs)})")
+
+    heavy = sorted({m for run in runs for m in run["cargadas_antes_del_modelo"]})
+    if heavy:
+        print(f"⚠️ Dependencias pesadas importadas antes de cargar el modelo: {', '.join(heavy)}")
+
+    results = {"repeticiones": runs, "medianas": medianas, "cargadas_antes_del_modelo": heavy}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+        print(f"✅ Resultados guardados en {args.output}")
+
+    fallas = []
+    if args.max_import is not None and medianas["importar"] + medianas["create_app"] > args.max_import:
+        fallas.append(f"importar + create_app > {args.max_import}s")
+    if args.max_ready is not None and medianas["hasta_listo"] > args.max_ready:
+        fallas.append(f"hasta_listo > {args.max_ready}s")
+    if fallas:
+        raise SystemExit(f"❌ Regresión de arranque: {'; '.join(fallas)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Benchmark: suite reproducible de las etapas del pipeline sobre un reporte sintético.
+
+Uso (desde la carpeta que contiene el paquete `app`):
+    python -m app.benchmarks.bench_suite [--dataset carpeta] [--pages 100] [--matrix-rows 2000]
+        [--repeat 5] [--output resultados.json] [--baseline referencia.json --tolerance 0.15]
+
+Sin --dataset genera el reporte y las matrices con `synthetic_report` (misma
+semilla, misma entrada). Mide, con el mejor de --repeat:
+
+- extract_paragraphs: lectura del PDF y segmentación (páginas/s)
+- clean_text: TextCleaner.clean_text por párrafo (párrafos/s)
+- classifier: TextClassifier.predict_batch (párrafos/s; se omite si no hay modelo)
+- extraer_especialidades: encabezados sobre textos ya extraídos (páginas/s)
+- asignar_especialidad: una llamada por párrafo (párrafos/s)
+- excel_check_scan / excel_check_index: excel_observation_cheker sin y con
+  el índice lateral de la matriz (observaciones/s)
+
+Con --baseline termina con código 1 si el rendimiento de algún benchmark
+cae más de --tolerance respecto de la referencia (otro JSON de esta suite).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+from app.benchmarks.synthetic_report import generate_dataset
+from app.services.especialidad_extractor import extraer_especialidades
+from app.services.especialidad_matcher import asignar_especialidad
+from app.services.observation_checker import excel_observation_cheker
+from app.services.page_text import PageTextProvider
+from app.services.pdf_extractor import extract_paragraphs
+from app.services.text_cleaner import TextCleaner
+
+def _best(fn, repeat: int, setup=None) -> float:
+    """
+    Mejor tiempo de `fn(estado)`; `setup()` prepara el estado fuera de la medición.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        fn(state)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _result(seconds: float, items: int, unit: str) -> dict:
+    return {"segundos": seconds, "elementos": items, "unidad": unit, "por_segundo": items / seconds if seconds else 0.0}
+
+def _load_classifier(model_path):
+    from app.core.config import classifier_options
+    options = classifier_options()
+    if model_path:
+        options["model_path"] = model_path
+    try:
+        from app.services.classifier import TextClassifier
+        classifier = TextClassifier(**options)
+        classifier.warm_up()
+        return classifier
+    except Exception as e:
+        print(f"⚠️ Sin modelo, se omite el clasificador: {e}")
+        return None
+
+def _excel_setup(matrices: dict, observations: dict, with_index: bool):
+    """
+    Copia las matrices originales en una carpeta nueva; con índice, lo
+    construye (sin medir) para que la corrida medida lo encuentre vigente.
+    """
+    def setup():
+        folder = tempfile.mkdtemp(prefix="bench_excel_")
+        index_folder = os.path.join(folder, "indices") if with_index else None
+        for key, path in matrices.items():
+            shutil.copy(path, os.path.join(folder, os.path.basename(path)))
+            if with_index:
+                # Sin textos nuevos sólo se escanea la matriz y se guarda el índice
+                excel_observation_cheker(os.path.join(folder, os.path.basename(path)), [""], index_folder=index_folder)
+        return folder, index_folder
+    def run(state):
+        folder, index_folder = state
+        for key, path in matrices.items():
+            excel_observation_cheker(os.path.join(folder, os.path.basename(path)), observations[key], index_folder=index_folder)
+    return setup, run
+
+def run_suite(manifest: dict, repeat: int, model_path=None) -> dict:
+    pdf = manifest["pdf"]
+    pages = manifest["paginas"]
+    benchmarks = {}
+
+    paragraphs = extract_paragraphs(pdf)
+    seconds = _best(lambda _: extract_paragraphs(pdf), repeat)
+    benchmarks["extract_paragraphs"] = _result(seconds, pages, "paginas")
+
+    cleaner = TextCleaner()
+    texts = [p["texto"] for p in paragraphs]
+    seconds = _best(lambda _: [cleaner.clean_text(t) for t in texts], repeat)
+    benchmarks["clean_text"] = _result(seconds, len(texts), "parrafos")
+    cleaned = [cleaner.clean_text(t) for t in texts]
+
+    classifier = _load_classifier(model_path)
+    labels = None
+    if classifier is not None:
+        labels = classifier.predict_batch(cleaned)
+        seconds = _best(lambda _: classifier.predict_batch(cleaned), repeat)
+        benchmarks["classifier"] = _result(seconds, len(cleaned), "parrafos")
+
+    provider = PageTextProvider(pdf)
+    provider.page_count  # extracción fuera de la medición
+    especialidades = extraer_especialidades(provider)
+    seconds = _best(lambda _: extraer_especialidades(provider), repeat)
+    benchmarks["extraer_especialidades"] = _result(seconds, pages, "paginas")
+
+    paginas = [p["pagina"] for p in paragraphs]
+    seconds = _best(lambda _: [asignar_especialidad(n, especialidades) for n in paginas], repeat)
+    benchmarks["asignar_especialidad"] = _result(seconds, len(paginas), "parrafos")
+
+    # Observaciones por matriz: las del clasificador si hay modelo, si no la verdad del generador
+    if labels is not None:
+        selected = [(p, t) for p, t, label in zip(paginas, texts, labels) if label == "observacion"]
+    else:
+        with open(os.path.join(os.path.dirname(pdf), "manifest.json"), encoding="utf-8") as f:
+            expected = set(json.load(f).get("textos_observacion", []))
+        selected = [(p, t) for p, t in zip(paginas, texts) if t in expected]
+    observations = {key: [] for key in manifest["matrices"]}
+    for pagina, text in selected:
+        key = asignar_especialidad(pagina, especialidades)
+        if key in observations:
+            observations[key].append(text)
+    total = sum(len(v) for v in observations.values())
+    for name, with_index in (("excel_check_scan", False), ("excel_check_index", True)):
+        setup, run = _excel_setup(manifest["matrices"], observations, with_index)
+        seconds = _best(run, repeat, setup)
+        benchmarks[name] = _result(seconds, total, "observaciones")
+
+    return benchmarks
+
+def check_regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Benchmarks cuyo rendimiento cayó más de `tolerance` (fracción) respecto de la referencia.
+    """
+    fallas = []
+    for name, ref in baseline.get("benchmarks", {}).items():
+        now = results["benchmarks"].get(name)
+        if now is None or not ref.get("por_segundo"):
+            continue
+        ratio = now["por_segundo"] / ref["por_segundo"]
+        if ratio < 1 - tolerance:
+            fallas.append(f"{name}: {now['por_segundo']:.1f} vs {ref['por_segundo']:.1f} {now['unidad']}/s ({ratio - 1:+.1%})")
+    return fallas
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks del pipeline")
+    parser.add_argument("--dataset", default=None, help="Carpeta generada por synthetic_report (con manifest.json)")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--matrix-rows", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default=None, help="Ruta al modelo ONNX (por defecto MODEL_PATH)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Archivo JSON de salida")
+    parser.add_argument("--baseline", default=None, help="JSON de referencia de esta suite")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Caída máxima admitida (fracción)")
+    args = parser.parse_args()
+
+    folder = args.dataset or tempfile.mkdtemp(prefix="bench_dataset_")
+    manifest_path = os.path.join(folder, "manifest.json")
+    if args.dataset and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    else:
+        manifest = generate_dataset(folder, pages=args.pages, matrix_rows=args.matrix_rows, seed=args.seed)
+
+    benchmarks = run_suite(manifest, args.repeat, args.model)
+    for name, r in benchmarks.items():
+        print(f"{name:>22}: {r['segundos'] * 1000:9.1f} ms | {r['por_segundo']:10.1f} {r['unidad']}/s")
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeticiones": args.repeat,
+            "dataset": {k: v for k, v in manifest.items() if k not in ("matrices", "textos_observacion")},
+        },
+        "benchmarks": benchmarks,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+        print(f"✅ Resultados guardados en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            fallas = check_regressions(results, json.load(f), args.tolerance)
+        if fallas:
+            raise SystemExit("❌ Regresión de rendimiento:\n" + "\n".join(fallas))
+        print(f"✅ Sin regresiones respecto de {args.baseline} (tolerancia {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: limpieza de texto original vs TextCleaner.clean_batch.
+
+Uso (desde la carpeta que contiene el paquete `app`):
+    python -m app.benchmarks.bench_text_cleaner [reporte.pdf] [--repeat 5] [--output resultados.json]
+
+Sin PDF usa un corpus sintético con texto ASCII y con acentos. Verifica que
+ambas implementaciones den exactamente la misma salida y reporta párrafos
+por segundo de cada una.
+"""
+import argparse
+import json
+import random
+import time
+
+from app.services.text_cleaner import TextCleaner, _clean_text_reference
+
+_PALABRAS = [
+    "la", "observacion", "debe", "corregirse", "plano", "cota", "Eléctrica", "AEROPUERTO",
+    "señalización", "año", "<b>", "</b>", "http://odinsa.com/doc", "1.250", "(ver", "anexo)", "-",
+]
+
+def _synthetic(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(_PALABRAS, k=rng.randint(5, 60))) for _ in range(count)]
+
+def _time(fn, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de limpieza de texto")
+    parser.add_argument("pdf", nargs="?", default=None)
+    parser.add_argument("--count", type=int, default=20000, help="Párrafos sintéticos si no hay PDF")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Archivo JSON de salida")
+    args = parser.parse_args()
+
+    if args.pdf:
+        from app.services.pdf_extractor import extract_paragraphs
+        texts = [p["texto"] for p in extract_paragraphs(args.pdf)]
+    else:
+        texts = _synthetic(args.count)
+
+    cleaner = TextCleaner()
+    if cleaner.clean_batch(texts) != [_clean_text_reference(t) for t in texts]:
+        raise SystemExit("❌ Las salidas no coinciden")
+
+    variantes = {
+        "original": lambda ts: [_clean_text_reference(t) for t in ts],
+        "clean_batch": cleaner.clean_batch,
+    }
+    results = {"pdf": args.pdf, "parrafos": len(texts), "variantes": {}}
+    for name, fn in variantes.items():
+        elapsed = _time(fn, texts, args.repeat)
+        results["variantes"][name] = {
+            "segundos": elapsed,
+            "parrafos_por_segundo": len(texts) / elapsed if elapsed else 0.0,
+        }
+        print(f"{name:>12}: {elapsed * 1000:8.1f} ms | {results['variantes'][name]['parrafos_por_segundo']:.0f} párrafos/s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+        print(f"✅ Resultados guardados en {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Generador de reportes de inspección sintéticos y de sus matrices "Matriz Obs".
+
+Uso (desde la carpeta que contiene el paquete `app`):
+    python -m app.benchmarks.synthetic_report <carpeta> [--pages 200] [--matrix-rows 2000] [--seed 0]
+
+Escribe <carpeta>/reporte.pdf y una matriz <ESPECIALIDAD>_matriz.xlsx por
+especialidad del reporte. Todo es determinista para una misma semilla, así
+que los benchmarks miden siempre la misma entrada.
+
+El PDF se escribe con un generador mínimo (sólo biblioteca estándar):
+Helvetica con WinAnsiEncoding, una línea de texto por renglón. Cada párrafo
+termina en punto en su último renglón y los renglones intermedios no
+terminan en puntuación, de modo que `split_paragraphs` recupera exactamente
+los párrafos esperados que devuelve `generate_report`.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+SPECIALTIES = (
+    ("ESTRUCTURA", "Estructura"),
+    ("ELECTRICA", "Eléctrica (Lado Aire)"),
+    ("GEOTECNIA", "Geotecnia"),
+    ("HIDROSANITARIA", "Hidrosanitaria"),
+    ("DISENO AEROPORTUARIO", "De Diseño Aeroportuario"),
+)
+
+_OBS_START = [
+    "Se debe corregir", "Se solicita revisar", "Es necesario ajustar", "Falta incluir",
+    "No se evidencia", "Se recomienda verificar", "Se observa inconsistencia en",
+]
+_OBS_WORDS = [
+    "la", "cota", "del", "plano", "refuerzo", "viga", "eje", "memoria", "de", "cálculo", "cantidades",
+    "especificación", "tablero", "acometida", "cimentación", "pilote", "drenaje", "señalización",
+    "pavimento", "franja", "pista", "calle", "rodaje", "detalle", "sección", "nivel", "acero", "concreto",
+]
+_TEXT_WORDS = [
+    "el", "presente", "informe", "describe", "alcance", "revisión", "documentos", "entregados", "por",
+    "consultor", "para", "etapa", "diseño", "tabla", "anexo", "resumen", "general", "proyecto", "aeropuerto",
+    "contrato", "versión", "fecha", "capítulo", "numeral", "según", "norma", "vigente", "componente",
+]
+
+_LINE_CHARS = 95
+_LINES_PER_PAGE = 50
+
+def _wrap(words: Sequence[str], width: int = _LINE_CHARS) -> List[str]:
+    lines, current = [], ""
+    for word in words:
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+def _paragraph(rng: random.Random, observation: bool, mean_words: float, sigma: float) -> str:
+    count = max(3, int(rng.lognormvariate(math.log(mean_words), sigma)))
+    if observation:
+        words = rng.choice(_OBS_START).split() + rng.choices(_OBS_WORDS, k=count)
+    else:
+        words = rng.choices(_TEXT_WORDS, k=count)
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+def generate_report(
+    pages: int = 50,
+    specialties: Sequence[Tuple[str, str]] = SPECIALTIES,
+    pages_per_specialty: int = 10,
+    mean_words: float = 25.0,
+    sigma: float = 0.6,
+    observation_density: float = 0.3,
+    seed: int = 0
+) -> Dict:
+    """
+    Contenido de un reporte sintético.
+
+    :param pages: Número de páginas
+    :param specialties: (clave normalizada, encabezado) de cada especialidad, en orden cíclico
+    :param pages_per_specialty: Páginas entre encabezados ESPECIALIDAD
+    :param mean_words: Mediana de palabras por párrafo (distribución lognormal)
+    :param sigma: Dispersión de la lognormal
+    :param observation_density: Fracción de párrafos que son observaciones
+    :return: {'paginas': [[renglones]], 'parrafos': [{'pagina', 'texto', 'observacion', 'especialidad'}]}
+    """
+    rng = random.Random(seed)
+    page_lines, paragraphs = [], []
+    specialty = None
+    for number in range(1, pages + 1):
+        lines, heading = [], None
+        if (number - 1) % pages_per_specialty == 0:
+            specialty = specialties[((number - 1) // pages_per_specialty) % len(specialties)]
+            heading = f"ESPECIALIDAD {specialty[1]}"
+            lines.append(heading)
+        while True:
+            observation = rng.random() < observation_density
+            text = _paragraph(rng, observation, mean_words, sigma)
+            wrapped = _wrap(text.split())
+            if len(lines) + len(wrapped) > _LINES_PER_PAGE:
+                break
+            lines.extend(wrapped)
+            if heading:
+                # El encabezado no termina en puntuación: split_paragraphs lo une al primer párrafo
+                text, heading = f"{heading} {text}", None
+            paragraphs.append({"pagina": number, "texto": text, "observacion": observation, "especialidad": specialty[0]})
+        page_lines.append(lines)
+    return {"paginas": page_lines, "parrafos": paragraphs}
+
+def _pdf_string(text: str) -> bytes:
+    data = text.encode("cp1252", "replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+def write_pdf(pages: Sequence[Sequence[str]]) -> bytes:
+    """
+    PDF mínimo: una página por elemento de `pages`, un renglón por cadena.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for lines in pages:
+        stream = b"BT /F1 10 Tf 14 TL 40 760 Td " + b" ".join(_pdf_string(line) + b" Tj T*" for line in lines) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R >> >> >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer << /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def generate_matrix(rows: int, seed: int = 0, include: Optional[Sequence[str]] = None) -> bytes:
+    """
+    Libro "Matriz Obs" con `rows` observaciones existentes en la columna G desde la fila 13.
+
+    :param include: Textos que deben estar entre las filas existentes (p. ej. una
+        fracción de las observaciones del reporte, para medir duplicados)
+    """
+    import openpyxl
+    from app.services.observation_checker import COL, SHEET_NAME, START_ROW
+
+    rng = random.Random(seed)
+    texts = list(include or [])
+    texts += [_paragraph(rng, True, 20.0, 0.5) for _ in range(max(0, rows - len(texts)))]
+    rng.shuffle(texts)
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = SHEET_NAME
+    for offset, text in enumerate(texts[:rows]):
+        ws.cell(row=START_ROW + offset, column=COL, value=text)
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+def generate_dataset(
+    folder: str,
+    pages: int = 50,
+    matrix_rows: int = 1000,
+    overlap: float = 0.2,
+    seed: int = 0,
+    **report_options
+) -> Dict:
+    """
+    Escribe el reporte y sus matrices en `folder`.
+
+    :param overlap: Fracción de las observaciones del reporte que ya están en su matriz
+    :return: Manifiesto con rutas y conteos (también se guarda como manifest.json)
+    """
+    os.makedirs(folder, exist_ok=True)
+    report = generate_report(pages=pages, seed=seed, **report_options)
+    pdf_path = os.path.join(folder, "reporte.pdf")
+    with open(pdf_path, "wb") as f:
+        f.write(write_pdf(report["paginas"]))
+
+    rng = random.Random(seed + 1)
+    matrices = {}
+    for key in sorted({p["especialidad"] for p in report["parrafos"]}):
+        observations = [p["texto"] for p in report["parrafos"] if p["observacion"] and p["especialidad"] == key]
+        existing = rng.sample(observations, int(len(observations) * overlap))
+        path = os.path.join(folder, f"{key}_matriz.xlsx")
+        with open(path, "wb") as f:
+            f.write(generate_matrix(matrix_rows, seed=rng.randrange(1 << 30), include=existing))
+        matrices[key] = path
+
+    manifest = {
+        "pdf": pdf_path,
+        "matrices": matrices,
+        "paginas": pages,
+        "parrafos": len(report["parrafos"]),
+        "observaciones": sum(p["observacion"] for p in report["parrafos"]),
+        "filas_por_matriz": matrix_rows,
+        "semilla": seed,
+        # Verdad del generador, para medir la etapa de Excel sin modelo
+        "textos_observacion": [p["texto"] for p in report["parrafos"] if p["observacion"]],
+    }
+    with open(os.path.join(folder, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un reporte sintético y sus matrices")
+    parser.add_argument("folder")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--pages-per-specialty", type=int, default=10)
+    parser.add_argument("--mean-words", type=float, default=25.0, help="Mediana de palabras por párrafo")
+    parser.add_argument("--sigma", type=float, default=0.6, help="Dispersión lognormal de la longitud")
+    parser.add_argument("--observation-density", type=float, default=0.3)
+    parser.add_argument("--matrix-rows", type=int, default=1000)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    manifest = generate_dataset(
+        args.folder,
+        pages=args.pages,
+        matrix_rows=args.matrix_rows,
+        overlap=args.overlap,
+        seed=args.seed,
+        pages_per_specialty=args.pages_per_specialty,
+        mean_words=args.mean_words,
+        sigma=args.sigma,
+        observation_density=args.observation_density,
+    )
+    print(f"✅ {manifest['paginas']} páginas, {manifest['parrafos']} párrafos, {len(manifest['matrices'])} matrices en {args.folder}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,124 @@
 import os
 from dotenv import load_dotenv
 
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
 def configure_app(app):
     load_dotenv()
     app.config['UPLOAD_FOLDER'] = os.getenv("UPLOAD_FOLDER")
-    app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024 # 10 MB
\ No newline at end of file
+    app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024 # 10 MB
+    app.config['CLASSIFIER_BATCH_SIZE'] = int(os.getenv("CLASSIFIER_BATCH_SIZE", "32"))
+    app.config['CLASSIFIER_MAX_TOKENS_PER_BATCH'] = int(os.getenv("CLASSIFIER_MAX_TOKENS_PER_BATCH", "8192"))
+    # Extracción paralela de páginas (1 = serial)
+    app.config['EXTRACTION_WORKERS'] = int(os.getenv("EXTRACTION_WORKERS", "1"))
+    app.config['EXTRACTION_MIN_PAGES_PER_CHUNK'] = int(os.getenv("EXTRACTION_MIN_PAGES_PER_CHUNK", "25"))
+    # Caché de resultados por PDF (deshabilitada si no hay carpeta)
+    app.config['RESULT_CACHE_FOLDER'] = os.getenv("RESULT_CACHE_FOLDER") or None
+    app.config['RESULT_CACHE_MAX_BYTES'] = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    # Memoización de etiquetas por párrafo (LRU en proceso + SQLite opcional)
+    app.config['MEMO_ENABLED'] = _env_flag("MEMO_ENABLED", True)
+    app.config['MEMO_MAX_ENTRIES'] = int(os.getenv("MEMO_MAX_ENTRIES", "100000"))
+    app.config['MEMO_DB_PATH'] = os.getenv("MEMO_DB_PATH") or None
+    # Máximo de entradas en la base (de todos los modelos); se eliminan las usadas hace más tiempo
+    app.config['MEMO_DB_MAX_ENTRIES'] = int(os.getenv("MEMO_DB_MAX_ENTRIES", "1000000"))
+    # Índice lateral de las matrices de observaciones (por defecto junto a las exportadas)
+    app.config['OBS_INDEX_ENABLED'] = _env_flag("OBS_INDEX_ENABLED", True)
+    app.config['OBS_INDEX_FOLDER'] = os.getenv("OBS_INDEX_FOLDER") or None
+    # Casi duplicados (MinHash/LSH): similitud mínima para no agregar una observación (vacío = sólo exactos)
+    near_dup_threshold = os.getenv("OBS_NEAR_DUP_THRESHOLD")
+    app.config['OBS_NEAR_DUP_THRESHOLD'] = float(near_dup_threshold) if near_dup_threshold else None
+    # Actualización concurrente de matrices: pool 'thread' o 'process'
+    app.config['EXCEL_WORKERS'] = int(os.getenv("EXCEL_WORKERS", "4"))
+    app.config['EXCEL_POOL'] = os.getenv("EXCEL_POOL", "thread")
+    # Recepción de archivos: 'memory' (sin temporales) o 'disk' (carpeta de subida)
+    app.config['IO_MODE'] = os.getenv("IO_MODE", "memory")
+    # Exportar también las matrices sin observaciones nuevas (enlace duro cuando es posible)
+    app.config['EXPORT_UNCHANGED'] = _env_flag("EXPORT_UNCHANGED", False)
+    # Carga del modelo: 'eager' (al crear la app), 'background' (hilo aparte) o 'lazy' (primera solicitud)
+    app.config['MODEL_WARMUP'] = os.getenv("MODEL_WARMUP", "background")
+    app.config['MODEL_WARMUP_BATCHES'] = int(os.getenv("MODEL_WARMUP_BATCHES", "3"))
+    # Registro: nivel (DEBUG, INFO, WARNING...) y formato 'text' o 'json'
+    app.config['LOG_LEVEL'] = os.getenv("LOG_LEVEL", "INFO")
+    app.config['LOG_FORMAT'] = os.getenv("LOG_FORMAT", "text")
+    # Endpoint /metrics en formato Prometheus
+    app.config['METRICS_ENABLED'] = _env_flag("METRICS_ENABLED", True)
+    # Perfilado bajo demanda de /upload (X-Profile o ?profile=; con token, su valor debe coincidir)
+    app.config['PROFILING_ENABLED'] = _env_flag("PROFILING_ENABLED", False)
+    app.config['PROFILING_TOKEN'] = os.getenv("PROFILING_TOKEN") or None
+    app.config['PROFILES_FOLDER'] = os.getenv("PROFILES_FOLDER") or None
+    app.config['PROFILING_SAMPLE_INTERVAL_MS'] = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5"))
+    app.config['PROFILING_TOP'] = int(os.getenv("PROFILING_TOP", "10"))
+    # Tienda de resultados por página (huella de contenido) para versiones revisadas de un reporte (vacío = deshabilitada)
+    app.config['PAGE_STORE_PATH'] = os.getenv("PAGE_STORE_PATH") or None
+    app.config['PAGE_STORE_MAX_PAGES'] = int(os.getenv("PAGE_STORE_MAX_PAGES", "200000"))
+    # OCR de respaldo para páginas escaneadas (Tesseract): ejecutable (vacío = el del PATH), idiomas y
+    # páginas con menos de OCR_MIN_CHARS caracteres nativos; el texto se guarda por hash de imagen
+    app.config['OCR_ENABLED'] = _env_flag("OCR_ENABLED", False)
+    app.config['OCR_TESSERACT_CMD'] = os.getenv("OCR_TESSERACT_CMD") or None
+    app.config['OCR_LANGUAGES'] = os.getenv("OCR_LANGUAGES", "spa")
+    app.config['OCR_MIN_CHARS'] = int(os.getenv("OCR_MIN_CHARS", "50"))
+    app.config['OCR_WORKERS'] = int(os.getenv("OCR_WORKERS", "2"))
+    app.config['OCR_CACHE_FOLDER'] = os.getenv("OCR_CACHE_FOLDER") or None
+    app.config['OCR_TARGET_PIXELS'] = int(os.getenv("OCR_TARGET_PIXELS", "3300"))
+    app.config['OCR_MIN_DPI'] = int(os.getenv("OCR_MIN_DPI", "150"))
+    app.config['OCR_MAX_DPI'] = int(os.getenv("OCR_MAX_DPI", "400"))
+    # Lotes de reportes (/upload/batch): procesos de extracción simultáneos y máximo de PDFs por solicitud
+    app.config['BATCH_WORKERS'] = int(os.getenv("BATCH_WORKERS", "2"))
+    app.config['BATCH_MAX_REPORTS'] = int(os.getenv("BATCH_MAX_REPORTS", "40"))
+    # Trabajos asíncronos (/jobs)
+    app.config['JOBS_FOLDER'] = os.getenv("JOBS_FOLDER") or None
+    app.config['JOBS_WORKERS'] = int(os.getenv("JOBS_WORKERS", "2"))
+    app.config['JOBS_MAX_PENDING'] = int(os.getenv("JOBS_MAX_PENDING", "20"))
+    app.config['JOBS_STALE_SECONDS'] = float(os.getenv("JOBS_STALE_SECONDS", "900"))
+
+def classifier_options() -> dict:
+    """
+    Opciones de TextClassifier leídas del entorno (.env).
+    MODEL_PATH puede ser un archivo .onnx o un artefacto generado por export_module.
+    TOKENIZER_PATH puede ser un tokenizer.json (o su carpeta); sin él se busca junto al modelo.
+    """
+    load_dotenv()
+    return {
+        "model_path": os.getenv("MODEL_PATH") or None,
+        "threshold": float(os.getenv("CLASSIFIER_THRESHOLD", "0.85")),
+        "tokenizer_path": os.getenv("TOKENIZER_PATH") or None,
+        "graph_optimization_level": os.getenv("ORT_GRAPH_OPTIMIZATION_LEVEL", "all"),
+        "intra_op_threads": int(os.getenv("ORT_INTRA_OP_THREADS", "0")),
+        "inter_op_threads": int(os.getenv("ORT_INTER_OP_THREADS", "0")),
+        "enable_cpu_mem_arena": _env_flag("ORT_ENABLE_CPU_MEM_ARENA", True),
+        "enable_mem_pattern": _env_flag("ORT_ENABLE_MEM_PATTERN", True),
+        "optimized_model_cache": os.getenv("ORT_OPTIMIZED_MODEL_CACHE") or None,
+    }
+
+def cascade_options() -> dict:
+    """
+    Opciones de la cascada (primer nivel lineal). Sin CASCADE_MODEL_PATH la cascada queda deshabilitada.
+    """
+    load_dotenv()
+    return {
+        "model_path": os.getenv("CASCADE_MODEL_PATH") or None,
+        "low": float(os.getenv("CASCADE_LOW", "0.05")),
+        "high": float(os.getenv("CASCADE_HIGH", "0.99")),
+    }
+
+def inference_options() -> dict:
+    """
+    Opciones del servidor de inferencia compartido. Sin INFERENCE_SOCKET cada worker carga su propio modelo.
+    Sin INFERENCE_AUTHKEY el servidor genera una clave junto al socket (ver inference_server).
+    """
+    load_dotenv()
+    authkey = os.getenv("INFERENCE_AUTHKEY")
+    return {
+        "address": os.getenv("INFERENCE_SOCKET") or None,
+        "authkey": authkey.encode("utf-8") if authkey else None,
+        "connect_timeout": float(os.getenv("INFERENCE_CONNECT_TIMEOUT", "30")),
+        "max_batch_texts": int(os.getenv("INFERENCE_MAX_BATCH", "256")),
+        "max_latency_ms": float(os.getenv("INFERENCE_MAX_LATENCY_MS", "10")),
+        "batch_size": int(os.getenv("CLASSIFIER_BATCH_SIZE", "32")),
+        "max_tokens": int(os.getenv("CLASSIFIER_MAX_TOKENS_PER_BATCH", "8192")),
+        "warmup_batches": int(os.getenv("MODEL_WARMUP_BATCHES", "3")),
+    }
@@ -1,6 +1,40 @@
+import json
 import logging
 
-def configure_logger(app):
+_TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Atributos propios de LogRecord; el resto son campos pasados con extra={...}
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """
+    Una línea JSON por registro, con los campos pasados en `extra`.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        payload.update({k: v for k, v in vars(record).items() if k not in _RESERVED})
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+def configure_logging(level: str = "INFO", fmt: str = "text") -> logging.Logger:
+    """
+    Configura el logger del paquete `app` (todos los módulos usan logging.getLogger(__name__)).
+    Los mensajes por debajo de `level` no se formatean.
+    """
     handler = logging.StreamHandler()
-    handler.setLevel(logging.INFO)
-    app.logger.addHandler(handler)
\ No newline at end of file
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(_TEXT_FORMAT))
+
+    logger = logging.getLogger("app")
+    logger.handlers[:] = [handler]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+    return logger
+
+def configure_logger(app):
+    configure_logging(app.config.get('LOG_LEVEL', "INFO"), app.config.get('LOG_FORMAT', "text"))
@@ -0,0 +1,253 @@
+"""
+Métricas del pipeline en formato de exposición de Prometheus (texto 0.0.4).
+
+Implementación mínima sin dependencias: contadores e histogramas con
+etiquetas, protegidos por un lock. Los valores son por proceso; con varios
+workers de gunicorn cada uno expone los suyos (Prometheus los agrega por
+instancia).
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core import profiling
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+def _labels_text(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels_text(self.labelnames, key)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = _SECONDS_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [conteos por bucket (no acumulados) + desborde, suma]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][slot] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(tuple(str(labels[n]) for n in self.labelnames))
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.extend(_render_hit_ratios())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+# Etapas: upload, extraction, ocr, cleaning, classification, specialty_extraction, matching, excel_check, export
+STAGE_SECONDS = REGISTRY.histogram(
+    "observeflow_stage_seconds", "Duración de cada etapa del pipeline.", ["stage"]
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "observeflow_request_seconds", "Duración total de las solicitudes de procesamiento.", ["endpoint"]
+)
+REQUESTS = REGISTRY.counter(
+    "observeflow_requests_total", "Solicitudes de procesamiento por resultado.", ["endpoint", "status"]
+)
+ITEMS = REGISTRY.counter(
+    "observeflow_items_total",
+    "Elementos procesados: pages, pages_reused, pages_ocr, paragraphs, observations, rows_appended.",
+    ["kind"],
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "observeflow_cache_lookups_total",
+    "Consultas a las cachés (result, memo, obs_index, ocr) por resultado.",
+    ["cache", "result"],
+)
+
+def _render_hit_ratios() -> List[str]:
+    with CACHE_LOOKUPS._lock:
+        caches = sorted({cache for cache, _ in CACHE_LOOKUPS._values})
+    if not caches:
+        return []
+    lines = [
+        "# HELP observeflow_cache_hit_ratio Fracción de aciertos de cada caché desde el arranque.",
+        "# TYPE observeflow_cache_hit_ratio gauge",
+    ]
+    for cache in caches:
+        hits = CACHE_LOOKUPS.value(cache=cache, result="hit")
+        total = hits + CACHE_LOOKUPS.value(cache=cache, result="miss")
+        lines.append(f'observeflow_cache_hit_ratio{{cache="{cache}"}} {_number(hits / total if total else 0.0)}')
+    return lines
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Context manager que registra la duración de una etapa del pipeline
+    (y su tiempo de CPU en el perfil activo, si la solicitud se perfila).
+    """
+    profile = profiling.current()
+    start = time.perf_counter()
+    cpu = time.thread_time() if profile is not None else 0.0
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        STAGE_SECONDS.observe(wall, stage=name)
+        if profile is not None:
+            profile.add_stage(name, wall, time.thread_time() - cpu)
+
+def count(kind: str, amount: int = 1) -> None:
+    if amount:
+        ITEMS.inc(amount, kind=kind)
+
+def cache_lookup(cache: str, hits: int = 0, misses: int = 0) -> None:
+    if hits:
+        CACHE_LOOKUPS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_LOOKUPS.inc(misses, cache=cache, result="miss")
+
+def track_request(endpoint: str):
+    """
+    Decorador de vistas: duración total y conteo por código de estado.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = 500
+            try:
+                response = view(*args, **kwargs)
+                if isinstance(response, tuple) and len(response) > 1:
+                    status = response[1]
+                else:
+                    status = getattr(response, "status_code", 200)
+                return response
+            finally:
+                REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+                REQUESTS.inc(endpoint=endpoint, status=status)
+        return wrapper
+    return decorator
+
+class StageClock:
+    """
+    Acumula el tiempo de etapas intercaladas (p. ej. en streaming, donde la
+    extracción, la limpieza y la clasificación se alternan por página) y lo
+    registra como una sola observación por etapa.
+    """
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def __call__(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def timed(self, name: str, iterable):
+        """
+        Itera `iterable` cargando a `name` el tiempo de cada `next()`.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def record(self, names: Optional[Sequence[str]] = None) -> None:
+        for name in names or list(self.seconds):
+            if name in self.seconds:
+                STAGE_SECONDS.observe(self.seconds.pop(name), stage=name)
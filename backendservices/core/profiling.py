@@ -0,0 +1,193 @@
+"""
+Perfilado bajo demanda de una solicitud a /upload.
+
+Con PROFILING_ENABLED, una solicitud con el encabezado `X-Profile` (o
+`?profile=`) se ejecuta con un RequestProfile activo. Las etapas del
+pipeline (core.metrics.stage), la extracción de cada página y cada lote del
+clasificador se registran en él sin pasar parámetros: lo encuentran con
+`current()`. El reporte se guarda como JSON en PROFILES_FOLDER y se descarga
+desde /profiles/<id>.
+
+Los tiempos de CPU son del hilo de la solicitud (time.thread_time); el
+trabajo en pools de hilos (Excel) aparece como tiempo de pared.
+"""
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as _Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+_TRUTHY = {"1", "true", "yes", "on"}
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("observeflow_profile", default=None)
+
+def current() -> Optional["RequestProfile"]:
+    """
+    Perfil activo en este contexto (None fuera de una solicitud perfilada).
+    """
+    return _current.get()
+
+class StackSampler(threading.Thread):
+    """
+    Perfilador por muestreo: cada `interval` segundos toma la pila del hilo
+    observado y cuenta las pilas colapsadas ("a;b;c", formato de flamegraph).
+    """
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = _Counter()
+        self._halt = threading.Event()
+
+    def run(self) -> None:
+        while not self._halt.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[_fold(frame)] += 1
+
+    def stop(self) -> None:
+        self._halt.set()
+        self.join()
+
+def _fold(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+class RequestProfile:
+    def __init__(self, profile_id: Optional[str] = None, sample_interval: Optional[float] = None, top: int = 10):
+        self.id = profile_id or uuid.uuid4().hex
+        self.sample_interval = sample_interval
+        self.top = top
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.pages: List[Dict] = []
+        self.batches: List[Dict] = []
+        self._lock = threading.Lock()
+        self._sampler: Optional[StackSampler] = None
+        self._started = None
+        self._wall = self._cpu = 0.0
+
+    def start(self) -> None:
+        self._started = (time.perf_counter(), time.thread_time())
+        if self.sample_interval:
+            self._sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        if self._sampler is not None:
+            self._sampler.stop()
+        if self._started is not None:
+            self._wall = time.perf_counter() - self._started[0]
+            self._cpu = time.thread_time() - self._started[1]
+
+    def add_stage(self, name: str, wall: float, cpu: float) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(name, {"wall": 0.0, "cpu": 0.0, "veces": 0})
+            entry["wall"] += wall
+            entry["cpu"] += cpu
+            entry["veces"] += 1
+
+    def add_page(self, pagina: int, wall: float, cpu: float, chars: int, objetos: int) -> None:
+        with self._lock:
+            self.pages.append({"pagina": pagina, "wall": wall, "cpu": cpu, "caracteres": chars, "objetos_graficos": objetos})
+
+    def add_batch(self, size: int, width: Optional[int], wall: float) -> None:
+        with self._lock:
+            self.batches.append({"tamano": size, "ancho": width, "wall": wall})
+
+    def report(self) -> Dict:
+        pages = sorted(self.pages, key=lambda p: p["wall"], reverse=True)
+        batches = sorted(self.batches, key=lambda b: b["wall"], reverse=True)
+        report = {
+            "id": self.id,
+            "wall": self._wall,
+            "cpu": self._cpu,
+            "etapas": self.stages,
+            "paginas": {
+                "total": len(pages),
+                "wall": sum(p["wall"] for p in pages),
+                "cpu": sum(p["cpu"] for p in pages),
+                "mas_lentas": pages[:self.top],
+                "todas": sorted(self.pages, key=lambda p: p["pagina"]),
+            },
+            "lotes_clasificador": {
+                "total": len(batches),
+                "wall": sum(b["wall"] for b in batches),
+                "mas_lentos": batches[:self.top],
+            },
+        }
+        if self._sampler is not None:
+            samples = self._sampler.samples
+            report["muestreo"] = {
+                "intervalo": self.sample_interval,
+                "muestras": sum(samples.values()),
+                # Formato "pila conteo" (flamegraph.pl / speedscope)
+                "pilas": [f"{stack} {count}" for stack, count in samples.most_common()],
+            }
+        return report
+
+    def save(self, folder: str) -> str:
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{self.id}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+@contextmanager
+def activate(profile: Optional[RequestProfile]) -> Iterator[Optional[RequestProfile]]:
+    """
+    Hace de `profile` el perfil activo mientras dura el bloque (no hace nada con None).
+    """
+    if profile is None:
+        yield None
+        return
+    token = _current.set(profile)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        _current.reset(token)
+
+def profiles_folder(config) -> str:
+    return config.get('PROFILES_FOLDER') or os.path.join(config['UPLOAD_FOLDER'], "profiles")
+
+def valid_profile_id(profile_id: str) -> bool:
+    return bool(_PROFILE_ID.match(profile_id or ""))
+
+def requested_profile(request, config) -> Optional[RequestProfile]:
+    """
+    RequestProfile si la solicitud pide perfilado y la configuración lo permite.
+
+    El valor de `X-Profile` / `?profile=` debe ser PROFILING_TOKEN cuando está
+    configurado, o un valor verdadero ('1', 'true'...) si no. `X-Profile-Sample`
+    / `?profile_sample=1` agrega el perfil de llamadas por muestreo.
+    """
+    if not config.get('PROFILING_ENABLED'):
+        return None
+    flag = request.headers.get("X-Profile") or request.args.get("profile")
+    if not flag:
+        return None
+    token = config.get('PROFILING_TOKEN')
+    if token:
+        if not hmac.compare_digest(flag.encode("utf-8"), token.encode("utf-8")):
+            return None
+    elif flag.strip().lower() not in _TRUTHY:
+        return None
+
+    sample = (request.headers.get("X-Profile-Sample") or request.args.get("profile_sample", "")).strip().lower()
+    interval = config.get('PROFILING_SAMPLE_INTERVAL_MS', 5) / 1000 if sample in _TRUTHY else None
+    return RequestProfile(sample_interval=interval, top=config.get('PROFILING_TOP', 10))
@@ -1,13 +1,28 @@
 from flask import Flask
 from flask_cors import CORS
-from app.routes.pdf_routes import pdf_blueprint
+from app.routes.pdf_routes import pdf_blueprint, models
+from app.routes.job_routes import jobs_blueprint, configure_jobs
+from app.routes.metrics_routes import metrics_blueprint
+from app.routes.profile_routes import profiles_blueprint
 from app.core.logger import configure_logger
 from app.core.config import configure_app
+from app.services.result_cache import ResultCache
+from app.services.page_store import PageStore
 
 def create_app():
     app = Flask(__name__)
     configure_app(app)
     configure_logger(app)
     CORS(app)
+    app.extensions['result_cache'] = ResultCache.from_config(app.config)
+    app.extensions['page_store'] = PageStore.from_config(app.config)
+    # Carga y calentamiento del modelo según MODEL_WARMUP (la memoización se crea con él)
+    models.start(app.config)
     app.register_blueprint(pdf_blueprint)
+    app.register_blueprint(jobs_blueprint)
+    if app.config['METRICS_ENABLED']:
+        app.register_blueprint(metrics_blueprint)
+    if app.config['PROFILING_ENABLED']:
+        app.register_blueprint(profiles_blueprint)
+    configure_jobs(app)
     return app
\ No newline at end of file
@@ -0,0 +1,111 @@
+import logging
+import os
+import shutil
+import uuid
+from flask import Blueprint, jsonify, current_app
+
+from app.routes.pdf_routes import cleaner, get_classifier, validate_upload_request
+from app.services.pipeline import export_folder_for, save_uploaded_files, process_report
+from app.services.job_store import JobStore, EN_COLA, ERROR
+from app.services.job_queue import JobQueue
+from app.schemas.response_schema import PDFResponse, ParagraphResult, JobStatus, JobProgress
+
+jobs_blueprint = Blueprint('jobs', __name__)
+logger = logging.getLogger(__name__)
+
+def _jobs_folder(config) -> str:
+    return config.get('JOBS_FOLDER') or os.path.join(config['UPLOAD_FOLDER'], "jobs")
+
+def configure_jobs(app) -> JobQueue:
+    """
+    Crea la tienda y el pool de trabajos asíncronos y re-encola los pendientes.
+    """
+    config = app.config
+    store = JobStore(os.path.join(_jobs_folder(config), "jobs.db"))
+
+    def handler(job, progress):
+        payload = job["payload"]
+        try:
+            outcome = process_report(
+                payload["pdf_path"],
+                payload["excel_index_path"],
+                payload["export_folder"],
+                cleaner,
+                get_classifier(),
+                config,
+                progress,
+                result_cache=app.extensions.get('result_cache'),
+                page_store=app.extensions.get('page_store'),
+            )
+            return PDFResponse(
+                resultados=[ParagraphResult(**item) for item in outcome["resultados"]],
+                errores=outcome["errores"],
+                bytes_escritos=outcome["bytes_escritos"],
+                paginas_reutilizadas=outcome["paginas_reutilizadas"],
+                paginas_recalculadas=outcome["paginas_recalculadas"],
+            ).model_dump(mode="json")
+        finally:
+            shutil.rmtree(payload["job_dir"], ignore_errors=True)
+
+    queue = JobQueue(
+        store,
+        handler,
+        workers=config['JOBS_WORKERS'],
+        max_pending=config['JOBS_MAX_PENDING'],
+        # Varios latidos por período: un trabajo vivo nunca parece abandonado
+        heartbeat_interval=max(1.0, config['JOBS_STALE_SECONDS'] / 3),
+    )
+    queue.resume(stale_seconds=config['JOBS_STALE_SECONDS'])
+    app.extensions['jobs'] = queue
+    return queue
+
+@jobs_blueprint.route('/jobs', methods=['POST'])
+def create_job():
+    logger.info("Nueva solicitud de trabajo asíncrono.")
+
+    file, excel_files, error = validate_upload_request()
+    if error:
+        return error
+
+    queue = current_app.extensions['jobs']
+    job_id = uuid.uuid4().hex
+    job_dir = os.path.join(_jobs_folder(current_app.config), job_id)
+    os.makedirs(job_dir, exist_ok=True)
+
+    try:
+        # Los trabajos siempre usan disco: deben sobrevivir a un reinicio del servicio
+        file_path, excel_index_path, _ = save_uploaded_files(file, excel_files, job_dir)
+        queue.store.create(job_id, {
+            "job_dir": job_dir,
+            "pdf_path": file_path,
+            "excel_index_path": excel_index_path,
+            "export_folder": export_folder_for(current_app.config),
+        })
+    except Exception as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        logger.exception("No se pudo registrar el trabajo: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+    if not queue.submit(job_id):
+        logger.warning("Cola de trabajos llena; se rechaza el trabajo %s.", job_id)
+        queue.store.update(job_id, estado=ERROR, error="Job queue is full")
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return jsonify({'error': 'Job queue is full, retry later'}), 503
+
+    logger.info("Trabajo %s encolado.", job_id)
+    return jsonify({'id': job_id, 'estado': EN_COLA, 'url': f"/jobs/{job_id}"}), 202
+
+@jobs_blueprint.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = current_app.extensions['jobs'].store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    status = JobStatus(
+        id=job["id"],
+        estado=job["estado"],
+        progreso=JobProgress(etapa=job["etapa"], hecho=job["hecho"], total=job["total"]),
+        error=job["error"],
+        resultado=job["resultado"],
+    )
+    return status.model_dump_json(), 200
@@ -0,0 +1,12 @@
+from flask import Blueprint, Response
+
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+
+metrics_blueprint = Blueprint('metrics', __name__)
+
+@metrics_blueprint.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Métricas del proceso en formato de exposición de Prometheus.
+    """
+    return Response(REGISTRY.render(), mimetype=None, content_type=CONTENT_TYPE)
@@ -1,250 +1,279 @@
-import traceback
-from flask import Blueprint, jsonify, request, current_app
-from werkzeug.utils import secure_filename
+import json
+import logging
+import time
+from flask import Blueprint, Response, jsonify, request, current_app
 import os
-import uuid
-import glob
-from werkzeug.utils import secure_filename
-import shutil
-from datetime import datetime
-
-from app.utils.file_utils import is_pdf_file, is_excel_file , norm_esp, _norm, first_chunk_before_underscore
-from app.services.pdf_extractor import extract_paragraphs
+
+from app.utils.file_utils import is_pdf_file, is_excel_file
 from app.services.text_cleaner import TextCleaner
 from app.services.classifier import TextClassifier
-from app.schemas.response_schema import PDFResponse, ParagraphResult
-from app.services.especialidad_extractor import extraer_especialidades
-from app.services.especialidad_matcher import asignar_especialidad
-from app.services.observation_checker import excel_observation_cheker
+from app.services.cascade import with_cascade
+from app.services.inference_client import RemoteTextClassifier
+from app.services.model_registry import ModelRegistry
+from app.services.pipeline import (
+    export_folder_for, receive_uploaded_files, receive_batch_files, process_report, process_batch, iter_report
+)
+from app.core.config import classifier_options, cascade_options, inference_options
+from app.core import metrics
+from app.core.profiling import activate, profiles_folder, requested_profile
+from app.schemas.response_schema import BatchResponse, PDFResponse, ParagraphResult, StreamPage, StreamSummary
 
 pdf_blueprint = Blueprint('pdf', __name__)
+logger = logging.getLogger(__name__)
 cleaner = TextCleaner()
-classifier = TextClassifier()
+
+def build_classifier():
+    """
+    Clasificador de los workers: cliente del servidor de inferencia compartido
+    si INFERENCE_SOCKET está configurado, o un TextClassifier propio.
+    """
+    options = inference_options()
+    if options["address"]:
+        logger.info("Usando servidor de inferencia en %s", options['address'])
+        base = RemoteTextClassifier(options["address"], options["authkey"], options["connect_timeout"])
+    else:
+        base = TextClassifier(**classifier_options())
+    return with_cascade(base, **cascade_options())
+
+# El modelo se carga y calienta bajo demanda (ver ModelRegistry y MODEL_WARMUP)
+models = ModelRegistry(build_classifier)
+
+def get_classifier():
+    return models.get()
 
 @pdf_blueprint.route("/ping", methods=["GET"])
 def ping():
     return jsonify({"ok": True, "msg": "pong"})
 
-@pdf_blueprint.route('/upload', methods=['POST'])
-def upload_pdf():
-    
-    # Log: Iniciar el proceso
-    print("--------------------------------------------------")
-    print(f"[{datetime.now()}] INFO: Iniciando el proceso de subida de PDF y Excel.")
-
+@pdf_blueprint.route("/ready", methods=["GET"])
+def ready():
+    """
+    200 sólo cuando el modelo está cargado y caliente; 503 mientras tanto.
+    """
+    status = models.status()
+    return jsonify(status), (200 if status["ready"] else 503)
+
+def validate_upload_request():
+    """
+    Valida el PDF (campo 'file') y los Excel (campo 'excels') de la solicitud.
+    Devuelve (file, excel_files, None) o (None, None, respuesta_de_error).
+    """
     # === PDF ===
     if 'file' not in request.files:
-        print(f"[{datetime.now()}] WARNING: Fallo en la subida. No se encontró 'file' en la solicitud.")
-        return jsonify({'error': 'No file part in request (PDF)'}), 400
+        logger.warning("Fallo en la subida. No se encontró 'file' en la solicitud.")
+        return None, None, (jsonify({'error': 'No file part in request (PDF)'}), 400)
     
     file = request.files['file']
 
     if file.filename == '':
-        print(f"[{datetime.now()}] WARNING: Fallo en la subida. No se seleccionó ningún archivo.")
-        return jsonify({'error': 'No selected file'}), 400
+        logger.warning("Fallo en la subida. No se seleccionó ningún archivo.")
+        return None, None, (jsonify({'error': 'No selected file'}), 400)
     
     if not is_pdf_file(file.filename):
-        print(f"[{datetime.now()}] WARNING: Fallo en la subida. Archivo no es PDF: {file.filename}")
-        return jsonify({'error': 'Only PDF files are allowed'}), 400
-    
-    print(f"[{datetime.now()}] INFO: Archivo PDF recibido: {file.filename}")
+        logger.warning("Fallo en la subida. Archivo no es PDF: %s", file.filename)
+        return None, None, (jsonify({'error': 'Only PDF files are allowed'}), 400)
     
-    # === EXCELS ===
+    logger.info("Archivo PDF recibido: %s", file.filename)
+
+    excel_files, error = validate_excel_files()
+    if error:
+        return None, None, error
+    return file, excel_files, None
+
+def validate_excel_files():
+    """
+    Valida los Excel (campo 'excels') de la solicitud.
+    Devuelve (excel_files, None) o (None, respuesta_de_error).
+    """
     excel_files = request.files.getlist('excels')
 
     if not excel_files or all(f.filename.strip() == '' for f in excel_files):
-        print(f"[{datetime.now()}] WARNING: Fallo en la subida. No se proporcionaron archivos Excel.")
-        return jsonify({'error': 'At least one Excel must be provided in form field "excels"'}), 400
+        logger.warning("Fallo en la subida. No se proporcionaron archivos Excel.")
+        return None, (jsonify({'error': 'At least one Excel must be provided in form field "excels"'}), 400)
 
     for xf in excel_files:
         if not is_excel_file(xf.filename):
-            print(f"[{datetime.now()}] WARNING: Fallo en la subida. Archivo Excel inválido: {xf.filename}")
-            return jsonify({'error': f'Invalid Excel file: {xf.filename}'}), 400
+            logger.warning("Fallo en la subida. Archivo Excel inválido: %s", xf.filename)
+            return None, (jsonify({'error': f'Invalid Excel file: {xf.filename}'}), 400)
     
-    print(f"[{datetime.now()}] INFO: Se recibieron {len(excel_files)} archivos Excel.")
+    logger.info("Se recibieron %d archivos Excel.", len(excel_files))
+
+    return excel_files, None
+
+@pdf_blueprint.route('/upload', methods=['POST'])
+@metrics.track_request("upload")
+def upload_pdf():
+    
+    # Log: Iniciar el proceso
+    logger.info("Iniciando el proceso de subida de PDF y Excel.")
+
+    file, excel_files, error = validate_upload_request()
+    if error:
+        return error
 
     # Crear carpeta de exportación, si no existe.
-    export_folder = current_app.config.get(
-        'EXPORT_FOLDER',
-        os.path.join(os.path.expanduser("~"), "Documents", "PLN-ODINSA", "Matrices")
-    )
-    os.makedirs(export_folder, exist_ok=True)
-    print(f"[{datetime.now()}] INFO: Carpeta de exportación: {export_folder}")
+    export_folder = export_folder_for(current_app.config)
+    logger.info("Carpeta de exportación: %s", export_folder)
 
-    try:
+    # Perfilado bajo demanda (X-Profile / ?profile=): sin cachés, para medir el camino completo
+    profile = requested_profile(request, current_app.config)
+    headers = {"X-Profile-Id": profile.id, "X-Profile-Url": f"/profiles/{profile.id}"} if profile else {}
 
-        # Guardar el archivo PDF temporalmente
-        filename = secure_filename(file.filename)
-        unique_name = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_name)
-        file.save(file_path)
-        print(f"[{datetime.now()}] INFO: PDF guardado temporalmente en: {file_path}")
-
-
-
-        # Guardar los Excel temporalmente e indexa por especialidad
-        excel_index_path = {}  
-
-        for xf in excel_files:
-            original_raw = os.path.basename(xf.filename)        # <<-- crudo (con espacios)
-            esp_key = norm_esp(first_chunk_before_underscore(original_raw))
-
-            safe_name = secure_filename(original_raw)           # <<-- recién aquí lo saneas
-            xunique = f"{uuid.uuid4()}_{safe_name}"
-            xpath = os.path.join(current_app.config['UPLOAD_FOLDER'], xunique)
-            xf.save(xpath)
-            print(f"[{datetime.now()}] INFO: Excel '{original_raw}' (clave: {esp_key}) guardado en: {xpath}")
-
-            # Conserva el primer Excel encontrado por especialidad
-            if esp_key and esp_key not in excel_index_path:
-                excel_index_path[esp_key] = xpath
-                print(f"[{datetime.now()}] DEBUG: Excel asignado a la especialidad '{esp_key}'.")
-
-        # Extraer texto OCR
-        print(f"[{datetime.now()}] INFO: Iniciando extracción de párrafos...")
-        raw_paragraphs = extract_paragraphs(file_path)
-        print(f"[{datetime.now()}] INFO: Extracción completada. Se encontraron {len(raw_paragraphs)} párrafos.")
-
-        # Clean text
-        cleaned_paragraphs = [
-            {**p, 'texto': cleaner.clean_text(p['texto'])}
-            for p in raw_paragraphs
-        ]
-        print(f"[{datetime.now()}] INFO: Limpieza de texto completada.")
-
-        # Clasificacion
-        print(f"[{datetime.now()}] INFO: Iniciando clasificación de párrafos.")
-        results = [
-            {
-                **p,
-                'etiqueta': classifier.predict(p['texto']),
-                "especialidad": None,
-                "observacion_agregada": False  
-            }
-            for p in cleaned_paragraphs
-        ]
-        print(f"[{datetime.now()}] INFO: Clasificación finalizada.")
-
-        # Extraer especialidades
-        print(f"[{datetime.now()}] INFO: Iniciando extracción y asignación de especialidades.")
-        especialidades = extraer_especialidades(file_path)
-        for p in results:
-            if p["etiqueta"].lower() == "observacion":
-                p["especialidad"] = asignar_especialidad(p["pagina"], especialidades)
-                # O si se desea el sublabel:
-                # esp = asignar_especialidad_ext(p["pagina"], especialidades)
-                # p["especialidad"] = esp["principal"]
-                # p["subespecialidad"] = esp["sublabel"]
-        print(f"[{datetime.now()}] INFO: Asignación de especialidades completada.")        
-            
-        # Mapea el texto según la especialidad y le asigna el excel correspondiente
-        for p in results:
-            esp = p.get("especialidad")
-            if (
-                p.get("etiqueta", "").lower() == "observacion"
-                and esp is not None
-                and esp.upper() != "DESCONOCIDA"
-            ):
-                esp_norm = norm_esp(esp)
-                p["excel_file"] = excel_index_path.get(esp_norm, "")
-            else:
-                # Si no tiene especialidad o es desconocida, asigna ruta vacía
-                p["excel_file"] = ""
-        print(f"[{datetime.now()}] INFO: Mapeo de observaciones a archivos Excel completado.")
-
-
-        #Saca los valores unicos de especialidad siempre y cuando sea observacion
-        unique_especialidades = set()  
-        for p in results:   
-            if p.get("especialidad") and p.get("especialidad") != "DESCONOCIDA" and p.get("etiqueta", "").lower() == "observacion":
-                unique_especialidades.add(p.get("especialidad"))
-        print(f"[{datetime.now()}] INFO: Especialidades únicas encontradas: {unique_especialidades}")
-        
-        # Itera por las especialidades y agrega las observaciones
-        for esp in unique_especialidades:
-            print(f"[{datetime.now()}] INFO: Procesando especialidad: {esp}")
-            # Filtra una sola vez los ítems de esta especialidad que sean observaciones
-            items = [
-                p for p in results
-                if p.get("especialidad") == esp and p.get("etiqueta", "").lower() == "observacion"
-            ]
-
-            # Obtiene los textos
-            textos = [p["texto"] for p in items]
-
-            # Toma el primer excel_file NO vacío si existe; si no, usa ""
-            excel_path = next((p.get("excel_file") for p in items if p.get("excel_file")), "")
-
-            # Si no hay excel_path (cadena vacía o None), no se llama excel_observation_cheker
-            if not excel_path or not textos:
-                agregados_norm = set()  # vacío → nada quedó agregado
-                print(f"[{datetime.now()}] INFO: Sin Excel o textos para '{esp}'. No se agregan observaciones.")
-            else:
-                print(f"[{datetime.now()}] INFO: Verificando {len(textos)} observaciones en Excel de '{esp}'.")
-                agregados_norm = { _norm(t) for t in excel_observation_cheker(excel_path, textos) }
-
-            # Marca si cada observación quedó agregada
-            for p in items:
-                p["observacion_agregada"] = _norm(p["texto"]) in agregados_norm
-
-        print(f"[{datetime.now()}] INFO: Verificación de observaciones en Excel finalizada.")
-
-
-        # Copiar los Excels temporales a Documentos 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        for esp_norm_key, tmp_path in excel_index_path.items():
-            if not tmp_path or not os.path.exists(tmp_path):
-                print(f"[{datetime.now()}] WARNING: No se encontró el archivo temporal para la especialidad '{esp_norm_key}'.")
-                continue
-
-            # Nombre destino: <ESPECIALIDAD>_<timestamp>.xlsx
-            dest_name = f"{esp_norm_key}_{timestamp}.xlsx"
-            dest_path = os.path.join(export_folder, dest_name)
-
-            # Evitar colisiones si ya existe
-            if os.path.exists(dest_path):
-                dest_name = f"{esp_norm_key}_{timestamp}_{uuid.uuid4().hex[:6]}.xlsx"
-                dest_path = os.path.join(export_folder, dest_name)
-                print(f"[{datetime.now()}] WARNING: El archivo '{dest_path}' ya existe. Se renombró a: {dest_name}")
-
-            # Copia preservando metadata básica
-            shutil.copy2(tmp_path, dest_path)
-            print(f"[{datetime.now()}] INFO: Archivo Excel '{esp_norm_key}' copiado a: {dest_path}")
-        print(f"[{datetime.now()}] INFO: Copia de archivos Excel a la carpeta de exportación finalizada.")
-
-        response = PDFResponse(resultados=[
-            ParagraphResult(**item) for item in results
-        ])
-
-
-        print(f"[{datetime.now()}] INFO: Proceso completado exitosamente. Enviando respuesta.")
-        print("--------------------------------------------------")
+    try:
+        with activate(profile):
+            # Recibir el PDF y los Excel (en memoria o en archivos temporales según IO_MODE)
+            file_path, excel_index_path, temp_paths = receive_uploaded_files(file, excel_files, current_app.config)
+            uploaded_bytes = sum(os.path.getsize(p) for p in temp_paths)
+
+            outcome = process_report(
+                file_path, excel_index_path, export_folder, cleaner, get_classifier(), current_app.config,
+                result_cache=None if profile else current_app.extensions.get('result_cache'),
+                page_store=None if profile else current_app.extensions.get('page_store')
+            )
+
+        response = PDFResponse(
+            resultados=[ParagraphResult(**item) for item in outcome["resultados"]],
+            errores=outcome["errores"],
+            bytes_escritos=uploaded_bytes + outcome["bytes_escritos"],
+            paginas_reutilizadas=outcome["paginas_reutilizadas"],
+            paginas_recalculadas=outcome["paginas_recalculadas"]
+        )
+        logger.info("Bytes escritos en disco por la solicitud: %d", response.bytes_escritos)
+        logger.info("Proceso completado exitosamente. Enviando respuesta.")
+
+        return response.model_dump_json(), 200, headers
+    
+    except Exception as e:
+        # Registra el traceback completo del error
+        logger.exception("Ocurrió un error inesperado durante el procesamiento del PDF.")
+        return jsonify({'error': str(e)}), 500, headers
 
+    finally:
+        if profile is not None:
+            try:
+                logger.info("Perfil de la solicitud guardado en: %s", profile.save(profiles_folder(current_app.config)))
+            except OSError as e:
+                logger.warning("No se pudo guardar el perfil %s: %s", profile.id, e)
+
+        # Eliminar el PDF y los Excel temporales (no hay ninguno con IO_MODE=memory)
+        if 'temp_paths' in locals():
+            _remove_temp_files(temp_paths)
+        logger.debug("Limpieza de archivos temporales completada.")
+
+@pdf_blueprint.route('/upload/batch', methods=['POST'])
+@metrics.track_request("upload_batch")
+def upload_batch():
+    """
+    Varios reportes (campo 'files') contra un mismo juego de matrices (campo
+    'excels'): cada matriz se actualiza y se guarda una sola vez para todo el
+    lote. La respuesta trae los resultados de cada reporte; un reporte que
+    falla no detiene a los demás.
+    """
+    logger.info("Iniciando el procesamiento de un lote de reportes.")
+
+    pdf_files = [f for f in request.files.getlist('files') if f.filename]
+    if not pdf_files:
+        logger.warning("Fallo en la subida. No se encontraron PDFs en 'files'.")
+        return jsonify({'error': 'At least one PDF must be provided in form field "files"'}), 400
+    for pf in pdf_files:
+        if not is_pdf_file(pf.filename):
+            logger.warning("Fallo en la subida. Archivo no es PDF: %s", pf.filename)
+            return jsonify({'error': f'Only PDF files are allowed: {pf.filename}'}), 400
+    max_reports = current_app.config['BATCH_MAX_REPORTS']
+    if len(pdf_files) > max_reports:
+        logger.warning("Fallo en la subida. %d PDFs superan el máximo de %d.", len(pdf_files), max_reports)
+        return jsonify({'error': f'At most {max_reports} PDFs per batch'}), 400
+
+    excel_files, error = validate_excel_files()
+    if error:
+        return error
+
+    export_folder = export_folder_for(current_app.config)
+    try:
+        reports, excel_index_path, temp_paths = receive_batch_files(pdf_files, excel_files, current_app.config)
+        uploaded_bytes = sum(os.path.getsize(p) for p in temp_paths)
+        outcome = process_batch(
+            reports, excel_index_path, export_folder, cleaner, get_classifier(), current_app.config,
+            result_cache=current_app.extensions.get('result_cache'),
+            page_store=current_app.extensions.get('page_store')
+        )
+        outcome["bytes_escritos"] += uploaded_bytes
+        response = BatchResponse(**outcome)
+        logger.info("Lote de %d reportes completado. Enviando respuesta.", len(reports))
         return response.model_dump_json(), 200
-    
+
     except Exception as e:
-        print(f"[{datetime.now()}] EXCEPTION: Ocurrió un error inesperado durante el procesamiento del PDF.")
-        print(traceback.format_exc()) # Imprime el traceback completo del error
+        logger.exception("Ocurrió un error inesperado durante el procesamiento del lote.")
         return jsonify({'error': str(e)}), 500
 
     finally:
-        print(f"[{datetime.now()}] INFO: Iniciando limpieza de archivos temporales.")
-
-        # Eliminar el archivo PDF temporal
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
-            print(f"[{datetime.now()}] INFO: Archivo PDF temporal eliminado: {file_path}")
-        
-        # Eliminar los archivos Excel temporales
-        if 'excel_index_path' in locals():
-            for tmp_path in excel_index_path.values():
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-                    print(f"[{datetime.now()}] INFO: Archivo Excel temporal eliminado: {tmp_path}")
-        
-        print(f"[{datetime.now()}] INFO: Limpieza de archivos temporales completada.")
-        print("--------------------------------------------------")
+        if 'temp_paths' in locals():
+            _remove_temp_files(temp_paths)
+
+def _remove_temp_files(temp_paths):
+    for tmp_path in temp_paths:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+            logger.debug("Archivo temporal eliminado: %s", tmp_path)
+
+@pdf_blueprint.route('/upload/stream', methods=['POST'])
+def upload_pdf_stream():
+    """
+    Variante en streaming de /upload: emite los ParagraphResult página por
+    página mientras continúan la extracción y la clasificación, y al final el
+    resumen de las matrices actualizadas.
+
+    Formato NDJSON por defecto; Server-Sent Events con ?format=sse o
+    'Accept: text/event-stream'.
+    """
+    logger.info("Iniciando el proceso de subida de PDF y Excel (streaming).")
+    start = time.perf_counter()
+
+    file, excel_files, error = validate_upload_request()
+    if error:
+        return error
+
+    use_sse = (
+        request.args.get('format', '').lower() == 'sse'
+        or 'text/event-stream' in request.headers.get('Accept', '')
+    )
+    config = current_app.config
+    result_cache = current_app.extensions.get('result_cache')
+    export_folder = export_folder_for(config)
 
-    
+    # Los archivos se reciben antes de responder: el generador corre fuera del contexto de la solicitud
+    try:
+        file_path, excel_index_path, temp_paths = receive_uploaded_files(file, excel_files, config)
+        uploaded_bytes = sum(os.path.getsize(p) for p in temp_paths)
+    except Exception as e:
+        logger.exception("No se pudieron guardar los archivos: %s", e)
+        metrics.REQUESTS.inc(endpoint="upload_stream", status=500)
+        return jsonify({'error': str(e)}), 500
 
-    
+    def encode(event_type: str, payload: str) -> str:
+        if use_sse:
+            return f"event: {event_type}\ndata: {payload}\n\n"
+        return payload + "\n"
+
+    def generate():
+        status = 200
+        try:
+            for event in iter_report(file_path, excel_index_path, export_folder, cleaner, get_classifier(), config, result_cache):
+                if event["tipo"] == "pagina":
+                    yield encode("pagina", StreamPage(**event).model_dump_json())
+                else:
+                    event["bytes_escritos"] += uploaded_bytes
+                    yield encode("resumen", StreamSummary(**event).model_dump_json())
+            logger.info("Streaming completado exitosamente.")
+        except Exception as e:
+            status = 500
+            logger.exception("Error durante el streaming del PDF.")
+            yield encode("error", json.dumps({"tipo": "error", "error": str(e)}))
+        finally:
+            _remove_temp_files(temp_paths)
+            # La duración incluye el envío de todas las páginas
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="upload_stream")
+            metrics.REQUESTS.inc(endpoint="upload_stream", status=status)
+
+    mimetype = "text/event-stream" if use_sse else "application/x-ndjson"
+    return Response(generate(), mimetype=mimetype, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,16 @@
+from flask import Blueprint, current_app, jsonify, send_from_directory
+
+from app.core.profiling import profiles_folder, valid_profile_id
+
+profiles_blueprint = Blueprint('profiles', __name__)
+
+@profiles_blueprint.route("/profiles/<profile_id>", methods=["GET"])
+def download_profile(profile_id):
+    """
+    Descarga el reporte JSON de una solicitud perfilada.
+    """
+    if not valid_profile_id(profile_id):
+        return jsonify({'error': 'Invalid profile id'}), 400
+    return send_from_directory(
+        profiles_folder(current_app.config), f"{profile_id}.json", as_attachment=True, mimetype="application/json"
+    )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Dict, List
 from typing import Optional
 
 class ParagraphResult(BaseModel):
@@ -11,4 +11,53 @@ class ParagraphResult(BaseModel):
     observacion_agregada: bool
 
 class PDFResponse(BaseModel):
-    resultados: List[ParagraphResult]
\ No newline at end of file
+    resultados: List[ParagraphResult]
+    errores: Dict[str, str] = {}
+    bytes_escritos: int = 0
+    # Tienda de páginas por huella (None si no se consultó)
+    paginas_reutilizadas: Optional[int] = None
+    paginas_recalculadas: Optional[int] = None
+
+class StreamPage(BaseModel):
+    tipo: str = "pagina"
+    pagina: int
+    resultados: List[ParagraphResult]
+
+class EspecialidadResumen(BaseModel):
+    excel_file: str
+    observaciones: int
+    agregadas: int
+
+class StreamSummary(BaseModel):
+    tipo: str = "resumen"
+    especialidades: Dict[str, EspecialidadResumen]
+    agregadas: List[ParagraphResult]
+    errores: Dict[str, str] = {}
+    bytes_escritos: int = 0
+
+class BatchReportResult(BaseModel):
+    reporte: str
+    resultados: List[ParagraphResult]
+    observaciones: int = 0
+    agregadas: int = 0
+    error: Optional[str] = None
+    paginas_reutilizadas: Optional[int] = None
+    paginas_recalculadas: Optional[int] = None
+
+class BatchResponse(BaseModel):
+    reportes: List[BatchReportResult]
+    especialidades: Dict[str, EspecialidadResumen]
+    errores: Dict[str, str] = {}
+    bytes_escritos: int = 0
+
+class JobProgress(BaseModel):
+    etapa: Optional[str] = None
+    hecho: int = 0
+    total: int = 0
+
+class JobStatus(BaseModel):
+    id: str
+    estado: str
+    progreso: JobProgress
+    error: Optional[str] = None
+    resultado: Optional[PDFResponse] = None
@@ -0,0 +1,129 @@
+import time
+from typing import Dict, List, Optional, Sequence
+
+from app.core import metrics, profiling
+
+def build_token_batches(
+    lengths: Sequence[int],
+    max_tokens: int,
+    max_batch_size: Optional[int] = None
+) -> List[List[int]]:
+    """
+    Group sequence indices into batches under a token budget.
+
+    Indices are sorted by token length so that every batch holds sequences of
+    similar size; a batch is closed when its padded cost (longest member times
+    number of members) would exceed `max_tokens`. A sequence longer than the
+    budget still gets a batch of its own.
+
+    :param lengths: Token length of each sequence
+    :param max_tokens: Padded tokens allowed per batch
+    :param max_batch_size: Optional cap on items per batch
+    :return: List of batches, each one a list of indices into `lengths`
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    batches = []
+    current = []
+    for idx in order:
+        # Ordenados de menor a mayor: el ancho del lote es el del último índice
+        width = lengths[idx]
+        too_many_tokens = width * (len(current) + 1) > max_tokens
+        too_many_items = max_batch_size is not None and len(current) >= max_batch_size
+        if current and (too_many_tokens or too_many_items):
+            batches.append(current)
+            current = []
+        current.append(idx)
+
+    if current:
+        batches.append(current)
+    return batches
+
+def padding_stats(lengths: Sequence[int], batches: Sequence[Sequence[int]]) -> Dict[str, float]:
+    """
+    Real vs padded token counts for a given batching of `lengths`.
+    """
+    real = sum(lengths[i] for batch in batches for i in batch)
+    padded = sum(max(lengths[i] for i in batch) * len(batch) for batch in batches if batch)
+    return {
+        "real_tokens": real,
+        "padded_tokens": padded,
+        "pad_ratio": (padded - real) / padded if padded else 0.0,
+    }
+
+def sequential_batches(count: int, batch_size: int) -> List[List[int]]:
+    """
+    Batches in document order, `batch_size` items each (no bucketing).
+    """
+    return [list(range(start, min(start + batch_size, count))) for start in range(0, count, batch_size)]
+
+def classify_by_length(
+    classifier,
+    texts: Sequence[str],
+    max_tokens: int = 8192,
+    max_batch_size: Optional[int] = None
+) -> List[str]:
+    """
+    Classify texts with length-bucketed batches under a token budget.
+
+    Identical texts are classified once. When the classifier carries a
+    `memo` (ClassificationMemo), known texts skip the model entirely and new
+    labels are stored back. A classifier exposing `triage` (CascadeClassifier)
+    labels the easy texts with its first stage. The remaining texts are tokenized once, scheduled
+    with `build_token_batches` and run batch by batch; labels come back in
+    input order, so the caller's `pagina` ordering is preserved. A classifier
+    exposing `classify_texts` (RemoteTextClassifier) receives them in one call
+    and does its own batching.
+
+    :param classifier: A `TextClassifier` (or anything exposing encode/run_batch/labels_from_logits)
+    :param texts: Texts to classify
+    :param max_tokens: Padded tokens allowed per batch
+    :param max_batch_size: Optional cap on items per batch
+    :return: One label per text, in input order
+    """
+    if not texts:
+        return []
+
+    unique = list(dict.fromkeys(texts))
+    memo = getattr(classifier, "memo", None)
+    known = memo.get_many(unique) if memo is not None else {}
+    pending = [t for t in unique if t not in known]
+    if memo is not None:
+        metrics.cache_lookup("memo", hits=len(known), misses=len(pending))
+
+    if pending:
+        triage = getattr(classifier, "triage", None)
+        new_labels = triage(pending) if triage is not None else {}
+        uncertain = [t for t in pending if t not in new_labels]
+        if uncertain:
+            remote = getattr(classifier, "classify_texts", None)
+            labels = remote(uncertain) if remote is not None else _run_bucketed(classifier, uncertain, max_tokens, max_batch_size)
+            new_labels.update(zip(uncertain, labels))
+        if memo is not None:
+            memo.put_many(new_labels)
+        known.update(new_labels)
+
+    return [known[t] for t in texts]
+
+def _run_bucketed(classifier, texts: Sequence[str], max_tokens: int, max_batch_size: Optional[int]) -> List[str]:
+    sequences = classifier.encode(texts)
+    fixed_batch = getattr(classifier, "fixed_batch", None)
+    if fixed_batch:
+        # Con eje de lote estático el modelo siempre procesa `fixed_batch` filas
+        # (run_batch rellena las que falten): cortar por presupuesto de tokens
+        # sólo agregaría ejecuciones. Se agrupan por longitud en lotes completos.
+        order = sorted(range(len(sequences)), key=lambda i: len(sequences[i]))
+        batches = [order[start:start + fixed_batch] for start in range(0, len(order), fixed_batch)]
+    else:
+        batches = build_token_batches([len(seq) for seq in sequences], max_tokens, max_batch_size)
+
+    profile = profiling.current()
+    labels = [None] * len(sequences)
+    for batch in batches:
+        start = time.perf_counter()
+        logits = classifier.run_batch([sequences[i] for i in batch])
+        if profile is not None:
+            profile.add_batch(len(batch), max(len(sequences[i]) for i in batch), time.perf_counter() - start)
+        for idx, label in zip(batch, classifier.labels_from_logits(logits)):
+            labels[idx] = label
+    return labels
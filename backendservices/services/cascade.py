@@ -0,0 +1,165 @@
+import logging
+import re
+import threading
+import unicodedata
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.file_utils import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# --- Featurizer -------------------------------------------------------------
+# Copia de modeltest/src/cascade_features.py (con el que se entrena el
+# modelo): cualquier cambio debe hacerse en ambos lados.
+
+N_FEATURES = 2 ** 18
+FEATURES_VERSION = 1
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def _tokens(text: str) -> list:
+    text = unicodedata.normalize("NFD", (text or "").lower()).encode("ascii", "ignore").decode("ascii")
+    return _TOKEN.findall(text)
+
+def _grams(text: str) -> list:
+    """
+    Unigramas y bigramas de palabras, trigramas de caracteres y dos rasgos de
+    forma (longitud y proporción de números) que separan fragmentos de tablas,
+    pies de página y leyendas cortas.
+    """
+    tokens = _tokens(text)
+    grams = list(tokens)
+    grams += [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    joined = f" {' '.join(tokens)} "
+    grams += [f"#{joined[i:i + 3]}" for i in range(len(joined) - 2)]
+
+    digits = sum(token.isdigit() for token in tokens)
+    grams.append(f"__len_{min(len(tokens) // 4, 16)}")
+    grams.append(f"__num_{(10 * digits) // len(tokens) if tokens else 0}")
+    return grams
+
+def hashed_features(text: str, n_features: int = N_FEATURES):
+    """
+    Vector disperso (índices ordenados, valores) de un texto: conteos con
+    hashing CRC32, escala logarítmica y norma L2.
+    """
+    counts = {}
+    for gram in _grams(text):
+        idx = zlib.crc32(gram.encode("utf-8")) % n_features
+        counts[idx] = counts.get(idx, 0) + 1
+
+    indices = np.fromiter(sorted(counts), dtype=np.int64, count=len(counts))
+    values = np.log1p(np.array([counts[i] for i in indices.tolist()], dtype=np.float32))
+    norm = float(np.linalg.norm(values))
+    if norm:
+        values /= norm
+    return indices, values
+
+# ----------------------------------------------------------------------------
+
+class HashedLinearModel:
+    """
+    Logistic model over hashed n-grams (first stage of the cascade).
+    """
+    def __init__(self, weights: np.ndarray, bias: float, n_features: int = N_FEATURES):
+        self.weights = weights
+        self.bias = float(bias)
+        self.n_features = int(n_features)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLinearModel":
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != FEATURES_VERSION:
+                raise ValueError(f"Cascade model {path} uses featurizer v{version}, expected v{FEATURES_VERSION}")
+            return cls(data["weights"].astype(np.float32), float(data["bias"]), int(data["n_features"]))
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Probability of 'observacion' for each text.
+        """
+        scores = np.empty(len(texts), dtype=np.float64)
+        for row, text in enumerate(texts):
+            indices, values = hashed_features(text, self.n_features)
+            scores[row] = float(self.weights[indices] @ values) + self.bias
+        return 1 / (1 + np.exp(-scores))
+
+class CascadeClassifier:
+    """
+    Two-stage classifier: the hashed n-gram model decides the paragraphs it is
+    confident about and only the rest go to the transformer.
+
+    A paragraph whose first-stage probability is <= `low` is labeled
+    'No observacion', >= `high` 'observacion'; anything in between is
+    uncertain. Everything else (encode, run_batch, labels_from_logits,
+    fixed_batch...) is delegated to the wrapped TextClassifier, so
+    `classify_by_length` sends the uncertain paragraphs through the usual
+    bucketed batches.
+    """
+    def __init__(self, classifier, model_path: str, low: float = 0.05, high: float = 0.99):
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"Invalid cascade band: low={low}, high={high}")
+        self.classifier = classifier
+        self.first_stage = HashedLinearModel.load(model_path)
+        self.low = low
+        self.high = high
+        self.memo = None
+        self.decided = 0
+        self.forwarded = 0
+        self._lock = threading.Lock()
+        # Las etiquetas dependen también del primer nivel y de la banda
+        self.fingerprint = f"{classifier.fingerprint}|cascade:{file_sha256(model_path)}:{low}:{high}"
+
+    def __getattr__(self, name):
+        return getattr(self.classifier, name)
+
+    def triage(self, texts: Sequence[str]) -> Dict[str, str]:
+        """
+        Labels for the texts the first stage is confident about; the missing
+        ones must go to the transformer.
+        """
+        if not texts:
+            return {}
+        probabilities = self.first_stage.predict_proba(texts)
+        decided = {}
+        for text, probability in zip(texts, probabilities.tolist()):
+            if probability <= self.low:
+                decided[text] = self.classifier.label_map[0]
+            elif probability >= self.high:
+                decided[text] = self.classifier.label_map[1]
+        with self._lock:
+            self.decided += len(decided)
+            self.forwarded += len(texts) - len(decided)
+        return decided
+
+    def predict(self, text: str) -> str:
+        return self.predict_batch([text], batch_size=1)[0]
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 32) -> List[str]:
+        unique = list(dict.fromkeys(texts))
+        labels = self.triage(unique)
+        uncertain = [t for t in unique if t not in labels]
+        labels.update(zip(uncertain, self.classifier.predict_batch(uncertain, batch_size)))
+        return [labels[t] for t in texts]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            decided, forwarded = self.decided, self.forwarded
+        total = decided + forwarded
+        return {
+            "decididos": decided,
+            "al_transformer": forwarded,
+            "fraccion_omitida": decided / total if total else 0.0,
+        }
+
+def with_cascade(classifier, model_path: Optional[str] = None, low: float = 0.05, high: float = 0.99):
+    """
+    Wrap `classifier` in a CascadeClassifier when a first-stage model is configured.
+    """
+    if not model_path:
+        return classifier
+    logger.info("Cascada habilitada: %s (banda %s - %s)", model_path, low, high)
+    return CascadeClassifier(classifier, model_path, low=low, high=high)
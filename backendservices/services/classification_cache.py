@@ -0,0 +1,160 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Dict, Iterable, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    namespace TEXT NOT NULL,
+    key       BLOB NOT NULL,
+    label     TEXT NOT NULL,
+    used      REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+def text_key(text: str) -> bytes:
+    """
+    Compact key for a cleaned paragraph (16-byte BLAKE2b digest).
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+class ClassificationMemo:
+    """
+    Memoización de etiquetas por párrafo limpio (salida de TextCleaner.clean_text).
+
+    Dos niveles: un LRU acotado en el proceso y, opcionalmente, una base SQLite
+    (WAL + mmap) compartida por todos los workers. Las entradas viven bajo el
+    `namespace` de la huella del modelo: al cambiar el archivo ONNX la huella
+    cambia y las etiquetas del modelo anterior dejan de usarse. La base puede
+    compartirse entre servicios con modelos distintos (p. ej. durante un
+    despliegue gradual); con `db_max_entries` se eliminan las entradas usadas
+    hace más tiempo, de cualquier modelo.
+    """
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 100_000,
+        db_path: Optional[str] = None,
+        db_max_entries: Optional[int] = None
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.db_max_entries = db_max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            with closing(self._connect()) as conn, conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(_SCHEMA)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(labels)")}
+                if "used" not in columns:
+                    # Bases creadas antes de la columna: las entradas existentes son las primeras en salir
+                    conn.execute("ALTER TABLE labels ADD COLUMN used REAL NOT NULL DEFAULT 0")
+                conn.execute("CREATE INDEX IF NOT EXISTS labels_used ON labels (used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA mmap_size = 268435456")
+        return conn
+
+    def get_many(self, texts: Iterable[str]) -> Dict[str, str]:
+        """
+        Etiquetas conocidas para `texts`; los textos sin entrada no aparecen en el resultado.
+        """
+        found = {}
+        missing = {}
+        with self._lock:
+            for text in texts:
+                key = text_key(text)
+                label = self._lru.get(key)
+                if label is None:
+                    missing[key] = text
+                else:
+                    self._lru.move_to_end(key)
+                    found[text] = label
+
+        if missing and self.db_path:
+            keys = list(missing)
+            with closing(self._connect()) as conn, conn:
+                # Consultas en bloques para no exceder el límite de parámetros de SQLite
+                now = time.time()
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ", ".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT key, label FROM labels WHERE namespace = ? AND key IN ({placeholders})",
+                        (self.namespace, *chunk),
+                    ).fetchall()
+                    for key, label in rows:
+                        found[missing[key]] = label
+                    if rows and self.db_max_entries:
+                        # Marca las entradas como usadas recientemente (sólo importa si hay límite)
+                        hit_keys = [key for key, _ in rows]
+                        conn.execute(
+                            f"UPDATE labels SET used = ? WHERE namespace = ? AND key IN ({', '.join('?' * len(hit_keys))})",
+                            (now, self.namespace, *hit_keys),
+                        )
+            self._remember({text_key(t): found[t] for t in missing.values() if t in found})
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missing) - sum(1 for t in missing.values() if t in found)
+        return found
+
+    def put_many(self, labels: Dict[str, str]) -> None:
+        entries = {text_key(text): label for text, label in labels.items()}
+        self._remember(entries)
+        if entries and self.db_path:
+            with closing(self._connect()) as conn, conn:
+                now = time.time()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO labels (namespace, key, label, used) VALUES (?, ?, ?, ?)",
+                    [(self.namespace, key, label, now) for key, label in entries.items()],
+                )
+                if self.db_max_entries:
+                    self._prune(conn)
+
+    def _prune(self, conn) -> None:
+        excess = conn.execute("SELECT COUNT(*) FROM labels").fetchone()[0] - self.db_max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM labels WHERE (namespace, key) IN "
+                "(SELECT namespace, key FROM labels ORDER BY used LIMIT ?)",
+                (excess,),
+            )
+
+    def _remember(self, entries: Dict[bytes, str]) -> None:
+        with self._lock:
+            for key, label in entries.items():
+                self._lru[key] = label
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._lru)}
+
+    @classmethod
+    def from_config(cls, config, namespace: str) -> Optional["ClassificationMemo"]:
+        """
+        Crea la memoización si MEMO_ENABLED; MEMO_DB_PATH agrega el nivel en disco.
+        """
+        if not config.get('MEMO_ENABLED'):
+            return None
+        return cls(
+            namespace,
+            max_entries=config['MEMO_MAX_ENTRIES'],
+            db_path=config.get('MEMO_DB_PATH'),
+            db_max_entries=config.get('MEMO_DB_MAX_ENTRIES'),
+        )
@@ -1,63 +1,298 @@
-import os 
+import os
+import json
+import logging
+import time
+import uuid
 import numpy as np
-import onnxruntime as ort
-from transformers import AutoTokenizer
-from typing import Optional
+from typing import List, Optional, Sequence
+from app.utils.file_utils import file_sha256
+from app.services.tokenizer import load_tokenizer
+
+ARTIFACT_MANIFEST = "artifact.json"
+DEFAULT_TOKENIZER = "distilbert-base-uncased"
+
+logger = logging.getLogger(__name__)
+
+# onnxruntime se importa al crear la sesión, no al importar el módulo
+_GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
 
 class TextClassifier:
-    def __init__(self, model_path: str = None, threshold: float = 0.85):
+    def __init__(
+        self,
+        model_path: str = None,
+        threshold: float = 0.85,
+        max_length: int = 256,
+        tokenizer_path: Optional[str] = None,
+        graph_optimization_level: str = "all",
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        enable_cpu_mem_arena: bool = True,
+        enable_mem_pattern: bool = True,
+        optimized_model_cache: Optional[str] = None,
+    ):
         """
         Initializes the classifier with ONNX model and tokenizer.
+
+        `model_path` may point to a plain `.onnx` file or to an artifact
+        directory produced by `modeltest/src/export_module.py` (model, tokenizer
+        and `artifact.json`). Thread counts of 0 let onnxruntime decide.
         """
         if model_path is None:
             project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
             model_path = os.path.join(project_root, "app", "models", "model.onnx")
-        self.model_path = model_path
 
-        print(f"🔍 Buscando modelo ONNX en: {self.model_path}")
+        logger.info("Buscando modelo ONNX en: %s", model_path)
 
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"ONNX model not found at {model_path}")
-        
+
+        self.manifest = {}
+        if os.path.isdir(model_path):
+            model_path, tokenizer_path, optimized_model_cache = self._load_artifact(
+                model_path, tokenizer_path, optimized_model_cache
+            )
+            max_length = self.manifest.get("max_length", max_length)
+
         self.threshold = threshold
+        self.max_length = max_length
         self.model_path = model_path
-        self.tokenizer = AutoTokenizer.from_pretrained("distilbert-base-uncased")
-        self.session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self.tokenizer = load_tokenizer(tokenizer_path, os.path.dirname(model_path), DEFAULT_TOKENIZER, max_length)
+        self.session = self._create_session(
+            graph_optimization_level,
+            intra_op_threads,
+            inter_op_threads,
+            enable_cpu_mem_arena,
+            enable_mem_pattern,
+            optimized_model_cache,
+        )
 
         self.input_names = {inp.name for inp in self.session.get_inputs()}
         self.output_name = self.session.get_outputs()[0].name
+        self.pad_token_id = self.tokenizer.pad_token_id
+
+        # Modelos exportados con ejes estáticos (p. ej. [1, 256]) no aceptan
+        # lotes de tamaño o ancho variable: se respetan esas dimensiones.
+        input_shape = next(inp.shape for inp in self.session.get_inputs() if inp.name == "input_ids")
+        self.fixed_batch = input_shape[0] if isinstance(input_shape[0], int) else None
+        self.fixed_width = input_shape[1] if isinstance(input_shape[1], int) else None
 
         self.label_map = {
             0: "No observacion",
             1: "observacion"
         }
 
+        # Identifica el modelo cargado y su umbral; las cachés de resultados lo
+        # usan como parte de la clave, de modo que un modelo nuevo las invalida.
+        self.model_sha256 = file_sha256(self.model_path)
+        self.fingerprint = f"{self.model_sha256}:{self.threshold}:{self.max_length}"
+
+        # Memoización opcional de etiquetas por párrafo (ver classification_cache)
+        self.memo = None
+
+    def _load_artifact(self, artifact_dir: str, tokenizer_path: Optional[str], optimized_model_cache: Optional[str]):
+        """
+        Resolve model file, tokenizer and optimized-model cache from an artifact directory.
+        """
+        manifest_path = os.path.join(artifact_dir, ARTIFACT_MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+        model_file = os.path.join(artifact_dir, self.manifest.get("model_file", "model.onnx"))
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(f"ONNX model not found at {model_file}")
+
+        bundled_tokenizer = os.path.join(artifact_dir, self.manifest.get("tokenizer_dir", "tokenizer"))
+        if tokenizer_path is None and os.path.isdir(bundled_tokenizer):
+            tokenizer_path = bundled_tokenizer
+
+        if optimized_model_cache is None:
+            optimized_model_cache = os.path.join(artifact_dir, "optimized")
+
+        return model_file, tokenizer_path, optimized_model_cache
+
+    def _create_session(
+        self,
+        graph_optimization_level: str,
+        intra_op_threads: int,
+        inter_op_threads: int,
+        enable_cpu_mem_arena: bool,
+        enable_mem_pattern: bool,
+        optimized_model_cache: Optional[str],
+    ):
+        """
+        Build the InferenceSession with the tuned options.
+
+        When `optimized_model_cache` is a directory, the graph optimized by
+        onnxruntime is saved there on first load and reused afterwards, so the
+        optimization passes are not repeated on every worker start. The file
+        is written under a per-process name and renamed into place.
+        """
+        import onnxruntime as ort
+
+        level_name = (graph_optimization_level or "all").lower()
+        if level_name not in _GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(f"Unknown graph optimization level: {graph_optimization_level}")
+
+        def session_options(level: str):
+            options = ort.SessionOptions()
+            options.graph_optimization_level = getattr(ort.GraphOptimizationLevel, _GRAPH_OPTIMIZATION_LEVELS[level])
+            options.intra_op_num_threads = int(intra_op_threads or 0)
+            options.inter_op_num_threads = int(inter_op_threads or 0)
+            options.enable_cpu_mem_arena = bool(enable_cpu_mem_arena)
+            options.enable_mem_pattern = bool(enable_mem_pattern)
+            return options
+
+        def create(path: str, options):
+            return ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+        # Las optimizaciones de "all" (layout) dependen de la CPU: el grafo
+        # guardado se limita a "extended" y "all" se vuelve a aplicar al cargarlo.
+        saved_level = "extended" if level_name == "all" else level_name
+        cached = self._optimized_model_file(optimized_model_cache, saved_level, ort.__version__)
+        if cached and os.path.exists(cached):
+            # El grafo ya fue optimizado en una carga anterior
+            logger.info("Usando modelo optimizado en caché: %s", cached)
+            return create(cached, session_options("all" if level_name == "all" else "disable"))
+        if not cached or level_name == "disable":
+            return create(self.model_path, session_options(level_name))
+
+        # Cada proceso escribe su propio archivo y lo renombra: otro worker que
+        # arranque a la vez nunca encuentra un grafo a medio escribir
+        tmp_path = f"{os.path.splitext(cached)[0]}.{uuid.uuid4().hex}.tmp.onnx"
+        options = session_options(saved_level)
+        options.optimized_model_filepath = tmp_path
+        try:
+            session = create(self.model_path, options)
+            os.replace(tmp_path, cached)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if level_name == "all":
+            session = create(cached, session_options("all"))
+        return session
+
+    def _optimized_model_file(self, cache_dir: Optional[str], level_name: str, ort_version: str) -> Optional[str]:
+        """
+        Cache file name tied to the source model's size and mtime and to the
+        onnxruntime version, so a new model or runtime never reuses a stale graph.
+        """
+        if not cache_dir:
+            return None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as e:
+            logger.warning("No se pudo crear la caché de modelo optimizado '%s': %s", cache_dir, e)
+            return None
+
+        stat = os.stat(self.model_path)
+        stem = os.path.splitext(os.path.basename(self.model_path))[0]
+        return os.path.join(cache_dir, f"{stem}.{level_name}.ort{ort_version}.{stat.st_size}-{int(stat.st_mtime)}.onnx")
+
     def predict(self, text: str) -> str:
         """
         Predict the label for the given text using the ONNX model.
         """
-        # Tokenize and prepare input
-        inputs = self.tokenizer(text, return_tensors="np", truncation=True, padding='max_length', max_length=256)
-        inputs = {k: v.astype(np.int64) for k, v in inputs.items()}
+        return self.predict_batch([text], batch_size=1)[0]
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 32) -> List[str]:
+        """
+        Predict the labels for many texts.
+
+        The whole document is tokenized in a single call; each batch is padded
+        only up to its longest member and sent in one `session.run`. Sigmoid,
+        argmax and threshold are applied over the full logits matrix.
+
+        :param texts: Texts to classify
+        :param batch_size: Maximum number of texts per forward pass
+        :return: One label per text, in input order
+        """
+        if not texts:
+            return []
+
+        sequences = self.encode(texts)
+        logits = np.concatenate([
+            self.run_batch(sequences[start:start + self._batch_limit(batch_size)])
+            for start in range(0, len(sequences), self._batch_limit(batch_size))
+        ], axis=0)
+
+        return self.labels_from_logits(logits)
+
+    def encode(self, texts: Sequence[str]) -> List[List[int]]:
+        """
+        Tokenize all texts in one call, truncated but without padding.
+        """
+        return self.tokenizer.encode(texts)
+
+    def run_batch(self, sequences: Sequence[Sequence[int]]) -> np.ndarray:
+        """
+        Pad a batch of token id sequences to its longest member and run the model.
+        Returns the raw logits matrix with one row per sequence.
+
+        With a static batch axis (`fixed_batch`), larger inputs are split and a
+        short batch is filled with padding rows whose logits are dropped.
+        """
+        if self.fixed_batch and len(sequences) > self.fixed_batch:
+            return np.concatenate([
+                self.run_batch(sequences[start:start + self.fixed_batch])
+                for start in range(0, len(sequences), self.fixed_batch)
+            ], axis=0)
+
+        rows = self.fixed_batch or len(sequences)
+        width = self.fixed_width or max(len(seq) for seq in sequences)
+        input_ids = np.full((rows, width), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((rows, width), dtype=np.int64)
+        for row, seq in enumerate(sequences):
+            input_ids[row, :len(seq)] = seq
+            attention_mask[row, :len(seq)] = 1
+
         input_feed = {
-            'input_ids': inputs['input_ids'],
-            'attention_mask': inputs['attention_mask']
+            'input_ids': input_ids,
+            'attention_mask': attention_mask
         }
 
         # Check for models that expect token_type_ids
-        if 'token_type_ids' in self.input_names and 'token_type_ids' in inputs:
-            input_feed['token_type_ids'] = inputs['token_type_ids']
+        if 'token_type_ids' in self.input_names:
+            input_feed['token_type_ids'] = np.zeros_like(input_ids)
 
-        # Run inference
-        logits = self.session.run([self.output_name], input_feed)[0]
+        return self.session.run([self.output_name], input_feed)[0][:len(sequences)]
 
+    def labels_from_logits(self, logits: np.ndarray) -> List[str]:
+        """
+        Convert a logits matrix into labels applying sigmoid, argmax and threshold.
+        """
         # Convert logits to probabilities with sigmoid
         probabilities = 1 / (1 + np.exp(-logits))
-        predicted_class_id = int(np.argmax(probabilities, axis=1)[0])
+        predicted = np.argmax(probabilities, axis=1)
+
+        # Apply threshold: below it, default to "No observacion"
+        confident = probabilities[np.arange(len(predicted)), predicted] >= self.threshold
+        predicted = np.where(confident, predicted, 0)
+
+        return [self.label_map.get(int(class_id), "Desconocido") for class_id in predicted]
 
-        # Apply threshold
-        if probabilities[0, predicted_class_id] < self.threshold:
-            predicted_class_id = 0  # Default to "Otro" or similar
+    def warm_up(self, batches: int = 3, batch_size: int = 8) -> float:
+        """
+        Run a few dummy batches of increasing width so that the first real
+        request does not pay for onnxruntime's lazy allocations.
+
+        :param batches: Number of dummy batches (0 disables the warm-up)
+        :param batch_size: Texts per dummy batch
+        :return: Seconds spent
+        """
+        start = time.perf_counter()
+        for n in range(batches):
+            # Anchos crecientes hasta max_length
+            words = max(1, (self.max_length * (n + 1)) // (batches * 2))
+            texts = [" ".join(["observacion"] * words)] * self._batch_limit(batch_size)
+            self.labels_from_logits(self.run_batch(self.encode(texts)))
+        return time.perf_counter() - start
 
-        return self.label_map.get(predicted_class_id, "Desconocido")
-    
+    def _batch_limit(self, batch_size: int) -> int:
+        return self.fixed_batch or max(1, int(batch_size))
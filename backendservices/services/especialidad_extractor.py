@@ -1,45 +1,51 @@
 import re
-from typing import List, Dict
-import pdfplumber
+from typing import List, Dict, Union
+from app.services.page_text import PageTextProvider, as_provider
 from app.utils.normalizer import normalize_especialidad
 
-_HEADING = re.compile(r"^\s*(?:\d+(?:\.\d+)*\s+)?ESPECIALIDAD\s+(.+?)\s*$", re. IGNORECASE)
+# Un solo patrón para toda la página: por cada línea, la primera 'ESPECIALIDAD'
+# seguida de espacio y el resto de la línea sin espacios finales (lo mismo que
+# el encabezado numerado '1.2 ESPECIALIDAD X' o una búsqueda dentro de la línea).
+_HEADING = re.compile(r"ESPECIALIDAD[^\S\n]+([^\n]*\S)", re.IGNORECASE)
 
 
-def extraer_especialidades(pdf_path: str) -> List[Dict[str, str]]:
+def especialidades_en_pagina(page_num: int, text: str, occurences: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Append to `occurences` the ESPECIALIDAD headings found in one page's text.
+    Pages must be fed in order; returns the occurrences added for this page.
+    """
+    added = []
+    if not text:
+        return added
+
+    for m in _HEADING.finditer(text):
+        raw_name = m.group(1)
+        principal_std, sublabel_std, original_clean = normalize_especialidad(raw_name)
+
+        if occurences and occurences[-1]["pagina"] == page_num and occurences[-1]["especialidad_std"] == principal_std and occurences[-1]["sublabel_std"] == sublabel_std:
+            continue
+        
+        occurence = {
+            "pagina": page_num,
+            "especialidad_raw": original_clean,     # e.g., 'Eléctrica (Lado Aire)'
+            "especialidad_std": principal_std,       # e.g., 'ELECTRICA'
+            "sublabel_std": sublabel_std,            # e.g., 'LADO AIRE' or None
+        }
+        occurences.append(occurence)
+        added.append(occurence)
+    return added
+
+def extraer_especialidades(source: Union[str, PageTextProvider]) -> List[Dict[str, str]]:
 
     """
     Extract all heading occurrences '... ESPECIALIDAD <NAME> ...'
     Keeps every occurrence; attaches standardized name & optional sublabel.
+
+    :param source: Shared PageTextProvider (or path to the PDF file)
     """
     occurences = []
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ""
-            if not text:
-                continue
-            
-            for raw_line in text.split("\n"):
-                line = raw_line.strip()
-                if not line:
-                    continue
-                
-                m = _HEADING.match(line) or re.search(r"ESPECIALIDAD\s+(.+)", line, flags=re.IGNORECASE)
-                if not m:
-                    continue
-                
-                raw_name = m.group(1).strip()
-                principal_std, sublabel_std, original_clean = normalize_especialidad(raw_name)
-
-                if occurences and occurences[-1]["pagina"] == page_num and occurences[-1]["especialidad_std"] == principal_std and occurences[-1]["sublabel_std"] == sublabel_std:
-                    continue
-                
-                occurences.append({
-                    "pagina": page_num,
-                    "especialidad_raw": original_clean,     # e.g., 'Eléctrica (Lado Aire)'
-                    "especialidad_std": principal_std,       # e.g., 'ELECTRICA'
-                    "sublabel_std": sublabel_std,            # e.g., 'LADO AIRE' or None
-                })
+    for page_num, text in as_provider(source):
+        especialidades_en_pagina(page_num, text, occurences)
     occurences.sort(key=lambda x: x["pagina"])
-    return occurences
\ No newline at end of file
+    return occurences
@@ -1,5 +1,5 @@
-from bisect import bisect_right
-from typing import List, Dict, Optional
+import numpy as np
+from typing import Iterable, List, Dict, Optional, Union
 
 def _prepare_occurrences(especialidades: List[Dict]) -> List[Dict]:
     """
@@ -32,35 +32,64 @@ def _prepare_occurrences(especialidades: List[Dict]) -> List[Dict]:
                 dedup.append(especialidad)
     return dedup
 
-def asignar_especialidad(pagina_obs: int, especialidades: List[Dict]) -> str:
+class SpecialtyIndex:
     """
-    Devuelve la especialidad principal estandarizada (string).
-    Toma la última ocurrencia cuya página <= pagina_obs.
+    Índice de especialidades de un documento, construido una sola vez a partir
+    de la salida de `extraer_especialidades`.
+
+    Guarda las páginas de los encabezados en un arreglo ordenado y asigna a
+    cada página la última ocurrencia cuya página <= pagina_obs; la asignación
+    de todos los párrafos se resuelve con una sola llamada a `searchsorted`.
     """
-    occ = _prepare_occurrences(especialidades)
-    if not occ:
-        return "DESCONOCIDA"
+    def __init__(self, especialidades: List[Dict]):
+        occ = _prepare_occurrences(especialidades)
+        self.pages = np.fromiter((e["pagina"] for e in occ), dtype=np.int64, count=len(occ))
+        self.principales = [e["especialidad_std"] for e in occ]
+        self.sublabels = [e["sublabel_std"] for e in occ]
+
+    def __len__(self) -> int:
+        return len(self.principales)
 
-    pages = [e["pagina"] for e in occ]
-    idx = bisect_right(pages, int(pagina_obs)) - 1
-    if idx < 0:
-        return "DESCONOCIDA"
+    def positions(self, paginas: Iterable[int]) -> np.ndarray:
+        """
+        Posición de la ocurrencia vigente para cada página (-1 = antes del primer encabezado).
+        """
+        paginas = np.fromiter((int(p) for p in paginas), dtype=np.int64)
+        return np.searchsorted(self.pages, paginas, side="right") - 1
 
-    return occ[idx]["especialidad_std"]
+    def assign(self, paginas: Iterable[int]) -> List[str]:
+        """
+        Especialidad principal estandarizada para cada página.
+        """
+        return [
+            self.principales[i] if i >= 0 else "DESCONOCIDA"
+            for i in self.positions(paginas).tolist()
+        ]
 
-def asignar_especialidad_ext(pagina_obs: int, especialidades: List[Dict]) -> Dict[str, Optional[str]]:
+    def assign_ext(self, paginas: Iterable[int]) -> List[Dict[str, Optional[str]]]:
+        """
+        Principal y sublabel para cada página.
+        """
+        return [
+            {"principal": self.principales[i], "sublabel": self.sublabels[i]}
+            if i >= 0 else {"principal": "DESCONOCIDA", "sublabel": None}
+            for i in self.positions(paginas).tolist()
+        ]
+
+def _as_index(especialidades: Union[List[Dict], SpecialtyIndex]) -> SpecialtyIndex:
+    return especialidades if isinstance(especialidades, SpecialtyIndex) else SpecialtyIndex(especialidades)
+
+def asignar_especialidad(pagina_obs: int, especialidades: Union[List[Dict], SpecialtyIndex]) -> str:
+    """
+    Devuelve la especialidad principal estandarizada (string).
+    Toma la última ocurrencia cuya página <= pagina_obs.
+    Para muchas páginas del mismo documento, usar `SpecialtyIndex.assign`.
+    """
+    return _as_index(especialidades).assign([pagina_obs])[0]
+
+def asignar_especialidad_ext(pagina_obs: int, especialidades: Union[List[Dict], SpecialtyIndex]) -> Dict[str, Optional[str]]:
     """
     Versión extendida: devuelve principal y sublabel (si existe).
     Ejemplo: {"principal": "ELECTRICA", "sublabel": "LADO AIRE"}
     """
-    occ = _prepare_occurrences(especialidades)
-    if not occ:
-        return {"principal": "DESCONOCIDA", "sublabel": None}
-
-    pages = [e["pagina"] for e in occ]
-    idx = bisect_right(pages, int(pagina_obs)) - 1
-    if idx < 0:
-        return {"principal": "DESCONOCIDA", "sublabel": None}
-
-    hit = occ[idx]
-    return {"principal": hit["especialidad_std"], "sublabel": hit.get("sublabel_std")}
+    return _as_index(especialidades).assign_ext([pagina_obs])[0]
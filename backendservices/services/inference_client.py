@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+from multiprocessing.connection import Client
+from typing import List, Optional, Sequence
+
+def authkey_path(address: str) -> str:
+    """
+    Archivo (modo 0600) donde el servidor deja la clave que genera cuando no se configura INFERENCE_AUTHKEY.
+    """
+    return f"{address}.key"
+
+def read_authkey(address: str) -> bytes:
+    with open(authkey_path(address), "rb") as f:
+        return f.read()
+
+class RemoteTextClassifier:
+    """
+    Cliente del InferenceServer con la interfaz de TextClassifier (predict,
+    predict_batch, fingerprint, threshold, label_map, memo).
+
+    No carga modelo ni tokenizador: cada worker web sólo mantiene una
+    conexión por hilo con el servidor. `classify_by_length` detecta
+    `classify_texts` y delega el agrupamiento en lotes al servidor. Sin
+    `authkey` se usa la clave que el servidor generó junto al socket.
+    """
+    def __init__(self, address: str, authkey: Optional[bytes] = None, connect_timeout: float = 30.0):
+        self.address = address
+        self.authkey = authkey
+        self.connect_timeout = connect_timeout
+        self._local = threading.local()
+
+        info = self._call(("info",))
+        self.fingerprint = info["fingerprint"]
+        self.threshold = info["threshold"]
+        self.max_length = info["max_length"]
+        self.label_map = {int(k): v for k, v in info["label_map"].items()}
+        self.memo = None
+
+    def _connect(self):
+        # El servidor puede estar arrancando: se reintenta hasta connect_timeout
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                authkey = self.authkey or read_authkey(self.address)
+                return Client(self.address, family="AF_UNIX", authkey=authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.2)
+
+    def _connection(self):
+        # Una conexión por hilo y por proceso (no se comparte tras un fork)
+        pid, conn = getattr(self._local, "conn", (None, None))
+        if conn is None or pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = (os.getpid(), conn)
+        return conn
+
+    def _call(self, message):
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.send(message)
+                status, payload = conn.recv()
+                break
+            except (EOFError, OSError):
+                # Servidor reiniciado: se reconecta una vez
+                self._local.conn = (None, None)
+                conn.close()
+                if attempt:
+                    raise ConnectionError(f"Se perdió la conexión con el servidor de inferencia ({self.address})")
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def classify_texts(self, texts: Sequence[str]) -> List[str]:
+        """
+        Labels for `texts`, computed by the server (which batches them together
+        with the requests of the other workers).
+        """
+        if not texts:
+            return []
+        return self._call(("classify", list(texts)))
+
+    def predict(self, text: str) -> str:
+        return self.classify_texts([text])[0]
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 32) -> List[str]:
+        return self.classify_texts(texts)
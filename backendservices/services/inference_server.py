@@ -0,0 +1,227 @@
+"""
+Servidor local de inferencia compartido por todos los workers web.
+
+Uso (desde la carpeta que contiene el paquete `app`):
+    INFERENCE_SOCKET=/run/observeflow/inference.sock python -m app.services.inference_server
+
+Un único proceso carga el tokenizador y la sesión ONNX; los workers web se
+conectan por un socket Unix con RemoteTextClassifier (misma interfaz que
+TextClassifier). Las solicitudes de todos los workers se juntan en
+micro-lotes: se espera como máximo `max_latency_ms` desde la primera
+solicitud pendiente o hasta reunir `max_batch_texts` párrafos.
+
+Seguridad: los mensajes se deserializan con pickle, así que toda conexión
+se autentica con una clave. Si INFERENCE_AUTHKEY no está configurada, el
+servidor genera una al arrancar y la guarda en `<socket>.key` (modo 0600),
+de donde la leen los workers. El socket queda además con modo 0600: los
+workers deben ejecutarse con el mismo usuario que el servidor. Conviene
+ubicar el socket en una carpeta privada en lugar de /tmp.
+"""
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+import uuid
+from multiprocessing.connection import AuthenticationError, Client, Listener
+from typing import List, Optional, Sequence
+
+from app.services.batch_scheduler import classify_by_length
+from app.services.inference_client import authkey_path
+
+logger = logging.getLogger(__name__)
+
+class _Request:
+    __slots__ = ("texts", "done", "labels", "error")
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = list(texts)
+        self.done = threading.Event()
+        self.labels = None
+        self.error = None
+
+class InferenceServer:
+    """
+    Dueño del único clasificador; atiende a los workers por `address` (socket Unix).
+    Sin `authkey` genera una clave por ejecución (ver el docstring del módulo).
+    """
+    def __init__(
+        self,
+        classifier,
+        address: str,
+        authkey: Optional[bytes] = None,
+        max_batch_texts: int = 256,
+        max_latency_ms: float = 10.0,
+        batch_size: int = 32,
+        max_tokens: int = 8192
+    ):
+        self.classifier = classifier
+        self.address = address
+        self.authkey = authkey
+        self.max_batch_texts = max(1, max_batch_texts)
+        self.max_latency = max(0.0, max_latency_ms) / 1000
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._closed = threading.Event()
+        self._ready = threading.Event()
+
+    def info(self) -> dict:
+        """
+        Lo que el cliente necesita para comportarse como el TextClassifier remoto.
+        """
+        return {
+            "fingerprint": self.classifier.fingerprint,
+            "threshold": self.classifier.threshold,
+            "max_length": self.classifier.max_length,
+            "label_map": self.classifier.label_map,
+        }
+
+    def serve_forever(self) -> None:
+        if os.path.exists(self.address):
+            os.remove(self.address)  # socket de una ejecución anterior
+        if not self.authkey:
+            self.authkey = secrets.token_bytes(32)
+            self._write_authkey()
+
+        with Listener(self.address, family="AF_UNIX", authkey=self.authkey) as listener:
+            # Sólo el usuario del servidor puede conectarse (además de la clave)
+            os.chmod(self.address, 0o600)
+            threading.Thread(target=self._batch_loop, name="inference-batcher", daemon=True).start()
+            self._ready.set()
+            logger.info("Servidor de inferencia escuchando en %s", self.address)
+            while not self._closed.is_set():
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError, AuthenticationError) as e:
+                    if self._closed.is_set():
+                        break
+                    logger.warning("Conexión rechazada: %s", e)
+                    continue
+                if self._closed.is_set():
+                    conn.close()
+                    break
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+        self._queue.put(None)
+
+    def _write_authkey(self) -> None:
+        # Se crea con modo 0600 y se renombra: un worker nunca lee una clave a medio escribir
+        path = authkey_path(self.address)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.authkey)
+        os.replace(tmp_path, path)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def close(self) -> None:
+        self._closed.set()
+        # accept() no se interrumpe al cerrar el socket: una conexión vacía lo despierta
+        try:
+            Client(self.address, family="AF_UNIX", authkey=self.authkey).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+
+    def submit(self, texts: Sequence[str]) -> _Request:
+        request = _Request(texts)
+        self._queue.put(request)
+        return request
+
+    def _serve_connection(self, conn) -> None:
+        with conn:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                kind = message[0]
+                if kind == "info":
+                    conn.send(("ok", self.info()))
+                elif kind == "classify":
+                    request = self.submit(message[1])
+                    request.done.wait()
+                    conn.send(("error", request.error) if request.error else ("ok", request.labels))
+                else:
+                    conn.send(("error", f"Unknown message: {kind}"))
+
+    def _next_batch(self) -> Optional[List[_Request]]:
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        size = len(first.texts)
+        deadline = time.monotonic() + self.max_latency
+        while size < self.max_batch_texts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _batch_loop(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._run(batch)
+
+    def _run(self, batch: List[_Request]) -> None:
+        texts = [text for request in batch for text in request.texts]
+        try:
+            labels = classify_by_length(self.classifier, texts, max_tokens=self.max_tokens, max_batch_size=self.batch_size)
+        except Exception as e:
+            logger.exception("Falló un micro-lote de %d párrafos.", len(texts))
+            for request in batch:
+                request.error = str(e)
+                request.done.set()
+            return
+
+        start = 0
+        for request in batch:
+            request.labels = labels[start:start + len(request.texts)]
+            start += len(request.texts)
+            request.done.set()
+        self.batches += 1
+        self.requests += len(batch)
+
+def main():
+    from app.core.config import classifier_options, inference_options
+    from app.core.logger import configure_logging
+    from app.services.classifier import TextClassifier
+
+    configure_logging(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_FORMAT", "text"))
+    options = inference_options()
+    if not options["address"]:
+        raise SystemExit("INFERENCE_SOCKET no está configurado")
+
+    classifier = TextClassifier(**classifier_options())
+    if options["warmup_batches"]:
+        elapsed = classifier.warm_up(batches=options["warmup_batches"], batch_size=options["batch_size"])
+        logger.info("Modelo caliente en %.2fs", elapsed)
+
+    server = InferenceServer(
+        classifier,
+        options["address"],
+        authkey=options["authkey"],
+        max_batch_texts=options["max_batch_texts"],
+        max_latency_ms=options["max_latency_ms"],
+        batch_size=options["batch_size"],
+        max_tokens=options["max_tokens"],
+    )
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
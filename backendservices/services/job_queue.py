@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from app.services.job_store import JobStore, COMPLETADO, ERROR
+
+# handler(job, progress) -> resultado serializable a JSON
+JobHandler = Callable[[Dict, Callable[[str, int, int], None]], Dict]
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    """
+    Pool acotado de workers locales que procesa los trabajos guardados en un JobStore.
+
+    Como máximo `workers` trabajos se ejecutan a la vez y `max_pending` más
+    pueden esperar en cola; por encima de eso `submit` rechaza el trabajo.
+    Mientras un trabajo se ejecuta, un hilo lo marca como activo en la tienda
+    cada `heartbeat_interval` segundos (ver JobStore.requeue_stale).
+    """
+    def __init__(
+        self,
+        store: JobStore,
+        handler: JobHandler,
+        workers: int = 2,
+        max_pending: int = 20,
+        progress_interval: float = 0.5,
+        heartbeat_interval: float = 60.0
+    ):
+        self.store = store
+        self.handler = handler
+        self.progress_interval = progress_interval
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+        self._slots = threading.BoundedSemaphore(max(1, workers) + max(0, max_pending))
+        # Trabajos re-encolados al arrancar que no cupieron: se envían al liberarse cupos
+        self._waiting = deque()
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._heartbeat = threading.Thread(
+            target=self._beat, args=(heartbeat_interval,), name="job-heartbeat", daemon=True
+        )
+        self._heartbeat.start()
+
+    def submit(self, job_id: str) -> bool:
+        """
+        Encola un trabajo ya creado en la tienda. Devuelve False si la cola está llena.
+        """
+        if not self._slots.acquire(blocking=False):
+            return False
+        self._executor.submit(self._run, job_id)
+        return True
+
+    def resume(self, stale_seconds: float = 300) -> int:
+        """
+        Re-encola los trabajos que quedaron pendientes antes de un reinicio. Los
+        que no caben en la cola se envían a medida que terminan los demás.
+        """
+        job_ids = self.store.requeue_stale(stale_seconds)
+        with self._lock:
+            self._waiting.extend(job_ids)
+        self._drain()
+        if job_ids:
+            logger.info("Se reanudaron %d trabajos pendientes.", len(job_ids))
+        return len(job_ids)
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                if not self._waiting:
+                    return
+                if not self._slots.acquire(blocking=False):
+                    return
+                job_id = self._waiting.popleft()
+            self._executor.submit(self._run, job_id)
+
+    def _beat(self, interval: float) -> None:
+        while not self._stopped.wait(interval):
+            with self._lock:
+                running = list(self._running)
+            try:
+                self.store.heartbeat(running)
+            except Exception:
+                logger.exception("No se pudo registrar el latido de los trabajos en curso.")
+
+    def _progress_reporter(self, job_id: str) -> Callable[[str, int, int], None]:
+        """
+        Callback de progreso que escribe en la tienda como mucho cada `progress_interval`
+        segundos, salvo en cambios de etapa o al completar una etapa.
+        """
+        state = {"etapa": None, "ultimo": 0.0}
+
+        def progress(stage: str, done: int, total: int) -> None:
+            now = time.monotonic()
+            if stage == state["etapa"] and done < total and now - state["ultimo"] < self.progress_interval:
+                return
+            state["etapa"], state["ultimo"] = stage, now
+            self.store.update(job_id, etapa=stage, hecho=done, total=total)
+
+        return progress
+
+    def _run(self, job_id: str) -> None:
+        try:
+            if not self.store.claim(job_id):
+                return
+            with self._lock:
+                self._running.add(job_id)
+            job = self.store.get(job_id)
+            logger.info("Procesando trabajo %s.", job_id)
+            result = self.handler(job, self._progress_reporter(job_id))
+            self.store.update(job_id, estado=COMPLETADO, resultado=result)
+            logger.info("Trabajo %s completado.", job_id)
+        except Exception as e:
+            logger.exception("Falló el trabajo %s.", job_id)
+            self.store.update(job_id, estado=ERROR, error=str(e))
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+            self._slots.release()
+            self._drain()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stopped.set()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,211 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional
+
+# Estados de un trabajo
+EN_COLA = "en_cola"
+PROCESANDO = "procesando"
+COMPLETADO = "completado"
+ERROR = "error"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    estado      TEXT NOT NULL,
+    etapa       TEXT,
+    hecho       INTEGER NOT NULL DEFAULT 0,
+    total       INTEGER NOT NULL DEFAULT 0,
+    payload     TEXT NOT NULL,
+    resultado   TEXT,
+    error       TEXT,
+    creado      REAL NOT NULL,
+    actualizado REAL NOT NULL,
+    owner_host  TEXT,
+    owner_boot  TEXT,
+    owner_pid   INTEGER,
+    owner_token TEXT
+)
+"""
+
+# Columnas agregadas después de la primera versión de la tabla
+_OWNER_COLUMNS = (("owner_host", "TEXT"), ("owner_boot", "TEXT"), ("owner_pid", "INTEGER"), ("owner_token", "TEXT"))
+
+_UPDATABLE = {"estado", "etapa", "hecho", "total", "resultado", "error"}
+
+def _boot_id() -> str:
+    """
+    Identificador del arranque actual del sistema ("" si la plataforma no lo expone).
+    """
+    try:
+        with open("/proc/sys/kernel/random/boot_id", encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+_TOKEN = {}
+
+def _process_token() -> str:
+    """
+    Identificador único de este proceso: distingue al dueño de un trabajo de
+    otro proceso que recibió el mismo pid (p. ej. tras reiniciar un contenedor).
+    """
+    pid = os.getpid()
+    if pid not in _TOKEN:
+        # Por pid: un proceso hijo creado con fork no hereda el del padre
+        _TOKEN.clear()
+        _TOKEN[pid] = uuid.uuid4().hex
+    return _TOKEN[pid]
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # En Windows os.kill(pid, 0) termina el proceso: se consulta su código de salida
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # existe, pero pertenece a otro usuario
+    return True
+
+class JobStore:
+    """
+    Estado persistente de los trabajos asíncronos en SQLite.
+
+    Cada operación abre su propia conexión, por lo que la tienda puede usarse
+    desde varios hilos y procesos; el estado sobrevive a reinicios del worker.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.host = socket.gethostname()
+        self.boot_id = _boot_id()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, kind in _OWNER_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, job_id: str, payload: Dict) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (id, estado, payload, creado, actualizado) VALUES (?, ?, ?, ?, ?)",
+                (job_id, EN_COLA, json.dumps(payload), now, now),
+            )
+
+    def update(self, job_id: str, **fields) -> None:
+        unknown = set(fields) - _UPDATABLE
+        if unknown:
+            raise ValueError(f"Campos no actualizables: {', '.join(sorted(unknown))}")
+        if "resultado" in fields and fields["resultado"] is not None:
+            fields["resultado"] = json.dumps(fields["resultado"])
+
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments}, actualizado = ? WHERE id = ?",
+                (*fields.values(), time.time(), job_id),
+            )
+
+    def claim(self, job_id: str) -> bool:
+        """
+        Pasa un trabajo de 'en_cola' a 'procesando' y registra el proceso que lo
+        ejecuta (equipo, arranque, pid y token). Devuelve False si otro worker ya lo tomó.
+        """
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET estado = ?, actualizado = ?, owner_host = ?, owner_boot = ?, owner_pid = ?, owner_token = ? "
+                "WHERE id = ? AND estado = ?",
+                (PROCESANDO, time.time(), self.host, self.boot_id, os.getpid(), _process_token(), job_id, EN_COLA),
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job_ids: Iterable[str]) -> None:
+        """
+        Marca como activos los trabajos que este proceso está ejecutando, aunque
+        no reporten progreso (p. ej. clasificando un reporte grande).
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        placeholders = ", ".join("?" * len(job_ids))
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"UPDATE jobs SET actualizado = ? WHERE estado = ? AND owner_token = ? AND id IN ({placeholders})",
+                (time.time(), PROCESANDO, _process_token(), *job_ids),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def _owner_gone(self, job: sqlite3.Row, limit: float) -> bool:
+        """
+        True si el proceso que tomó el trabajo ya no existe. Su worker lo marca
+        como activo con `heartbeat`, así que `limit` (sin latidos desde
+        entonces) es además una cota para dueños que no pueden comprobarse:
+        filas anteriores al registro del dueño, otro equipo o un pid reutilizado
+        por otro proceso vivo.
+        """
+        if job["actualizado"] < limit:
+            return True
+        if job["owner_pid"] is None or job["owner_host"] != self.host:
+            return False
+        if job["owner_boot"] and self.boot_id and job["owner_boot"] != self.boot_id:
+            return True  # el equipo se reinició desde que se tomó el trabajo
+        if job["owner_pid"] == os.getpid():
+            # Nuestro pid: es nuestro sólo si lo tomó este mismo proceso (no uno anterior con igual pid)
+            return job["owner_token"] != _process_token()
+        return not _process_alive(job["owner_pid"])
+
+    def requeue_stale(self, stale_seconds: float) -> List[str]:
+        """
+        Devuelve a la cola los trabajos pendientes y los 'procesando' cuyo worker
+        terminó (se reinició o murió) o que llevan `stale_seconds` sin latidos.
+        """
+        limit = time.time() - stale_seconds
+        with closing(self._connect()) as conn, conn:
+            running = conn.execute(
+                "SELECT id, actualizado, owner_host, owner_boot, owner_pid, owner_token FROM jobs WHERE estado = ?",
+                (PROCESANDO,),
+            ).fetchall()
+            for job in running:
+                if self._owner_gone(job, limit):
+                    conn.execute(
+                        "UPDATE jobs SET estado = ?, etapa = NULL, hecho = 0, total = 0, "
+                        "owner_host = NULL, owner_boot = NULL, owner_pid = NULL, owner_token = NULL "
+                        "WHERE id = ? AND estado = ?",
+                        (EN_COLA, job["id"], PROCESANDO),
+                    )
+            rows = conn.execute("SELECT id FROM jobs WHERE estado = ? ORDER BY creado", (EN_COLA,)).fetchall()
+        return [row["id"] for row in rows]
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["resultado"] = json.loads(job["resultado"]) if job["resultado"] else None
+        return job
@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from app.services.classification_cache import ClassificationMemo
+
+WARMUP_MODES = ("eager", "background", "lazy")
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """
+    Carga diferida del clasificador compartido por /upload, /upload/stream y /jobs.
+
+    Importar las rutas ya no construye el modelo: se crea (y se calienta con
+    unos lotes de prueba) la primera vez que se pide, en el arranque de la
+    app ('eager'), en un hilo aparte ('background') o en la primera
+    solicitud ('lazy'). `ready` se activa sólo cuando el modelo ya está
+    caliente; /ready lo expone al balanceador.
+    """
+    def __init__(self, factory: Callable[[], object]):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._classifier = None
+        self._config = None
+        self.ready = threading.Event()
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+
+    def get(self):
+        """
+        Clasificador listo para usar (lo construye y calienta si hace falta).
+        """
+        if self._classifier is not None:
+            return self._classifier
+        with self._lock:
+            if self._classifier is None:
+                self._classifier = self._load()
+        return self._classifier
+
+    def _load(self):
+        config = self._config or {}
+        start = time.perf_counter()
+        try:
+            classifier = self._factory()
+            if config:
+                classifier.memo = ClassificationMemo.from_config(config, namespace=classifier.fingerprint)
+            self.load_seconds = time.perf_counter() - start
+
+            warm_up = getattr(classifier, "warm_up", None)
+            batches = config.get('MODEL_WARMUP_BATCHES', 3)
+            if warm_up is not None and batches:
+                self.warmup_seconds = warm_up(batches=batches, batch_size=config.get('CLASSIFIER_BATCH_SIZE', 32))
+        except Exception as e:
+            self.error = str(e)
+            logger.exception("No se pudo cargar el modelo: %s", e)
+            raise
+
+        self.error = None
+        self.ready.set()
+        logger.info("Modelo listo (carga %.2fs, calentamiento %.2fs).", self.load_seconds, self.warmup_seconds or 0)
+        return classifier
+
+    def start(self, config) -> None:
+        """
+        Registra la configuración de la app y lanza la carga según MODEL_WARMUP.
+        """
+        self._config = config
+        mode = config.get('MODEL_WARMUP', "background")
+        if mode not in WARMUP_MODES:
+            raise ValueError(f"Unknown MODEL_WARMUP mode: {mode}")
+
+        if mode == "eager":
+            self.get()
+        elif mode == "background":
+            threading.Thread(target=self._load_quietly, name="model-warmup", daemon=True).start()
+
+    def _load_quietly(self) -> None:
+        try:
+            self.get()
+        except Exception:
+            pass  # queda en self.error; la siguiente solicitud reintenta
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready.is_set(),
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+        }
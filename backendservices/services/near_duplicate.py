@@ -0,0 +1,180 @@
+import os
+import re
+import unicodedata
+import uuid
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.utils.file_utils import content_sha256, content_size
+
+NEAR_INDEX_VERSION = 1
+NUM_PERM = 64
+SHINGLE_SIZE = 5
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Permutaciones fijas: las firmas guardadas deben seguir siendo comparables
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+def shingles(text: str) -> Set[str]:
+    """
+    Character 5-grams of the text reduced to lowercase ASCII words, so that
+    punctuation, accents and spacing changes do not affect the comparison.
+    """
+    folded = unicodedata.normalize("NFD", (text or "").lower()).encode("ascii", "ignore").decode("ascii")
+    joined = " ".join(_TOKEN.findall(folded))
+    if len(joined) <= SHINGLE_SIZE:
+        return {joined} if joined else set()
+    return {joined[i:i + SHINGLE_SIZE] for i in range(len(joined) - SHINGLE_SIZE + 1)}
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """
+    MinHash signature (NUM_PERM uint32 values), or None for texts without words.
+    """
+    grams = shingles(text)
+    if not grams:
+        return None
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    # La multiplicación desborda módulo 2**64 a propósito (igual en todas las plataformas)
+    permuted = ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME) & _MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """
+    (bands, rows) whose LSH threshold (1/bands)**(1/rows) is the highest one
+    not above `threshold`: candidates are verified with the full signature,
+    so erring towards more candidates only costs a comparison.
+    """
+    options = []
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows == 0:
+            bands = num_perm // rows
+            options.append(((1 / bands) ** (1 / rows), bands, rows))
+    below = [o for o in options if o[0] <= threshold]
+    _, bands, rows = max(below) if below else min(options)
+    return bands, rows
+
+class NearDuplicateIndex:
+    """
+    Índice MinHash/LSH de las observaciones de una matriz.
+
+    Una observación se considera ya presente cuando la similitud de Jaccard
+    estimada entre sus 5-gramas de caracteres y los de alguna fila existente
+    es >= `threshold`. Cada consulta revisa sólo las filas que comparten una
+    banda LSH con ella, así que su costo no crece con el tamaño de la matriz.
+
+    Se guarda junto al índice exacto (ObservationIndex), con el mismo esquema
+    de nombres por SHA-256 del libro. En disco sólo están las firmas; las
+    bandas se reconstruyen al cargar, de modo que cambiar el umbral no
+    invalida el índice.
+    """
+    def __init__(self, folder: Optional[str], threshold: float, signatures: Optional[np.ndarray] = None,
+                 sha256: Optional[str] = None, size: Optional[int] = None):
+        self.folder = folder
+        self.threshold = threshold
+        self.sha256 = sha256
+        self.size = size
+        self.bands, self.rows = lsh_params(threshold)
+        self._signatures: List[np.ndarray] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        if signatures is not None:
+            for signature in signatures:
+                self._insert(signature)
+
+    @staticmethod
+    def _path(folder: str, sha256: str) -> str:
+        return os.path.join(folder, f"{sha256}.obsnear.npz")
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _insert(self, signature: np.ndarray) -> None:
+        entry = len(self._signatures)
+        self._signatures.append(signature)
+        for band, key in self._band_keys(signature):
+            self._buckets[band].setdefault(key, []).append(entry)
+
+    @classmethod
+    def load(cls, folder: str, excel_path, threshold: float) -> Optional["NearDuplicateIndex"]:
+        """
+        Índice válido para el contenido actual de `excel_path` (ruta o bytes), o None.
+        """
+        sha256 = content_sha256(excel_path)
+        try:
+            with np.load(cls._path(folder, sha256), allow_pickle=False) as data:
+                if (
+                    int(data["version"]) != NEAR_INDEX_VERSION
+                    or int(data["num_perm"]) != NUM_PERM
+                    or int(data["size"]) != content_size(excel_path)
+                ):
+                    return None
+                signatures = data["signatures"]
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(folder, threshold, signatures, sha256, content_size(excel_path))
+
+    @classmethod
+    def build(cls, folder: Optional[str], excel_path, texts: Iterable[str], threshold: float) -> "NearDuplicateIndex":
+        """
+        Índice a partir de un escaneo completo de la columna.
+        """
+        index = cls(folder, threshold, sha256=content_sha256(excel_path), size=content_size(excel_path))
+        for text in texts:
+            index.add(text)
+        return index
+
+    def contains(self, text: str) -> bool:
+        signature = minhash(text)
+        if signature is None:
+            return False
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        return any(
+            np.count_nonzero(self._signatures[entry] == signature) / NUM_PERM >= self.threshold
+            for entry in candidates
+        )
+
+    def add(self, text: str) -> None:
+        signature = minhash(text)
+        if signature is not None:
+            self._insert(signature)
+
+    def save(self, excel_path) -> None:
+        """
+        Persiste las firmas para el contenido actual de `excel_path` y elimina
+        el índice de la versión anterior del libro.
+        """
+        old_sha256 = self.sha256
+        self.sha256 = content_sha256(excel_path)
+        self.size = content_size(excel_path)
+
+        os.makedirs(self.folder, exist_ok=True)
+        path = self._path(self.folder, self.sha256)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        signatures = np.stack(self._signatures) if self._signatures else np.zeros((0, NUM_PERM), dtype=np.uint32)
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=np.int64(NEAR_INDEX_VERSION),
+                num_perm=np.int64(NUM_PERM),
+                size=np.int64(self.size),
+                signatures=signatures,
+            )
+        os.replace(tmp_path, path)
+
+        if old_sha256 and old_sha256 != self.sha256:
+            try:
+                os.remove(self._path(self.folder, old_sha256))
+            except OSError:
+                pass
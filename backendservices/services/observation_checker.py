@@ -1,38 +1,33 @@
-import openpyxl as px
+import io
+import os
+import uuid
+from typing import Optional, Union
+from app.services.observation_index import ObservationIndex
+from app.services.near_duplicate import NearDuplicateIndex
+from app.core import metrics
 
-def excel_observation_cheker(excel_path: str, texts: list[str]) -> set[str]:
-    """
-    Inserta en bloque los textos en la columna G de 'Matriz Obs' desde la fila 13.
-    Devuelve un set con los textos NORMALIZADOS que fueron agregados (no existentes previamente).
-    """
-    SHEET_NAME = "Matriz Obs"
-    COL = 7
-    START_ROW = 13
-
-    def _norm(s: str) -> str:
-        return (s or "").strip()
-
-    def _first_empty_row(ws, col=COL, start=START_ROW):
-        mr = ws.max_row
-        if mr < start:
-            return start
-        r = mr
-        while r >= start:
-            v = ws.cell(row=r, column=col).value
-            if v is not None and str(v).strip() != "":
-                return r + 1
-            r -= 1
-        return start
+SHEET_NAME = "Matriz Obs"
+COL = 7
+START_ROW = 13
 
-    if not texts:
-        return set()
+def _norm(s: str) -> str:
+    return (s or "").strip()
 
-    #Abre el excel
-    wb = px.load_workbook(filename=excel_path, data_only=True, read_only=False)
-    ws = wb[SHEET_NAME]
+def _first_empty_row(ws, col=COL, start=START_ROW):
+    mr = ws.max_row
+    if mr < start:
+        return start
+    r = mr
+    while r >= start:
+        v = ws.cell(row=r, column=col).value
+        if v is not None and str(v).strip() != "":
+            return r + 1
+        r -= 1
+    return start
 
+def _scan_existing(ws) -> set:
     # Observaciones ya existentes
-    existentes = {
+    return {
         _norm(v)
         for (v,) in ws.iter_rows(
             min_row=START_ROW,
@@ -44,24 +39,121 @@ def excel_observation_cheker(excel_path: str, texts: list[str]) -> set[str]:
         if v not in (None, "")
     }
 
+def _save_atomic(wb, output_path: str) -> None:
+    # Se escribe junto al destino y se renombra: nunca queda un libro a medio escribir
+    tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        wb.save(tmp_path)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def excel_observation_cheker(
+    excel_path: Union[str, bytes],
+    texts: list[str],
+    index_folder: Optional[str] = None,
+    output_path: Optional[str] = None,
+    near_duplicate_threshold: Optional[float] = None
+) -> set[str]:
+    """
+    Inserta en bloque los textos en la columna G de 'Matriz Obs' desde la fila 13.
+    Devuelve un set con los textos NORMALIZADOS que fueron agregados (no existentes previamente).
+
+    Con `index_folder`, la deduplicación y la fila de inserción salen del
+    índice lateral de la matriz (ObservationIndex) en lugar de recorrer la
+    columna completa; sólo se re-escanea si el libro cambió fuera del servicio.
+    Con el índice válido el libro ni siquiera se abre si no hay textos nuevos.
+
+    :param excel_path: Ruta del libro o su contenido en memoria (bytes)
+    :param output_path: Si se indica, el libro modificado se escribe ahí (escritura
+        atómica) en lugar de sobrescribir `excel_path`; si no se agrega nada no se escribe.
+    :param near_duplicate_threshold: Si se indica, tampoco se agregan textos cuya
+        similitud estimada con una fila existente (o con otro texto agregado) sea
+        >= al umbral (NearDuplicateIndex, persistido en `index_folder`).
+    """
+    if not texts:
+        return set()
+    if output_path is None and not isinstance(excel_path, str):
+        raise ValueError("output_path es obligatorio cuando el libro viene en memoria")
+
+    index = ObservationIndex.load(index_folder, excel_path) if index_folder else None
+    if index_folder:
+        metrics.cache_lookup("obs_index", hits=int(index is not None), misses=int(index is None))
+    near = None
+    if near_duplicate_threshold and index_folder:
+        near = NearDuplicateIndex.load(index_folder, excel_path, near_duplicate_threshold)
+    rebuilt = False
+    near_rebuilt = False
+
+    # Con índices válidos el libro sólo se abre si hay filas que agregar
+    wb = ws = None
+
+    def open_sheet():
+        nonlocal wb, ws
+        if ws is None:
+            # openpyxl se importa aquí: no pesa en el arranque de los workers
+            import openpyxl as px
+            source = io.BytesIO(excel_path) if isinstance(excel_path, (bytes, bytearray)) else excel_path
+            wb = px.load_workbook(filename=source, data_only=True, read_only=False)
+            ws = wb[SHEET_NAME]
+        return ws
+
+    existentes = None
+    if index is None:
+        existentes = _scan_existing(open_sheet())
+        row = _first_empty_row(ws, COL, START_ROW)
+        if index_folder:
+            index = ObservationIndex.build(index_folder, excel_path, existentes, row)
+            rebuilt = True
+        is_known = existentes.__contains__
+    else:
+        row = index.next_row
+        is_known = index.contains
+
+    if near_duplicate_threshold and near is None:
+        if existentes is None:
+            existentes = _scan_existing(open_sheet())
+        near = NearDuplicateIndex.build(index_folder, excel_path, existentes, near_duplicate_threshold)
+        near_rebuilt = bool(index_folder)
+
     # Filtra textos nuevos
     vistos = set()
     to_add = []
     for t in texts:
         tn = _norm(t)
-        if not tn or tn in existentes or tn in vistos:
+        if not tn or is_known(tn) or tn in vistos:
             continue
+        if near is not None:
+            # Casi duplicado de una fila existente o de otro texto de este lote
+            if near.contains(tn):
+                continue
+            near.add(tn)
         to_add.append(t)
         vistos.add(tn)
 
     agregados = set()
     if to_add:
-        row = _first_empty_row(ws, COL, START_ROW)
+        ws = open_sheet()
         for t in to_add:
             ws.cell(row=row, column=COL, value=t)
             agregados.add(_norm(t))
+            if index is not None:
+                index.add(_norm(t))
             row += 1
-        wb.save(excel_path)
+        if output_path:
+            _save_atomic(wb, output_path)
+        else:
+            wb.save(excel_path)
+
+    if wb is not None:
+        wb.close()
 
-    wb.close()
+    saved = (output_path or excel_path) if to_add else excel_path
+    if index is not None and (to_add or rebuilt):
+        index.next_row = row
+        index.save(saved)
+    if near is not None and index_folder and (to_add or near_rebuilt):
+        near.save(saved)
     return agregados
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import uuid
+from typing import Iterable, Optional, Set
+
+from app.utils.file_utils import content_sha256, content_size
+
+INDEX_VERSION = 1
+
+def text_hash(normalized: str) -> str:
+    """
+    Hash of a normalized observation (as stored in the index).
+    """
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+class ObservationIndex:
+    """
+    Índice lateral de una matriz de observaciones.
+
+    Guarda los hashes de los textos normalizados de la columna G, la siguiente
+    fila libre y el SHA-256/tamaño del libro al que corresponde. Los archivos
+    del índice se nombran por el SHA-256 del libro: si el libro recibido es
+    byte a byte el que escribió el servicio, el índice es válido y la
+    deduplicación y la fila de inserción cuestan O(observaciones nuevas); si el
+    libro se editó fuera del servicio no hay índice para su contenido y se
+    vuelve a escanear la columna completa.
+    """
+    def __init__(self, folder: str, hashes: Set[str], next_row: int, sha256: str, size: int):
+        self.folder = folder
+        self.hashes = hashes
+        self.next_row = next_row
+        self.sha256 = sha256
+        self.size = size
+
+    @staticmethod
+    def _path(folder: str, sha256: str) -> str:
+        return os.path.join(folder, f"{sha256}.obsidx.json")
+
+    @classmethod
+    def load(cls, folder: str, excel_path) -> Optional["ObservationIndex"]:
+        """
+        Índice válido para el contenido actual de `excel_path` (ruta o bytes), o None si hay que re-escanear.
+        """
+        sha256 = content_sha256(excel_path)
+        path = cls._path(folder, sha256)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (
+            data.get("version") != INDEX_VERSION
+            or data.get("sha256") != sha256
+            or data.get("size") != content_size(excel_path)
+        ):
+            return None
+        return cls(folder, set(data["hashes"]), int(data["next_row"]), sha256, int(data["size"]))
+
+    @classmethod
+    def build(cls, folder: str, excel_path, normalized_texts: Iterable[str], next_row: int) -> "ObservationIndex":
+        """
+        Índice a partir de un escaneo completo de la columna.
+        """
+        return cls(
+            folder,
+            {text_hash(t) for t in normalized_texts},
+            next_row,
+            content_sha256(excel_path),
+            content_size(excel_path),
+        )
+
+    def contains(self, normalized: str) -> bool:
+        return text_hash(normalized) in self.hashes
+
+    def add(self, normalized: str) -> None:
+        self.hashes.add(text_hash(normalized))
+
+    def save(self, excel_path) -> None:
+        """
+        Persiste el índice para el contenido actual de `excel_path` (ruta tras
+        guardarlo, o bytes) y elimina el índice de la versión anterior del libro.
+        """
+        old_sha256 = self.sha256
+        self.sha256 = content_sha256(excel_path)
+        self.size = content_size(excel_path)
+
+        os.makedirs(self.folder, exist_ok=True)
+        path = self._path(self.folder, self.sha256)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "sha256": self.sha256,
+                "size": self.size,
+                "next_row": self.next_row,
+                "hashes": sorted(self.hashes),
+            }, f)
+        os.replace(tmp_path, path)
+
+        if old_sha256 and old_sha256 != self.sha256:
+            try:
+                os.remove(self._path(self.folder, old_sha256))
+            except OSError:
+                pass
@@ -0,0 +1,226 @@
+"""
+OCR de respaldo para páginas escaneadas.
+
+Las páginas cuyo texto nativo tiene menos de OCR_MIN_CHARS caracteres se
+rasterizan con pypdfium2 (a una resolución que depende del tamaño de la
+página) y se pasan al motor de OCR en un pool acotado de procesos. El texto
+se guarda en disco por hash de la imagen renderizada, así que re-subir el
+mismo escaneo no vuelve a ejecutar el OCR.
+
+El motor es cualquier objeto serializable con `cache_id` y
+`__call__(imagen PIL) -> str`; por defecto TesseractEngine. Las pruebas
+pueden pasar su propio motor a OcrFallback (o reemplazar `make_engine`).
+"""
+import hashlib
+import io
+import logging
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+PdfSource = Union[str, bytes]
+
+class TesseractEngine:
+    """
+    OCR con Tesseract (pytesseract se importa al usarlo: no pesa en el arranque).
+    """
+    def __init__(self, cmd: Optional[str] = None, languages: str = "spa", config: str = ""):
+        self.cmd = cmd
+        self.languages = languages
+        self.config = config
+
+    @property
+    def cache_id(self) -> str:
+        # Cambiar de idiomas u opciones invalida el texto guardado
+        return f"tesseract|{self.languages}|{self.config}"
+
+    def __call__(self, image) -> str:
+        import pytesseract
+
+        if self.cmd:
+            pytesseract.pytesseract.tesseract_cmd = self.cmd
+        return pytesseract.image_to_string(image, lang=self.languages, config=self.config)
+
+def make_engine(config) -> TesseractEngine:
+    return TesseractEngine(config.get('OCR_TESSERACT_CMD'), config.get('OCR_LANGUAGES', "spa"))
+
+def adaptive_dpi(width_pt: float, height_pt: float, target_pixels: int = 3300, min_dpi: int = 150, max_dpi: int = 400) -> int:
+    """
+    Resolución para que el lado mayor de la página mida unos `target_pixels`
+    (3300 px = carta a 300 dpi): los planos grandes no generan imágenes
+    enormes y las páginas pequeñas no quedan ilegibles.
+    """
+    longest = max(width_pt, height_pt, 1.0)
+    return int(max(min_dpi, min(max_dpi, target_pixels * 72 / longest)))
+
+def image_key(image, cache_id: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(cache_id.encode("utf-8"))
+    digest.update(f"|{image.mode}|{image.size}|".encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+class OcrCache:
+    """
+    Texto de OCR por hash de imagen: un archivo por entrada, escritura atómica.
+    """
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key: str, text: str) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+class OcrFallback:
+    """
+    Reemplaza el texto de las páginas con poco texto nativo por su OCR.
+
+    Sólo guarda parámetros (motor y carpeta de la caché), así que se envía tal
+    cual a los procesos del pool.
+    """
+    def __init__(
+        self,
+        engine,
+        cache_folder: Optional[str] = None,
+        min_chars: int = 50,
+        workers: int = 2,
+        target_pixels: int = 3300,
+        min_dpi: int = 150,
+        max_dpi: int = 400
+    ):
+        self.engine = engine
+        self.cache_folder = cache_folder
+        self.min_chars = min_chars
+        self.workers = workers
+        self.target_pixels = target_pixels
+        self.min_dpi = min_dpi
+        self.max_dpi = max_dpi
+        if cache_folder:
+            os.makedirs(cache_folder, exist_ok=True)
+
+    @property
+    def signature(self) -> str:
+        """
+        Parámetros que cambian el texto resultante (forma parte de la clave de la caché de resultados).
+        """
+        return f"ocr|{self.engine.cache_id}|{self.min_chars}|{self.target_pixels}|{self.min_dpi}|{self.max_dpi}"
+
+    def needs_ocr(self, text: Optional[str]) -> bool:
+        return len((text or "").strip()) < self.min_chars
+
+    def apply(self, pdf_path: PdfSource, texts: List[str], pages: Optional[Iterable[int]] = None) -> List[str]:
+        """
+        `texts` con el OCR de las páginas con poco texto.
+
+        :param pages: Índices 0-based a considerar (por defecto todas)
+        :return: Nueva lista; una página cuyo OCR falla conserva su texto nativo
+        """
+        candidates = [i for i in (range(len(texts)) if pages is None else pages) if self.needs_ocr(texts[i])]
+        if not candidates:
+            return list(texts)
+
+        with metrics.stage("ocr"):
+            workers = max(1, min(self.workers, len(candidates)))
+            try:
+                if workers == 1:
+                    outcomes = _ocr_pages(pdf_path, candidates, self)
+                else:
+                    # Reparto intercalado: las páginas escaneadas suelen venir juntas (anexos)
+                    chunks = [candidates[w::workers] for w in range(workers)]
+                    outcomes = {}
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        for result in pool.map(_ocr_pages, [pdf_path] * workers, chunks, [self] * workers):
+                            outcomes.update(result)
+            except Exception as e:
+                # Sin pypdfium2 o PDF ilegible para pdfium: se sigue con el texto nativo
+                logger.error("No se pudo aplicar OCR de respaldo: %s", e)
+                return list(texts)
+
+        result = list(texts)
+        hits = misses = 0
+        for i, (text, cached) in outcomes.items():
+            if text is None:
+                continue
+            # Si el OCR no aporta más que el texto nativo, se conserva el nativo
+            if len(text.strip()) > len((result[i] or "").strip()):
+                result[i] = text
+            hits += int(cached)
+            misses += int(not cached)
+        metrics.cache_lookup("ocr", hits=hits, misses=misses)
+        metrics.count("pages_ocr", len(candidates))
+        logger.info("OCR de respaldo: %d páginas con poco texto (%d desde la caché).", len(candidates), hits)
+        return result
+
+    def ocr_page(self, page) -> Tuple[str, bool]:
+        """
+        OCR de una página de pypdfium2. :return: (texto, vino de la caché)
+        """
+        width, height = page.get_size()
+        dpi = adaptive_dpi(width, height, self.target_pixels, self.min_dpi, self.max_dpi)
+        image = page.render(scale=dpi / 72, grayscale=True).to_pil()
+
+        cache = OcrCache(self.cache_folder) if self.cache_folder else None
+        key = image_key(image, self.engine.cache_id) if cache else None
+        if cache:
+            text = cache.get(key)
+            if text is not None:
+                return text, True
+        text = self.engine(image) or ""
+        if cache:
+            cache.put(key, text)
+        return text, False
+
+    @classmethod
+    def from_config(cls, config) -> Optional["OcrFallback"]:
+        """
+        Crea el OCR de respaldo si OCR_ENABLED; si no, devuelve None (deshabilitado).
+        """
+        if not config.get('OCR_ENABLED'):
+            return None
+        return cls(
+            make_engine(config),
+            cache_folder=config.get('OCR_CACHE_FOLDER'),
+            min_chars=config.get('OCR_MIN_CHARS', 50),
+            workers=config.get('OCR_WORKERS', 2),
+            target_pixels=config.get('OCR_TARGET_PIXELS', 3300),
+            min_dpi=config.get('OCR_MIN_DPI', 150),
+            max_dpi=config.get('OCR_MAX_DPI', 400),
+        )
+
+def _ocr_pages(pdf_path: PdfSource, indexes: List[int], fallback: OcrFallback) -> Dict[int, Tuple[Optional[str], bool]]:
+    """
+    Worker: abre el PDF con pypdfium2 y aplica OCR a las páginas `indexes` (0-based).
+    """
+    import pypdfium2 as pdfium  # diferido: sólo se carga si hay páginas escaneadas
+
+    outcomes = {}
+    pdf = pdfium.PdfDocument(io.BytesIO(pdf_path) if isinstance(pdf_path, (bytes, bytearray)) else pdf_path)
+    try:
+        for i in indexes:
+            try:
+                outcomes[i] = fallback.ocr_page(pdf[i])
+            except Exception as e:
+                logger.warning("OCR fallido en la página %d: %s", i + 1, e)
+                outcomes[i] = (None, False)
+    finally:
+        pdf.close()
+    return outcomes
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.services.page_text import PageProgress, PageTextProvider, PdfSource, _open_pdf, extract_page_texts
+
+logger = logging.getLogger(__name__)
+
+# Cambiar cuando cambie la huella o la lógica de extracción de texto
+FINGERPRINT_VERSION = b"v1"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS pages (
+        fingerprint TEXT PRIMARY KEY,
+        text        TEXT NOT NULL,
+        used        REAL NOT NULL
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS page_labels (
+        fingerprint TEXT NOT NULL,
+        namespace   TEXT NOT NULL,
+        labels      TEXT NOT NULL,
+        PRIMARY KEY (fingerprint, namespace)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS pages_used ON pages (used)",
+)
+
+_MAX_DEPTH = 32
+
+def _feed(digest, obj, seen: set, depth: int = 0) -> None:
+    """
+    Serializa en `digest` un objeto PDF resolviendo referencias; los streams
+    aportan sus atributos y su contenido decodificado.
+    """
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+
+    if depth > _MAX_DEPTH:
+        digest.update(b"<depth>")
+        return
+    if isinstance(obj, PDFObjRef):
+        # Un objeto ya visto (p. ej. la misma fuente en varias formas) se referencia por número
+        if obj.objid in seen:
+            digest.update(b"<ref %d>" % obj.objid)
+            return
+        seen.add(obj.objid)
+        obj = obj.resolve()
+    if isinstance(obj, PDFStream):
+        _feed(digest, obj.attrs, seen, depth + 1)
+        try:
+            data = obj.get_data()
+        except Exception:
+            # Filtro no soportado por pdfminer: se usa el contenido sin decodificar
+            data = obj.get_rawdata() or b""
+        digest.update(b"<stream %d>" % len(data))
+        digest.update(data)
+    elif isinstance(obj, dict):
+        digest.update(b"<<")
+        for key in sorted(obj, key=str):
+            digest.update(str(key).encode("utf-8"))
+            _feed(digest, obj[key], seen, depth + 1)
+        digest.update(b">>")
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"[")
+        for item in obj:
+            _feed(digest, item, seen, depth + 1)
+        digest.update(b"]")
+    elif isinstance(obj, bytes):
+        digest.update(obj)
+    else:
+        digest.update(repr(obj).encode("utf-8"))
+
+def page_fingerprint(page) -> str:
+    """
+    Huella de una página de pdfplumber sin analizar su contenido: hash de los
+    streams de contenido y de los recursos que usan (fuentes con su
+    ToUnicode, formas e imágenes), del tamaño y de la rotación. Dos páginas
+    con la misma huella dan el mismo texto.
+    """
+    page_obj = page.page_obj
+    digest = hashlib.blake2b(FINGERPRINT_VERSION, digest_size=16)
+    seen = set()
+    _feed(digest, list(page_obj.mediabox), seen)
+    _feed(digest, page_obj.rotate, seen)
+    _feed(digest, page_obj.resources, seen)
+    for stream in page_obj.contents:
+        _feed(digest, stream, seen)
+    return digest.hexdigest()
+
+class PageStore:
+    """
+    Resultados por página indexados por su huella, en una base SQLite (WAL)
+    compartida por los workers: el texto extraído y, por modelo, las etiquetas
+    de sus párrafos. Una versión revisada de un reporte sólo re-extrae y
+    re-clasifica las páginas que cambiaron.
+
+    Sólo guarda la ruta de la base (cada operación abre su conexión), así que
+    puede pasarse a un pool de procesos. Con `max_pages` se eliminan las
+    páginas usadas hace más tiempo.
+    """
+    def __init__(self, db_path: str, max_pages: Optional[int] = None):
+        self.db_path = db_path
+        self.max_pages = max_pages
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA mmap_size = 268435456")
+        return conn
+
+    @staticmethod
+    def _chunks(keys: Sequence[str]) -> Iterable[Tuple[str, Sequence[str]]]:
+        # Consultas en bloques para no exceder el límite de parámetros de SQLite
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            yield ", ".join("?" * len(chunk)), chunk
+
+    def get_texts(self, fingerprints: Iterable[str]) -> Dict[str, str]:
+        """
+        Texto conocido de cada huella; las huellas sin entrada no aparecen en el resultado.
+        """
+        keys = list(dict.fromkeys(fingerprints))
+        if not keys:
+            return {}
+        found = {}
+        with closing(self._connect()) as conn, conn:
+            for placeholders, chunk in self._chunks(keys):
+                rows = conn.execute(f"SELECT fingerprint, text FROM pages WHERE fingerprint IN ({placeholders})", chunk)
+                found.update(rows.fetchall())
+            # Marca las páginas como usadas recientemente
+            now = time.time()
+            for placeholders, chunk in self._chunks(list(found)):
+                conn.execute(f"UPDATE pages SET used = ? WHERE fingerprint IN ({placeholders})", (now, *chunk))
+        return found
+
+    def put_texts(self, texts: Dict[str, str]) -> None:
+        if not texts:
+            return
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO pages (fingerprint, text, used) VALUES (?, ?, ?)",
+                [(fp, text, now) for fp, text in texts.items()],
+            )
+            if self.max_pages:
+                self._prune(conn)
+
+    def _prune(self, conn) -> None:
+        excess = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0] - self.max_pages
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM pages WHERE fingerprint IN (SELECT fingerprint FROM pages ORDER BY used LIMIT ?)", (excess,)
+            )
+            conn.execute("DELETE FROM page_labels WHERE fingerprint NOT IN (SELECT fingerprint FROM pages)")
+
+    def get_labels(self, fingerprints: Iterable[str], namespace: str) -> Dict[str, List[str]]:
+        """
+        Etiquetas de los párrafos de cada página (en orden) para el modelo `namespace`.
+        """
+        keys = list(dict.fromkeys(fingerprints))
+        if not keys:
+            return {}
+        found = {}
+        with closing(self._connect()) as conn:
+            for placeholders, chunk in self._chunks(keys):
+                rows = conn.execute(
+                    f"SELECT fingerprint, labels FROM page_labels WHERE namespace = ? AND fingerprint IN ({placeholders})",
+                    (namespace, *chunk),
+                )
+                found.update((fp, json.loads(labels)) for fp, labels in rows)
+        return found
+
+    def put_labels(self, labels: Dict[str, List[str]], namespace: str) -> None:
+        if not labels:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO page_labels (fingerprint, namespace, labels) VALUES (?, ?, ?)",
+                [(fp, namespace, json.dumps(page_labels, ensure_ascii=False)) for fp, page_labels in labels.items()],
+            )
+
+    @classmethod
+    def from_config(cls, config) -> Optional["PageStore"]:
+        """
+        Crea la tienda si PAGE_STORE_PATH está configurada; si no, devuelve None (deshabilitada).
+        """
+        db_path = config.get('PAGE_STORE_PATH')
+        if not db_path:
+            return None
+        return cls(db_path, max_pages=config.get('PAGE_STORE_MAX_PAGES'))
+
+def load_page_texts(
+    pdf_path: PdfSource,
+    store: PageStore,
+    workers: int = 1,
+    min_pages_per_chunk: int = 25,
+    progress: Optional[PageProgress] = None,
+    ocr=None
+) -> PageTextProvider:
+    """
+    Textos de página reutilizando los de la tienda: sólo se extraen las
+    páginas cuya huella no está guardada. Si no se conoce ninguna (primera
+    versión del reporte) se usa la extracción normal, en paralelo con `workers`.
+    Con `ocr` (ocr.OcrFallback) las páginas nuevas con poco texto pasan por
+    OCR antes de guardarse, así que tampoco se repite al reutilizarlas.
+
+    :return: Provider con `fingerprints` y `reused` (índices 0-based de las páginas reutilizadas)
+    """
+    with _open_pdf(pdf_path) as pdf:
+        fingerprints = [page_fingerprint(page) for page in pdf.pages]
+        known = store.get_texts(fingerprints)
+        reused = {i for i, fp in enumerate(fingerprints) if fp in known}
+        if ocr is not None:
+            # Páginas guardadas sin texto (p. ej. antes de habilitar el OCR): pasan por el OCR
+            reused = {i for i in reused if not ocr.needs_ocr(known[fingerprints[i]])}
+        if reused:
+            texts = []
+            for i, page in enumerate(pdf.pages):
+                texts.append(known[fingerprints[i]] if i in reused else page.extract_text() or "")
+                if progress:
+                    progress(i + 1, len(fingerprints))
+
+    if not reused:
+        texts = extract_page_texts(pdf_path, workers, min_pages_per_chunk, progress)
+    if ocr is not None:
+        texts = ocr.apply(pdf_path, texts, pages=[i for i in range(len(texts)) if i not in reused])
+    store.put_texts({fp: text for i, (fp, text) in enumerate(zip(fingerprints, texts)) if i not in reused})
+    logger.info("Tienda de páginas: %d de %d páginas reutilizadas.", len(reused), len(fingerprints))
+    return PageTextProvider.from_texts(pdf_path, texts, fingerprints=fingerprints, reused=reused)
@@ -0,0 +1,204 @@
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Set, Tuple, Union
+
+from app.core import profiling
+
+# progress(paginas_procesadas, total_paginas)
+PageProgress = Callable[[int, int], None]
+
+# Path on disk or the PDF content already in memory
+PdfSource = Union[str, bytes]
+
+def _open_pdf(pdf_path: PdfSource):
+    """
+    Open a PDF from a path or from an in-memory buffer (no temp file needed).
+    """
+    import pdfplumber  # diferido: no pesa en el arranque de los workers
+
+    if isinstance(pdf_path, (bytes, bytearray)):
+        return pdfplumber.open(io.BytesIO(pdf_path))
+    return pdfplumber.open(pdf_path)
+
+def _timed_extract(page) -> Tuple[str, float, float, int, int]:
+    """
+    Text of a page plus wall/CPU seconds, character count and vector objects
+    (lines, rects, curves); used when the request is being profiled.
+    """
+    wall, cpu = time.perf_counter(), time.thread_time()
+    text = page.extract_text() or ""
+    wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+    return text, wall, cpu, len(page.chars), len(page.lines) + len(page.rects) + len(page.curves)
+
+def _extract_range(pdf_path: PdfSource, start: int, stop: int, timed: bool = False) -> List:
+    """
+    Worker: open the PDF and extract pages [start, stop) (0-based).
+    With `timed`, each item is the `_timed_extract` tuple instead of the text.
+    """
+    with _open_pdf(pdf_path) as pdf:
+        if timed:
+            return [_timed_extract(pdf.pages[i]) for i in range(start, stop)]
+        return [pdf.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def page_ranges(page_count: int, workers: int, min_pages_per_chunk: int) -> List[Tuple[int, int]]:
+    """
+    Split [0, page_count) into at most `workers` contiguous chunks of at least
+    `min_pages_per_chunk` pages each.
+    """
+    if page_count <= 0:
+        return []
+    chunks = max(1, min(workers, page_count // max(1, min_pages_per_chunk)))
+    size, extra = divmod(page_count, chunks)
+
+    ranges = []
+    start = 0
+    for i in range(chunks):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def iter_page_texts(
+    pdf_path: PdfSource,
+    workers: int = 1,
+    min_pages_per_chunk: int = 25,
+    progress: Optional[PageProgress] = None
+) -> Iterator[str]:
+    """
+    Yield the text of every page in page order, optionally extracted across a process pool.
+
+    Each worker opens the PDF by itself and extracts one contiguous page
+    slice; slices are yielded back in page order as soon as they are ready.
+    PDFs too small to fill two chunks use the serial path, page by page.
+
+    :param pdf_path: Path to the PDF file, or its bytes
+    :param workers: Maximum worker processes (1 = serial)
+    :param min_pages_per_chunk: Minimum pages handed to each worker
+    :param progress: Optional callback receiving (pages_done, page_count)
+    """
+    profile = profiling.current()
+    with _open_pdf(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        ranges = page_ranges(page_count, workers, min_pages_per_chunk)
+        if len(ranges) <= 1:
+            for done, page in enumerate(pdf.pages, start=1):
+                if profile is not None:
+                    text, *stats = _timed_extract(page)
+                    profile.add_page(done, *stats)
+                else:
+                    text = page.extract_text() or ""
+                if progress:
+                    progress(done, page_count)
+                yield text
+            return
+
+    timed = profile is not None
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(_extract_range, pdf_path, start, stop, timed) for start, stop in ranges]
+        for future, (start, stop) in zip(futures, ranges):
+            texts = future.result()
+            if progress:
+                progress(stop, page_count)
+            if timed:
+                for page_number, (text, *stats) in enumerate(texts, start=start + 1):
+                    profile.add_page(page_number, *stats)
+                texts = [item[0] for item in texts]
+            yield from texts
+
+def extract_page_texts(
+    pdf_path: PdfSource,
+    workers: int = 1,
+    min_pages_per_chunk: int = 25,
+    progress: Optional[PageProgress] = None
+) -> List[str]:
+    """
+    Text of each page ('' when the page has none), in page order.
+    See `iter_page_texts` for the parameters.
+    """
+    return list(iter_page_texts(pdf_path, workers, min_pages_per_chunk, progress))
+
+class PageTextProvider:
+    """
+    Parse each PDF page once and share its text between pipeline stages.
+
+    `page.extract_text()` is the most expensive step of the pipeline; with this
+    provider paragraph segmentation and ESPECIALIDAD heading detection read the
+    same cached texts instead of opening the PDF twice.
+    """
+    def __init__(
+        self,
+        pdf_path: PdfSource,
+        workers: int = 1,
+        min_pages_per_chunk: int = 25,
+        progress: Optional[PageProgress] = None,
+        ocr=None
+    ):
+        self.pdf_path = pdf_path
+        self.workers = workers
+        self.min_pages_per_chunk = min_pages_per_chunk
+        self.progress = progress
+        # Optional ocr.OcrFallback for pages with little or no native text
+        self.ocr = ocr
+        self._texts = None
+        # Set by page_store.load_page_texts: per-page fingerprints and 0-based pages reused from the store
+        self.fingerprints: Optional[List[str]] = None
+        self.reused: Set[int] = set()
+
+    @classmethod
+    def from_texts(
+        cls,
+        pdf_path: PdfSource,
+        texts: List[str],
+        fingerprints: Optional[List[str]] = None,
+        reused: Optional[Set[int]] = None
+    ) -> "PageTextProvider":
+        """
+        Provider over page texts that were already extracted (e.g. in another process).
+        """
+        provider = cls(pdf_path)
+        provider._texts = list(texts)
+        provider.fingerprints = fingerprints
+        provider.reused = set(reused or ())
+        return provider
+
+    def _load(self) -> List[str]:
+        if self._texts is None:
+            texts = extract_page_texts(self.pdf_path, self.workers, self.min_pages_per_chunk, self.progress)
+            self._texts = self.ocr.apply(self.pdf_path, texts) if self.ocr is not None else texts
+        return self._texts
+
+    @property
+    def page_count(self) -> int:
+        return len(self._load())
+
+    def text(self, page_number: int) -> str:
+        """
+        Text of a 1-based page number.
+        """
+        return self._load()[page_number - 1]
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        """
+        Yields (page_number, text) with 1-based page numbers.
+
+        On the first pass pages are yielded while they are extracted (so a
+        consumer can start working before the PDF is fully parsed) and cached
+        for the next consumers.
+        """
+        if self._texts is not None or self.ocr is not None:
+            # With OCR the scanned pages are batched for the pool: no page-by-page streaming
+            yield from enumerate(self._load(), start=1)
+            return
+
+        texts = []
+        for text in iter_page_texts(self.pdf_path, self.workers, self.min_pages_per_chunk, self.progress):
+            texts.append(text)
+            yield len(texts), text
+        self._texts = texts
+
+def as_provider(source: Union[PdfSource, PageTextProvider]) -> PageTextProvider:
+    """
+    Accept either a PDF path or bytes (legacy callers) or an existing provider.
+    """
+    return source if isinstance(source, PageTextProvider) else PageTextProvider(source)
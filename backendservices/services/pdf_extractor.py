@@ -1,53 +1,60 @@
-import pdfplumber
+import logging
 import re
-from typing import List, Dict
+from typing import List, Dict, Union
+from app.services.page_text import PageTextProvider, as_provider
 
-def extract_paragraphs(pdf_path: str) -> List[Dict[str, str]]:
+_SENTENCE_END = re.compile(r'[.:!?]$')
+
+logger = logging.getLogger(__name__)
+
+def split_paragraphs(page_number: int, text: str) -> List[Dict[str, str]]:
+    """
+    Segment the text of one page into paragraphs.
+    A line ending in '.', ':', '!' or '?' closes the current paragraph.
+    """
+    paragraphs = []
+    if not text:
+        return paragraphs
+
+    current_paragraph = ""
+
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        current_paragraph += " " + stripped
+        if _SENTENCE_END.search(stripped):
+            paragraphs.append({
+                "pagina": page_number,
+                "texto": current_paragraph.strip()
+            })
+            current_paragraph = ""
+
+    if current_paragraph.strip():
+        paragraphs.append({
+            "pagina": page_number,
+            "texto": current_paragraph.strip()
+        })
+
+    return paragraphs
+
+def extract_paragraphs(source: Union[str, PageTextProvider]) -> List[Dict[str, str]]:
     """
     Extract paragraphs from each page of the PDF.
     Each paragraph is associated with the page number it came from.
 
-    :param pdf_path: Path to the PDF file
+    :param source: Shared PageTextProvider (or path to the PDF file)
     :return: List of dictionaries with 'pagina' and 'texto'
     """
     paragraphs = []
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_number, page in enumerate(pdf.pages, start=1):
-                text = page.extract_text()
-
-                if not text:
-                    continue
-
-                lines = text.split('\n')
-                current_paragraph = ""
-
-                for line in lines:
-                    stripped = line.strip()
-                    if not stripped:
-                        continue
-                    
-                    if re.search(r'[.:!?]$', stripped):
-                        current_paragraph += " " + stripped
-                        paragraphs.append({
-                            "pagina": page_number,
-                            "texto": current_paragraph.strip()
-                        })
-                        current_paragraph = ""
-                    else:
-                        current_paragraph += " " + stripped
-                
-                if current_paragraph.strip():
-                    paragraphs.append({
-                        "pagina": page_number,
-                        "texto": current_paragraph.strip()
-                    })
+        for page_number, text in as_provider(source):
+            paragraphs.extend(split_paragraphs(page_number, text))
 
         return paragraphs
 
     except Exception as e:
-        print(f"ERROR leyendo el PDF: {e}")
-        return []  
-            
-        
\ No newline at end of file
+        logger.error("Error leyendo el PDF: %s", e)
+        return []
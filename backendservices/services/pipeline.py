@@ -0,0 +1,1000 @@
+import logging
+import os
+import uuid
+import shutil
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from werkzeug.utils import secure_filename
+
+from app.utils.file_utils import norm_esp, _norm, first_chunk_before_underscore, content_sha256
+from app.services.page_text import PageTextProvider
+from app.services.pdf_extractor import extract_paragraphs, split_paragraphs
+from app.services.batch_scheduler import classify_by_length
+from app.services.especialidad_extractor import extraer_especialidades, especialidades_en_pagina
+from app.services.especialidad_matcher import SpecialtyIndex
+from app.services.observation_checker import excel_observation_cheker
+from app.services.page_store import PageStore, load_page_texts
+from app.services.ocr import OcrFallback
+from app.services.result_cache import ResultCache
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# progress(etapa, hecho, total): etapas 'extraccion', 'limpieza', 'clasificacion',
+# 'especialidades', 'excel', 'exportacion' ('reportes' en process_batch)
+Progress = Callable[[str, int, int], None]
+
+def _noop_progress(stage: str, done: int, total: int) -> None:
+    pass
+
+def export_folder_for(config) -> str:
+    """
+    Carpeta de exportación configurada (o la predeterminada en Documentos); se crea si no existe.
+    """
+    export_folder = config.get(
+        'EXPORT_FOLDER',
+        os.path.join(os.path.expanduser("~"), "Documents", "PLN-ODINSA", "Matrices")
+    )
+    os.makedirs(export_folder, exist_ok=True)
+    return export_folder
+
+class UploadedMatrix:
+    """
+    Matriz recibida en la solicitud: ruta de un archivo en disco o su contenido en memoria.
+    """
+    __slots__ = ("name", "path", "data")
+
+    def __init__(self, name: str, path: Optional[str] = None, data: Optional[bytes] = None):
+        self.name = name
+        self.path = path
+        self.data = data
+
+    @property
+    def label(self) -> str:
+        # Valor de 'excel_file' en los resultados
+        return self.path or self.name
+
+    @property
+    def source(self) -> Union[str, bytes]:
+        return self.path if self.path else self.data
+
+def _as_matrix(value: Union[str, UploadedMatrix]) -> UploadedMatrix:
+    if isinstance(value, UploadedMatrix):
+        return value
+    return UploadedMatrix(os.path.basename(value), path=value)
+
+def _matrix_label(value: Union[str, UploadedMatrix]) -> str:
+    return value.label if isinstance(value, UploadedMatrix) else value
+
+def read_uploaded_files(pdf_file, excel_files) -> Tuple[bytes, Dict[str, UploadedMatrix]]:
+    """
+    Variante sin archivos temporales de `save_uploaded_files` (IO_MODE=memory):
+    el PDF y los Excel se leen del flujo de la solicitud a memoria.
+
+    :return: (contenido del PDF, {especialidad: primera matriz de esa especialidad})
+    """
+    pdf_data = pdf_file.read()
+    logger.info("PDF '%s' recibido en memoria (%d bytes).", pdf_file.filename, len(pdf_data))
+    return pdf_data, _read_excel_files(excel_files)
+
+def _read_excel_files(excel_files) -> Dict[str, UploadedMatrix]:
+    excel_index = {}
+    for xf in excel_files:
+        original_raw = os.path.basename(xf.filename)
+        esp_key = norm_esp(first_chunk_before_underscore(original_raw))
+        # Conserva el primer Excel encontrado por especialidad; los demás no se leen
+        if esp_key and esp_key not in excel_index:
+            excel_index[esp_key] = UploadedMatrix(original_raw, data=xf.read())
+            logger.debug("Excel '%s' asignado a la especialidad '%s' (en memoria).", original_raw, esp_key)
+    return excel_index
+
+def save_uploaded_files(pdf_file, excel_files, folder: str) -> Tuple[str, Dict[str, str], List[str]]:
+    """
+    Guarda el PDF y los Excel recibidos en `folder` con nombres únicos.
+
+    :return: (ruta del PDF, {especialidad: ruta del primer Excel de esa especialidad}, rutas de todos los Excel)
+    """
+    file_path = _save_pdf_file(pdf_file, folder)
+    excel_index_path, excel_paths = _save_excel_files(excel_files, folder)
+    return file_path, excel_index_path, excel_paths
+
+def _save_pdf_file(pdf_file, folder: str) -> str:
+    filename = secure_filename(pdf_file.filename)
+    unique_name = f"{uuid.uuid4()}_{filename}"
+    file_path = os.path.join(folder, unique_name)
+    pdf_file.save(file_path)
+    logger.info("PDF guardado temporalmente en: %s", file_path)
+    return file_path
+
+def _save_excel_files(excel_files, folder: str) -> Tuple[Dict[str, str], List[str]]:
+    # Guardar los Excel e indexa por especialidad
+    excel_index_path = {}
+    excel_paths = []
+
+    for xf in excel_files:
+        original_raw = os.path.basename(xf.filename)        # <<-- crudo (con espacios)
+        esp_key = norm_esp(first_chunk_before_underscore(original_raw))
+
+        safe_name = secure_filename(original_raw)           # <<-- recién aquí lo saneas
+        xunique = f"{uuid.uuid4()}_{safe_name}"
+        xpath = os.path.join(folder, xunique)
+        xf.save(xpath)
+        excel_paths.append(xpath)
+        logger.debug("Excel '%s' (clave: %s) guardado en: %s", original_raw, esp_key, xpath)
+
+        # Conserva el primer Excel encontrado por especialidad
+        if esp_key and esp_key not in excel_index_path:
+            excel_index_path[esp_key] = xpath
+            logger.debug("Excel asignado a la especialidad '%s'.", esp_key)
+
+    return excel_index_path, excel_paths
+
+def receive_uploaded_files(pdf_file, excel_files, config) -> Tuple[Union[str, bytes], Dict, List[str]]:
+    """
+    Recibe los archivos según IO_MODE: en memoria ('memory') o en la carpeta de subida ('disk').
+
+    :return: (PDF: ruta o bytes, índice de matrices por especialidad, archivos temporales a eliminar)
+    """
+    with metrics.stage("upload"):
+        if config.get('IO_MODE', "disk") == "memory":
+            pdf_data, excel_index = read_uploaded_files(pdf_file, excel_files)
+            return pdf_data, excel_index, []
+        file_path, excel_index_path, excel_paths = save_uploaded_files(pdf_file, excel_files, config['UPLOAD_FOLDER'])
+        return file_path, excel_index_path, [file_path, *excel_paths]
+
+def receive_batch_files(pdf_files, excel_files, config) -> Tuple[List[Tuple[str, Union[str, bytes]]], Dict, List[str]]:
+    """
+    `receive_uploaded_files` para varios PDFs que comparten el juego de matrices.
+
+    :return: ([(nombre del PDF, ruta o bytes)], índice de matrices por especialidad, archivos temporales a eliminar)
+    """
+    with metrics.stage("upload"):
+        if config.get('IO_MODE', "disk") == "memory":
+            reports = []
+            for pdf_file in pdf_files:
+                data = pdf_file.read()
+                logger.info("PDF '%s' recibido en memoria (%d bytes).", pdf_file.filename, len(data))
+                reports.append((pdf_file.filename, data))
+            return reports, _read_excel_files(excel_files), []
+        folder = config['UPLOAD_FOLDER']
+        reports = [(pdf_file.filename, _save_pdf_file(pdf_file, folder)) for pdf_file in pdf_files]
+        excel_index_path, excel_paths = _save_excel_files(excel_files, folder)
+        return reports, excel_index_path, [path for _, path in reports] + excel_paths
+
+def classify_report(
+    file_path: Union[str, bytes],
+    cleaner,
+    classifier,
+    config,
+    progress: Optional[Progress] = None,
+    page_texts: Optional[PageTextProvider] = None,
+    page_store: Optional[PageStore] = None,
+    stats: Optional[Dict] = None
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Extrae, limpia y clasifica los párrafos del PDF y detecta sus especialidades.
+
+    :param page_texts: Textos de página ya extraídos (si no, se extraen de `file_path`)
+    :param page_store: Tienda de páginas por huella: sólo se extraen y clasifican las páginas nuevas
+    :param stats: Si se indica, recibe 'paginas_reutilizadas' y 'paginas_recalculadas' (con tienda)
+    :return: (resultados por párrafo con 'especialidad' asignada, ocurrencias de especialidad)
+    """
+    progress = progress or _noop_progress
+
+    # Extraer texto
+    logger.info("Iniciando extracción de párrafos...")
+    # El PDF se analiza una sola vez y el texto se comparte entre etapas
+    with metrics.stage("extraction"):
+        if page_texts is None and page_store is not None:
+            page_texts = load_page_texts(
+                file_path,
+                page_store,
+                workers=config['EXTRACTION_WORKERS'],
+                min_pages_per_chunk=config['EXTRACTION_MIN_PAGES_PER_CHUNK'],
+                progress=lambda done, total: progress("extraccion", done, total),
+                ocr=OcrFallback.from_config(config)
+            )
+        elif page_texts is None:
+            page_texts = PageTextProvider(
+                file_path,
+                workers=config['EXTRACTION_WORKERS'],
+                min_pages_per_chunk=config['EXTRACTION_MIN_PAGES_PER_CHUNK'],
+                progress=lambda done, total: progress("extraccion", done, total),
+                ocr=OcrFallback.from_config(config)
+            )
+        raw_paragraphs = extract_paragraphs(page_texts)
+    metrics.count("pages", page_texts.page_count)
+    metrics.count("paragraphs", len(raw_paragraphs))
+    logger.info("Extracción completada. Se encontraron %d párrafos.", len(raw_paragraphs))
+
+    # Clean text (los párrafos recién extraídos se actualizan en su lugar)
+    cleaned_paragraphs = raw_paragraphs
+    with metrics.stage("cleaning"):
+        for p, texto in zip(cleaned_paragraphs, cleaner.clean_batch([p['texto'] for p in raw_paragraphs])):
+            p['texto'] = texto
+    progress("limpieza", len(cleaned_paragraphs), len(cleaned_paragraphs))
+    logger.info("Limpieza de texto completada.")
+
+    # Clasificacion
+    logger.info("Iniciando clasificación de párrafos.")
+    with metrics.stage("classification"):
+        etiquetas, stored_pages = _classify_paragraphs(
+            classifier, cleaned_paragraphs, config, page_texts if page_store is not None else None, page_store
+        )
+    if stats is not None and page_store is not None and page_texts.fingerprints is not None:
+        # Reutilizada = texto y etiquetas (si tiene párrafos) salieron de la tienda
+        with_paragraphs = {p["pagina"] for p in cleaned_paragraphs}
+        reused = sum(1 for i in page_texts.reused if i + 1 not in with_paragraphs or i + 1 in stored_pages)
+        stats["paginas_reutilizadas"] = reused
+        stats["paginas_recalculadas"] = page_texts.page_count - reused
+        metrics.count("pages_reused", reused)
+    results = [
+        {
+            **p,
+            'etiqueta': etiqueta,
+            "especialidad": None,
+            "observacion_agregada": False
+        }
+        for p, etiqueta in zip(cleaned_paragraphs, etiquetas)
+    ]
+    progress("clasificacion", len(results), len(results))
+    logger.info("Clasificación finalizada.")
+
+    # Extraer especialidades
+    logger.info("Iniciando extracción y asignación de especialidades.")
+    with metrics.stage("specialty_extraction"):
+        especialidades = extraer_especialidades(page_texts)
+    observaciones = [p for p in results if p["etiqueta"].lower() == "observacion"]
+    metrics.count("observations", len(observaciones))
+    with metrics.stage("matching"):
+        asignadas = SpecialtyIndex(especialidades).assign(p["pagina"] for p in observaciones)
+        for p, especialidad in zip(observaciones, asignadas):
+            p["especialidad"] = especialidad
+    # O si se desea el sublabel:
+    # for p, esp in zip(observaciones, SpecialtyIndex(especialidades).assign_ext(p["pagina"] for p in observaciones)):
+    #     p["especialidad"] = esp["principal"]
+    #     p["subespecialidad"] = esp["sublabel"]
+    progress("especialidades", len(especialidades), len(especialidades))
+    logger.info("Asignación de especialidades completada.")
+
+    return results, especialidades
+
+def _classify_paragraphs(
+    classifier,
+    paragraphs: List[Dict],
+    config,
+    page_texts: Optional[PageTextProvider] = None,
+    page_store: Optional[PageStore] = None
+) -> Tuple[List[str], set]:
+    """
+    Etiquetas de `paragraphs`. Con tienda de páginas, las páginas reutilizadas
+    cuyas etiquetas ya están guardadas para este modelo no se clasifican, y
+    las etiquetas nuevas se guardan por página.
+
+    :return: (etiquetas en el orden de `paragraphs`, páginas (1-based) con etiquetas reutilizadas)
+    """
+    by_page = {}
+    for i, p in enumerate(paragraphs):
+        by_page.setdefault(p["pagina"], []).append(i)
+
+    fingerprints = page_texts.fingerprints if page_texts is not None else None
+    stored = {}
+    if fingerprints:
+        namespace = classifier.fingerprint
+        candidates = [fingerprints[page - 1] for page in by_page if page - 1 in page_texts.reused]
+        known = page_store.get_labels(candidates, namespace)
+        for page, indexes in by_page.items():
+            labels = known.get(fingerprints[page - 1]) if page - 1 in page_texts.reused else None
+            if labels is not None and len(labels) == len(indexes):
+                stored[page] = labels
+
+    etiquetas = [None] * len(paragraphs)
+    pending = [i for i, p in enumerate(paragraphs) if p["pagina"] not in stored]
+    nuevas = classify_by_length(
+        classifier,
+        [paragraphs[i]['texto'] for i in pending],
+        max_tokens=config['CLASSIFIER_MAX_TOKENS_PER_BATCH'],
+        max_batch_size=config['CLASSIFIER_BATCH_SIZE']
+    )
+    for i, etiqueta in zip(pending, nuevas):
+        etiquetas[i] = etiqueta
+    for page, labels in stored.items():
+        for i, etiqueta in zip(by_page[page], labels):
+            etiquetas[i] = etiqueta
+
+    if fingerprints:
+        page_store.put_labels(
+            {fingerprints[page - 1]: [etiquetas[i] for i in indexes] for page, indexes in by_page.items() if page not in stored},
+            namespace,
+        )
+    return etiquetas, set(stored)
+
+_CACHED_FIELDS = ("pagina", "texto", "etiqueta", "especialidad")
+
+def _to_cache_entry(results: List[Dict], especialidades: List[Dict]) -> Dict:
+    # Sólo lo que no depende del juego de Excel de la solicitud
+    return {
+        "resultados": [{k: p.get(k) for k in _CACHED_FIELDS} for p in results],
+        "especialidades": especialidades,
+    }
+
+def _from_cache_entry(entry: Dict) -> Tuple[List[Dict], List[Dict]]:
+    results = [{**p, "observacion_agregada": False} for p in entry["resultados"]]
+    return results, entry["especialidades"]
+
+def result_cache_key(file_path: Union[str, bytes], classifier, config) -> str:
+    """
+    Clave de la caché de resultados: SHA-256 del PDF (ruta o bytes) + huella del
+    modelo y umbral + firma del OCR si está habilitado (al habilitarlo, los
+    reportes escaneados ya procesados sin OCR se vuelven a extraer).
+    """
+    ocr = OcrFallback.from_config(config)
+    return ResultCache.make_key(content_sha256(file_path), classifier.fingerprint, ocr.signature if ocr else "")
+
+def cached_classify_report(
+    file_path: Union[str, bytes],
+    cleaner,
+    classifier,
+    config,
+    result_cache: Optional[ResultCache] = None,
+    progress: Optional[Progress] = None,
+    page_store: Optional[PageStore] = None,
+    stats: Optional[Dict] = None
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    `classify_report` con caché de resultados por contenido del PDF.
+    Sin caché (None) se comporta igual que `classify_report`.
+    """
+    if result_cache is None:
+        return classify_report(file_path, cleaner, classifier, config, progress, page_store=page_store, stats=stats)
+
+    key = result_cache_key(file_path, classifier, config)
+    entry = result_cache.get(key)
+    metrics.cache_lookup("result", hits=int(entry is not None), misses=int(entry is None))
+    if entry is not None:
+        logger.info("Resultados recuperados de la caché (%s). Se omite extracción y clasificación.", key[:12])
+        return _from_cache_entry(entry)
+
+    results, especialidades = classify_report(file_path, cleaner, classifier, config, progress, page_store=page_store, stats=stats)
+    result_cache.put(key, _to_cache_entry(results, especialidades))
+    return results, especialidades
+
+def _excel_file_for(p: Dict, excel_index_path: Dict) -> str:
+    esp = p.get("especialidad")
+    if (
+        p.get("etiqueta", "").lower() == "observacion"
+        and esp is not None
+        and esp.upper() != "DESCONOCIDA"
+    ):
+        matrix = excel_index_path.get(norm_esp(esp))
+        return _matrix_label(matrix) if matrix else ""
+    # Si no tiene especialidad o es desconocida, asigna ruta vacía
+    return ""
+
+def map_excel_files(results: List[Dict], excel_index_path: Dict) -> None:
+    """
+    Mapea el texto según la especialidad y le asigna el excel correspondiente.
+    """
+    with metrics.stage("matching"):
+        for p in results:
+            p["excel_file"] = _excel_file_for(p, excel_index_path)
+    logger.info("Mapeo de observaciones a archivos Excel completado.")
+
+def obs_index_folder(config, export_folder: str) -> Optional[str]:
+    """
+    Carpeta de los índices laterales de las matrices (None si están deshabilitados).
+    Por defecto vive junto a las matrices exportadas.
+    """
+    if not config.get('OBS_INDEX_ENABLED', True):
+        return None
+    return config.get('OBS_INDEX_FOLDER') or os.path.join(export_folder, ".obs_index")
+
+def _update_matrix(
+    source: Union[str, bytes],
+    text_groups: List[List[str]],
+    index_folder: Optional[str],
+    output_path: Optional[str] = None,
+    near_duplicate_threshold: Optional[float] = None
+) -> Tuple[List[set], int]:
+    """
+    Actualiza un libro con los grupos de textos de cada especialidad que lo
+    comparte, en orden. Es una función de módulo para poder ejecutarse también
+    en un pool de procesos.
+
+    :param source: Ruta del libro o su contenido en memoria
+    :param output_path: Destino del libro modificado (None = sobrescribir `source`)
+    :return: (textos normalizados agregados por grupo, bytes escritos; 0 si el libro no cambió)
+    """
+    agregados_por_grupo = []
+    for textos in text_groups:
+        agregados = {
+            _norm(t)
+            for t in excel_observation_cheker(source, textos, index_folder, output_path, near_duplicate_threshold)
+        }
+        if agregados and output_path:
+            # Los grupos siguientes parten del libro ya escrito en el destino
+            source = output_path
+        agregados_por_grupo.append(agregados)
+
+    written = os.path.getsize(source) if any(agregados_por_grupo) else 0
+    return agregados_por_grupo, written
+
+def _executor(pool: str, workers: int):
+    if pool == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="excel")
+
+def update_matrices(
+    results: List[Dict],
+    progress: Optional[Progress] = None,
+    index_folder: Optional[str] = None,
+    workers: int = 1,
+    pool: str = "thread",
+    targets: Optional[Dict[str, Tuple[Union[str, bytes], Optional[str]]]] = None,
+    near_duplicate_threshold: Optional[float] = None
+) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """
+    Agrega las observaciones nuevas a la matriz de su especialidad y marca 'observacion_agregada'.
+
+    Cada libro se actualiza en una tarea independiente de un pool de hilos o
+    procesos (`workers` tareas a la vez). Las especialidades que apuntan al
+    mismo libro se procesan en orden dentro de la misma tarea, así que las
+    marcas quedan igual que en el recorrido secuencial.
+
+    :param targets: {excel_file: (ruta o bytes del libro, destino)}; sin entrada
+        el libro `excel_file` se actualiza en su lugar
+    :param near_duplicate_threshold: Umbral de casi duplicados (None = sólo coincidencia exacta)
+    :return: (errores por especialidad, bytes escritos por excel_file modificado);
+        una matriz con error no detiene las demás
+    """
+    targets = targets or {}
+    progress = progress or _noop_progress
+
+    #Saca los valores unicos de especialidad siempre y cuando sea observacion
+    unique_especialidades = []
+    for p in results:
+        esp = p.get("especialidad")
+        if esp and esp != "DESCONOCIDA" and p.get("etiqueta", "").lower() == "observacion" and esp not in unique_especialidades:
+            unique_especialidades.append(esp)
+    logger.info("Especialidades únicas encontradas: %s", unique_especialidades)
+
+    # Agrupa por libro los ítems de cada especialidad
+    tasks = {}  # excel_path -> [(esp, items)]
+    for esp in unique_especialidades:
+        # Filtra una sola vez los ítems de esta especialidad que sean observaciones
+        items = [
+            p for p in results
+            if p.get("especialidad") == esp and p.get("etiqueta", "").lower() == "observacion"
+        ]
+        for p in items:
+            p["observacion_agregada"] = False
+
+        # Toma el primer excel_file NO vacío si existe; si no, usa ""
+        excel_path = next((p.get("excel_file") for p in items if p.get("excel_file")), "")
+
+        # Si no hay excel_path (cadena vacía o None), no se llama excel_observation_cheker
+        if not excel_path or not items:
+            logger.debug("Sin Excel o textos para '%s'. No se agregan observaciones.", esp)
+            continue
+        logger.debug("Verificando %d observaciones en Excel de '%s'.", len(items), esp)
+        tasks.setdefault(excel_path, []).append((esp, items))
+
+    errores = {}
+    escritos = {}
+    if tasks:
+        with _executor(pool, max(1, min(workers, len(tasks)))) as executor:
+            futures = {}
+            for excel_path, groups in tasks.items():
+                source, output_path = targets.get(excel_path, (excel_path, None))
+                text_groups = [[p["texto"] for p in items] for _, items in groups]
+                future = executor.submit(
+                    _update_matrix, source, text_groups, index_folder, output_path, near_duplicate_threshold
+                )
+                futures[future] = (excel_path, groups)
+            for done, future in enumerate(as_completed(futures), start=1):
+                excel_path, groups = futures[future]
+                try:
+                    agregados_por_grupo, written = future.result()
+                except Exception as e:
+                    for esp, _ in groups:
+                        errores[esp] = str(e)
+                    logger.error("Falló la actualización de la matriz de %s: %s", [esp for esp, _ in groups], e)
+                else:
+                    if written:
+                        escritos[excel_path] = written
+                    # Marca si cada observación quedó agregada
+                    for (esp, items), agregados_norm in zip(groups, agregados_por_grupo):
+                        for p in items:
+                            p["observacion_agregada"] = _norm(p["texto"]) in agregados_norm
+                        metrics.count("rows_appended", len(agregados_norm))
+                        logger.debug("Especialidad '%s' procesada.", esp)
+                progress("excel", done, len(tasks))
+
+    logger.info("Verificación de observaciones en Excel finalizada.")
+    return errores, escritos
+
+def export_path(esp_norm_key: str, export_folder: str, timestamp: str) -> str:
+    """
+    Ruta destino <ESPECIALIDAD>_<timestamp>.xlsx, con sufijo aleatorio si ya existe.
+    """
+    dest_name = f"{esp_norm_key}_{timestamp}.xlsx"
+    dest_path = os.path.join(export_folder, dest_name)
+
+    # Evitar colisiones si ya existe
+    if os.path.exists(dest_path):
+        dest_name = f"{esp_norm_key}_{timestamp}_{uuid.uuid4().hex[:6]}.xlsx"
+        dest_path = os.path.join(export_folder, dest_name)
+        logger.warning("El archivo de exportación ya existe. Se renombró a: %s", dest_name)
+    return dest_path
+
+def _export_matrix(esp_norm_key: str, matrix: UploadedMatrix, dest_path: str) -> int:
+    """
+    Exporta una matriz sin cambios; devuelve los bytes escritos.
+    En disco se intenta un enlace duro (sin copia); si no es posible se copia.
+    """
+    if matrix.path:
+        try:
+            os.link(matrix.path, dest_path)
+            logger.debug("Archivo Excel '%s' enlazado en: %s", esp_norm_key, dest_path)
+            return 0
+        except OSError:
+            # Otro sistema de archivos o sin soporte de enlaces: copia preservando metadata básica
+            shutil.copy2(matrix.path, dest_path)
+            logger.debug("Archivo Excel '%s' copiado a: %s", esp_norm_key, dest_path)
+            return os.path.getsize(dest_path)
+
+    tmp_path = f"{dest_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(matrix.data)
+    os.replace(tmp_path, dest_path)
+    logger.debug("Archivo Excel '%s' escrito en: %s", esp_norm_key, dest_path)
+    return len(matrix.data)
+
+def export_matrices(
+    excel_index_path: Dict,
+    export_folder: str,
+    progress: Optional[Progress] = None,
+    workers: int = 1,
+    timestamp: Optional[str] = None
+) -> Tuple[List[str], Dict[str, str], int]:
+    """
+    Exporta matrices sin cambios a la carpeta de exportación como
+    <ESPECIALIDAD>_<timestamp>.xlsx, hasta `workers` a la vez. Las matrices
+    modificadas no pasan por aquí: `write_matrices` las escribe directamente
+    en su destino.
+
+    :return: (rutas exportadas, errores por especialidad, bytes escritos)
+    """
+    progress = progress or _noop_progress
+
+    exported = []
+    errores = {}
+    written = 0
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    pending = {}
+    for esp_norm_key, value in excel_index_path.items():
+        matrix = _as_matrix(value) if value else None
+        if matrix is None or (matrix.path and not os.path.exists(matrix.path)):
+            logger.warning("No se encontró el archivo temporal para la especialidad '%s'.", esp_norm_key)
+            continue
+        pending[esp_norm_key] = matrix
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending))), thread_name_prefix="export") as executor:
+            futures = {
+                executor.submit(
+                    _export_matrix, esp_norm_key, matrix, export_path(esp_norm_key, export_folder, timestamp)
+                ): esp_norm_key
+                for esp_norm_key, matrix in pending.items()
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                esp_norm_key = futures[future]
+                try:
+                    written += future.result()
+                    exported.append(esp_norm_key)
+                except Exception as e:
+                    errores[esp_norm_key] = f"Exportación: {e}"
+                    logger.error("No se pudo exportar la matriz '%s': %s", esp_norm_key, e)
+                progress("exportacion", done, len(pending))
+
+    logger.info("Exportación de matrices sin cambios finalizada.")
+    return exported, errores, written
+
+def write_matrices(
+    results: List[Dict],
+    excel_index_path: Dict,
+    export_folder: str,
+    config,
+    progress: Optional[Progress] = None
+) -> Tuple[Dict[str, str], int]:
+    """
+    Etapa de Excel completa: actualiza las matrices y las exporta.
+
+    Cada matriz modificada se escribe una sola vez, directamente en la carpeta
+    de exportación (archivo temporal + renombrado atómico); el archivo recibido
+    no se modifica. Las matrices sin observaciones nuevas sólo se exportan con
+    EXPORT_UNCHANGED (enlace duro cuando están en disco).
+
+    :return: (errores por especialidad, bytes escritos en la etapa)
+    """
+    matrices = {esp: _as_matrix(value) for esp, value in excel_index_path.items() if value}
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    destinos = {esp: export_path(esp, export_folder, timestamp) for esp in matrices}
+
+    with metrics.stage("excel_check"):
+        errores, escritos = update_matrices(
+            results,
+            progress,
+            obs_index_folder(config, export_folder),
+            workers=config.get('EXCEL_WORKERS', 1),
+            pool=config.get('EXCEL_POOL', "thread"),
+            targets={m.label: (m.source, destinos[esp]) for esp, m in matrices.items()},
+            near_duplicate_threshold=config.get('OBS_NEAR_DUP_THRESHOLD'),
+        )
+    written = sum(escritos.values())
+    for esp, m in matrices.items():
+        if m.label in escritos:
+            logger.info("Matriz '%s' exportada a: %s", esp, destinos[esp])
+
+    if config.get('EXPORT_UNCHANGED', False):
+        sin_cambios = {esp: m for esp, m in matrices.items() if m.label not in escritos}
+        with metrics.stage("export"):
+            _, export_errors, export_written = export_matrices(
+                sin_cambios, export_folder, progress, workers=config.get('EXCEL_WORKERS', 1), timestamp=timestamp
+            )
+        written += export_written
+        for esp, error in export_errors.items():
+            errores[esp] = f"{errores[esp]}; {error}" if esp in errores else error
+
+    logger.info("Etapa de Excel: %d matrices modificadas, %d bytes escritos.", len(escritos), written)
+    return errores, written
+
+def process_report(
+    file_path: Union[str, bytes],
+    excel_index_path: Dict,
+    export_folder: str,
+    cleaner,
+    classifier,
+    config,
+    progress: Optional[Progress] = None,
+    result_cache: Optional[ResultCache] = None,
+    page_store: Optional[PageStore] = None
+) -> Dict:
+    """
+    Pipeline completo de un reporte: extracción, limpieza, clasificación,
+    especialidades, actualización de matrices y exportación.
+
+    :param file_path: Ruta del PDF o su contenido en memoria
+    :param excel_index_path: {especialidad: ruta del Excel o UploadedMatrix}
+    :return: {'resultados': [...campos de ParagraphResult], 'errores': {especialidad: mensaje},
+        'bytes_escritos': bytes escritos en la etapa de Excel, 'paginas_reutilizadas' y
+        'paginas_recalculadas' (None si no se consultó la tienda de páginas)}
+    """
+    stats = {}
+    results, _ = cached_classify_report(file_path, cleaner, classifier, config, result_cache, progress, page_store, stats)
+    map_excel_files(results, excel_index_path)
+    errores, written = write_matrices(results, excel_index_path, export_folder, config, progress)
+    return {
+        "resultados": results,
+        "errores": errores,
+        "bytes_escritos": written,
+        "paginas_reutilizadas": stats.get("paginas_reutilizadas"),
+        "paginas_recalculadas": stats.get("paginas_recalculadas"),
+    }
+
+def _extract_report(
+    source: Union[str, bytes],
+    page_store: Optional[PageStore],
+    ocr: Optional[OcrFallback]
+) -> Tuple[List[str], Optional[List[str]], set]:
+    """
+    Worker de `classify_reports`: (textos de página, huellas, páginas reutilizadas de la tienda).
+    """
+    if page_store is not None:
+        provider = load_page_texts(source, page_store, ocr=ocr)
+    else:
+        provider = PageTextProvider(source, ocr=ocr)
+    return provider._load(), provider.fingerprints, provider.reused
+
+def classify_reports(
+    reports: List[Tuple[str, Union[str, bytes]]],
+    cleaner,
+    classifier,
+    config,
+    result_cache: Optional[ResultCache] = None,
+    progress: Optional[Progress] = None,
+    page_store: Optional[PageStore] = None,
+    stats: Optional[List[Dict]] = None
+) -> List[Union[List[Dict], Exception]]:
+    """
+    `cached_classify_report` para varios PDFs.
+
+    El texto de los reportes que no están en la caché se extrae en paralelo,
+    un proceso por reporte (hasta BATCH_WORKERS a la vez); cada reporte se
+    clasifica en este proceso en cuanto su texto está listo, mientras los
+    demás se siguen extrayendo.
+
+    :param reports: [(nombre, ruta del PDF o su contenido)]
+    :param stats: Si se indica, una entrada por reporte (ver `classify_report`)
+    :return: Por reporte y en el mismo orden, sus resultados o la excepción que lo hizo fallar
+    """
+    progress = progress or _noop_progress
+    outcomes: List = [None] * len(reports)
+    stats = stats if stats is not None else [{} for _ in reports]
+    pending = {}  # índice del reporte -> clave de la caché
+    for i, (_, source) in enumerate(reports):
+        key = None
+        if result_cache is not None:
+            key = result_cache_key(source, classifier, config)
+            entry = result_cache.get(key)
+            metrics.cache_lookup("result", hits=int(entry is not None), misses=int(entry is None))
+            if entry is not None:
+                outcomes[i] = _from_cache_entry(entry)[0]
+                continue
+        pending[i] = key
+    done = len(reports) - len(pending)
+    progress("reportes", done, len(reports))
+
+    def classify(i: int, page_texts: Optional[PageTextProvider]) -> None:
+        name, source = reports[i]
+        try:
+            results, especialidades = classify_report(
+                source, cleaner, classifier, config,
+                page_texts=page_texts, page_store=page_store, stats=stats[i]
+            )
+            if pending[i]:
+                result_cache.put(pending[i], _to_cache_entry(results, especialidades))
+            outcomes[i] = results
+        except Exception as e:
+            logger.error("No se pudo procesar el reporte '%s': %s", name, e)
+            outcomes[i] = e
+
+    workers = max(1, min(config.get('BATCH_WORKERS', 1), len(pending)))
+    if workers == 1:
+        for i in pending:
+            classify(i, None)
+            done += 1
+            progress("reportes", done, len(reports))
+        return outcomes
+
+    ocr = OcrFallback.from_config(config)
+    if ocr is not None:
+        # Cada proceso del lote hace su OCR en serie: el total queda acotado por BATCH_WORKERS
+        ocr.workers = 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_extract_report, reports[i][1], page_store, ocr): i for i in pending}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                texts, fingerprints, reused = future.result()
+                page_texts = PageTextProvider.from_texts(reports[i][1], texts, fingerprints, reused)
+            except Exception as e:
+                logger.error("No se pudo leer el reporte '%s': %s", reports[i][0], e)
+                outcomes[i] = e
+            else:
+                classify(i, page_texts)
+            done += 1
+            progress("reportes", done, len(reports))
+    return outcomes
+
+def process_batch(
+    reports: List[Tuple[str, Union[str, bytes]]],
+    excel_index_path: Dict,
+    export_folder: str,
+    cleaner,
+    classifier,
+    config,
+    progress: Optional[Progress] = None,
+    result_cache: Optional[ResultCache] = None,
+    page_store: Optional[PageStore] = None
+) -> Dict:
+    """
+    Pipeline de varios reportes que escriben en el mismo juego de matrices.
+
+    Las observaciones de todos los reportes se unen por especialidad, así que
+    cada matriz se abre, deduplica, actualiza y guarda una sola vez (con
+    `process_report` por reporte, K reportes la reescriben K veces). Una fila
+    agregada se atribuye al primer reporte, en el orden recibido, que la contiene.
+
+    :param reports: [(nombre, ruta del PDF o su contenido)]
+    :return: {'reportes': [{'reporte', 'resultados', 'observaciones', 'agregadas', 'error',
+        'paginas_reutilizadas', 'paginas_recalculadas'}],
+        'especialidades': resumen por especialidad, 'errores': {especialidad: mensaje},
+        'bytes_escritos': bytes escritos en la etapa de Excel}
+    """
+    stats = [{} for _ in reports]
+    outcomes = classify_reports(reports, cleaner, classifier, config, result_cache, progress, page_store, stats)
+    results = [p for outcome in outcomes if isinstance(outcome, list) for p in outcome]
+    map_excel_files(results, excel_index_path)
+    observations = [p for p in results if p["etiqueta"].lower() == "observacion"]
+    errores, written = write_matrices(observations, excel_index_path, export_folder, config, progress)
+
+    # update_matrices marca todas las copias de un texto agregado: sólo cuenta la primera
+    credited = set()
+    for p in observations:
+        if p["observacion_agregada"]:
+            key = (p["excel_file"], _norm(p["texto"]))
+            p["observacion_agregada"] = key not in credited
+            credited.add(key)
+
+    per_report = []
+    for (name, _), outcome, report_stats in zip(reports, outcomes, stats):
+        failed = isinstance(outcome, Exception)
+        report_results = [] if failed else outcome
+        report_observations = [p for p in report_results if p["etiqueta"].lower() == "observacion"]
+        per_report.append({
+            "reporte": name,
+            "resultados": report_results,
+            "observaciones": len(report_observations),
+            "agregadas": sum(bool(p["observacion_agregada"]) for p in report_observations),
+            "error": str(outcome) if failed else None,
+            "paginas_reutilizadas": report_stats.get("paginas_reutilizadas"),
+            "paginas_recalculadas": report_stats.get("paginas_recalculadas"),
+        })
+    logger.info(
+        "Lote de %d reportes: %d observaciones, %d filas agregadas.",
+        len(reports), len(observations), sum(r["agregadas"] for r in per_report)
+    )
+    return {
+        "reportes": per_report,
+        "especialidades": summarize_matrices(observations),
+        "errores": errores,
+        "bytes_escritos": written,
+    }
+
+def summarize_matrices(observations: List[Dict]) -> Dict[str, Dict]:
+    """
+    Resumen por especialidad de las observaciones y de las que se agregaron a su matriz.
+    """
+    summary = {}
+    for p in observations:
+        esp = p.get("especialidad")
+        if not esp or esp == "DESCONOCIDA":
+            continue
+        entry = summary.setdefault(esp, {"excel_file": "", "observaciones": 0, "agregadas": 0})
+        entry["excel_file"] = entry["excel_file"] or p.get("excel_file", "")
+        entry["observaciones"] += 1
+        entry["agregadas"] += int(bool(p.get("observacion_agregada")))
+    return summary
+
+def iter_report(
+    file_path: Union[str, bytes],
+    excel_index_path: Dict,
+    export_folder: str,
+    cleaner,
+    classifier,
+    config,
+    result_cache: Optional[ResultCache] = None
+) -> Iterator[Dict]:
+    """
+    Variante en streaming de `process_report`.
+
+    Las páginas se clasifican a medida que se extraen (en grupos de al menos
+    CLASSIFIER_BATCH_SIZE párrafos para no perder el beneficio de los lotes) y
+    se emiten en orden. Sólo se conservan en memoria las observaciones, que son
+    las que necesita la etapa de Excel.
+
+    Con caché de resultados, un acierto emite las páginas directamente desde
+    la caché; en un fallo se conserva además la versión compacta de todos los
+    resultados para guardarla al final de la clasificación.
+
+    Yields:
+        {"tipo": "pagina", "pagina": int, "resultados": [...]} por cada página con párrafos
+        {"tipo": "resumen", "especialidades": {...}, "agregadas": [...]} al final
+    """
+    cache_key = result_cache_key(file_path, classifier, config) if result_cache is not None else None
+    entry = result_cache.get(cache_key) if cache_key else None
+    if cache_key:
+        metrics.cache_lookup("result", hits=int(entry is not None), misses=int(entry is None))
+    if entry is not None:
+        logger.info("Resultados recuperados de la caché (%s).", cache_key[:12])
+        yield from _iter_cached_report(entry, excel_index_path, export_folder, config)
+        return
+
+    page_texts = PageTextProvider(
+        file_path,
+        workers=config['EXTRACTION_WORKERS'],
+        min_pages_per_chunk=config['EXTRACTION_MIN_PAGES_PER_CHUNK'],
+        ocr=OcrFallback.from_config(config)
+    )
+    especialidades = []
+    observations = []
+    cacheable = [] if cache_key else None
+    pending = []
+    pending_count = 0
+    # Extracción, limpieza y clasificación se alternan: se acumula el tiempo de cada etapa
+    clock = metrics.StageClock()
+    pages = paragraphs_total = 0
+
+    def flush():
+        textos = [p['texto'] for _, paragraphs in pending for p in paragraphs]
+        with clock("classification"):
+            etiquetas = iter(classify_by_length(
+                classifier,
+                textos,
+                max_tokens=config['CLASSIFIER_MAX_TOKENS_PER_BATCH'],
+                max_batch_size=config['CLASSIFIER_BATCH_SIZE']
+            ))
+        # Los encabezados de páginas posteriores no afectan a las páginas pendientes
+        with clock("matching"):
+            asignadas = iter(SpecialtyIndex(especialidades).assign(page_number for page_number, _ in pending))
+        for page_number, paragraphs in pending:
+            especialidad = next(asignadas)
+            page_results = []
+            for p in paragraphs:
+                item = {**p, 'etiqueta': next(etiquetas), "especialidad": None, "observacion_agregada": False}
+                if item["etiqueta"].lower() == "observacion":
+                    item["especialidad"] = especialidad
+                    observations.append(item)
+                item["excel_file"] = _excel_file_for(item, excel_index_path)
+                page_results.append(item)
+                if cacheable is not None:
+                    cacheable.append({k: item[k] for k in _CACHED_FIELDS})
+            yield {"tipo": "pagina", "pagina": page_number, "resultados": page_results}
+
+    logger.info("Iniciando procesamiento en streaming...")
+    for page_number, text in clock.timed("extraction", page_texts):
+        pages += 1
+        with clock("specialty_extraction"):
+            especialidades_en_pagina(page_number, text, especialidades)
+        with clock("extraction"):
+            paragraphs = split_paragraphs(page_number, text)
+        with clock("cleaning"):
+            for p, texto in zip(paragraphs, cleaner.clean_batch([p['texto'] for p in paragraphs])):
+                p['texto'] = texto
+        if not paragraphs:
+            continue
+        paragraphs_total += len(paragraphs)
+        pending.append((page_number, paragraphs))
+        pending_count += len(paragraphs)
+        if pending_count >= config['CLASSIFIER_BATCH_SIZE']:
+            yield from flush()
+            pending, pending_count = [], 0
+
+    if pending:
+        yield from flush()
+    clock.record()
+    metrics.count("pages", pages)
+    metrics.count("paragraphs", paragraphs_total)
+    metrics.count("observations", len(observations))
+    logger.info("Clasificación en streaming finalizada. %d observaciones.", len(observations))
+
+    if cacheable is not None:
+        result_cache.put(cache_key, {"resultados": cacheable, "especialidades": especialidades})
+
+    errores, written = write_matrices(observations, excel_index_path, export_folder, config)
+
+    yield {
+        "tipo": "resumen",
+        "especialidades": summarize_matrices(observations),
+        "agregadas": [p for p in observations if p["observacion_agregada"]],
+        "errores": errores,
+        "bytes_escritos": written,
+    }
+
+def _iter_cached_report(entry: Dict, excel_index_path: Dict, export_folder: str, config) -> Iterator[Dict]:
+    results, _ = _from_cache_entry(entry)
+    map_excel_files(results, excel_index_path)
+
+    page_results = []
+    for item in results:
+        if page_results and page_results[-1]["pagina"] != item["pagina"]:
+            yield {"tipo": "pagina", "pagina": page_results[-1]["pagina"], "resultados": page_results}
+            page_results = []
+        page_results.append(item)
+    if page_results:
+        yield {"tipo": "pagina", "pagina": page_results[-1]["pagina"], "resultados": page_results}
+
+    observations = [p for p in results if p["etiqueta"].lower() == "observacion"]
+    errores, written = write_matrices(observations, excel_index_path, export_folder, config)
+
+    yield {
+        "tipo": "resumen",
+        "especialidades": summarize_matrices(observations),
+        "agregadas": [p for p in observations if p["observacion_agregada"]],
+        "errores": errores,
+        "bytes_escritos": written,
+    }
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import Dict, Optional
+
+# Cambiar cuando cambie el formato guardado o la lógica de extracción/limpieza
+CACHE_VERSION = 1
+
+class ResultCache:
+    """
+    Caché persistente en disco de resultados de clasificación por documento.
+
+    La clave combina el SHA-256 del PDF con la huella del modelo ONNX y su
+    umbral (y, si está habilitado, la configuración del OCR), así que un mismo PDF re-subido (con cualquier juego de Excel) salta
+    directo a la etapa de Excel. Cada entrada es un archivo JSON; cuando el
+    tamaño total supera `max_bytes` se eliminan las entradas usadas hace más
+    tiempo (LRU por mtime, que se actualiza en cada acierto).
+    """
+    def __init__(self, folder: str, max_bytes: int = 512 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def make_key(pdf_sha256: str, model_fingerprint: str, extraction: str = "") -> str:
+        """
+        :param extraction: Firma de la extracción de texto (p. ej. `OcrFallback.signature`);
+            vacía con la extracción por defecto, así las entradas existentes siguen siendo válidas
+        """
+        raw = f"v{CACHE_VERSION}|{pdf_sha256}|{model_fingerprint}"
+        if extraction:
+            raw += f"|{extraction}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Devuelve {'resultados': [...], 'especialidades': [...]} o None.
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+            os.utime(path)  # marca la entrada como usada recientemente
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return payload
+
+    def put(self, key: str, payload: Dict) -> None:
+        # Escritura atómica: otros workers nunca leen un archivo a medio escribir
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for entry in os.scandir(self.folder):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    @classmethod
+    def from_config(cls, config) -> Optional["ResultCache"]:
+        """
+        Crea la caché si RESULT_CACHE_FOLDER está configurada; si no, devuelve None (deshabilitada).
+        """
+        folder = config.get('RESULT_CACHE_FOLDER')
+        if not folder:
+            return None
+        return cls(folder, max_bytes=config['RESULT_CACHE_MAX_BYTES'])
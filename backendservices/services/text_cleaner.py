@@ -1,6 +1,33 @@
 import re
 import unicodedata
-from typing import Optional
+from typing import Iterable, List, Optional
+
+_HTML_TAG = re.compile(r'<.*?>')
+_URL = re.compile(r'http\S+')
+_NOT_ALLOWED = re.compile(r'[^a-z0-9\s]')
+_WHITESPACE = re.compile(r'\s')
+
+# Tablas para bytes.translate precalculadas probando cada carácter ASCII
+# contra las expresiones originales: se eliminan los que no son [a-z0-9\s] y
+# todo espacio en blanco pasa a ' ' (bytes.split no reconoce \x1c-\x1f).
+_DELETE = bytes(code for code in range(128) if _NOT_ALLOWED.match(chr(code)))
+_SPACES = bytes(32 if _WHITESPACE.match(chr(code)) else code for code in range(256))
+
+def _clean_text_reference(text: Optional[str]) -> str:
+    """
+    Implementación original paso a paso; se conserva como referencia para las
+    pruebas de equivalencia y el benchmark.
+    """
+    if not text:
+        return ""
+
+    text = text.lower()
+    text = re.sub(r'<.*?>', '', text)
+    text = re.sub(r'http\S+', '', text)
+    text = unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode('utf-8')
+    text = re.sub(r'[^a-z0-9\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
 
 class TextCleaner:
     """
@@ -9,26 +36,35 @@ class TextCleaner:
     """
     def __init__(self):
         pass
-    
+
     def clean_text(self, text: Optional[str]) -> str:
         if not text:
             return ""
-        
+
         text = text.lower()
 
         # Remove HTML tags
-        text = re.sub(r'<.*?>', '', text)
+        if '<' in text:
+            text = _HTML_TAG.sub('', text)
 
         # Remove URLs
-        text = re.sub(r'http\S+', '', text)
-
-        # Normalize accented characters (á -> a, ñ -> n)
-        text = unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode('utf-8')
+        if 'http' in text:
+            text = _URL.sub('', text)
 
-        # Remove all non-alphanumeric characters except spaces
-        text = re.sub(r'[^a-z0-9\s]', '', text)
+        # Normalize accented characters (á -> a, ñ -> n); pure-ASCII text
+        # skips NFD
+        if text.isascii():
+            data = text.encode('ascii')
+        else:
+            data = unicodedata.normalize('NFD', text).encode('ascii', 'ignore')
 
-        # Collaps multiple spaces into one
-        text = re.sub(r'\s+', ' ', text).strip()
+        # Remove all non-alphanumeric characters except spaces and collaps
+        # multiple spaces into one
+        return b' '.join(data.translate(_SPACES, _DELETE).split()).decode('ascii')
 
-        return text
\ No newline at end of file
+    def clean_batch(self, texts: Iterable[Optional[str]]) -> List[str]:
+        """
+        Clean a list of texts; same output as `clean_text` on each one.
+        """
+        clean = self.clean_text
+        return [clean(text) for text in texts]
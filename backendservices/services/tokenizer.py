@@ -0,0 +1,85 @@
+import logging
+import os
+from typing import List, Optional, Sequence
+
+TOKENIZER_FILE = "tokenizer.json"
+
+logger = logging.getLogger(__name__)
+
+class FastTokenizer:
+    """
+    Tokenizer loaded from a `tokenizer.json` with the `tokenizers` runtime,
+    without importing transformers. Output matches the fast HF tokenizer
+    saved by `export_module` (special tokens, truncation, no padding).
+    """
+    def __init__(self, path: str, max_length: int):
+        from tokenizers import Tokenizer
+
+        self.path = path
+        self.tokenizer = Tokenizer.from_file(path)
+        # El padding lo hace run_batch; tokenizer.json puede traer uno configurado
+        padding = self.tokenizer.padding
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length=max_length)
+
+        if padding:
+            self.pad_token_id = padding["pad_id"]
+        else:
+            pad_id = next(
+                (self.tokenizer.token_to_id(t) for t in ("[PAD]", "<pad>") if self.tokenizer.token_to_id(t) is not None),
+                None,
+            )
+            self.pad_token_id = pad_id or 0
+
+    def encode(self, texts: Sequence[str]) -> List[List[int]]:
+        return [encoding.ids for encoding in self.tokenizer.encode_batch(list(texts))]
+
+class HFTokenizer:
+    """
+    Fallback for tokenizers that only exist on the Hugging Face hub or
+    without a `tokenizer.json` (imports transformers).
+    """
+    def __init__(self, name_or_path: str, max_length: int):
+        from transformers import AutoTokenizer
+
+        self.path = name_or_path
+        self.tokenizer = AutoTokenizer.from_pretrained(name_or_path)
+        self.max_length = max_length
+        self.pad_token_id = self.tokenizer.pad_token_id or 0
+
+    def encode(self, texts: Sequence[str]) -> List[List[int]]:
+        encoded = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)
+        return encoded["input_ids"]
+
+def find_tokenizer_file(*candidates: Optional[str]) -> Optional[str]:
+    """
+    First `tokenizer.json` among the candidates (files or directories that contain one).
+    """
+    for candidate in candidates:
+        if not candidate:
+            continue
+        if os.path.isfile(candidate) and candidate.endswith(".json"):
+            return candidate
+        path = os.path.join(candidate, TOKENIZER_FILE)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def load_tokenizer(tokenizer_path: Optional[str], model_dir: Optional[str], default: str, max_length: int):
+    """
+    Prefer a local `tokenizer.json` (explicit path, then next to the model);
+    otherwise load `tokenizer_path` or `default` through transformers.
+
+    :param tokenizer_path: TOKENIZER_PATH (tokenizer.json, directory or hub name)
+    :param model_dir: Folder of the ONNX model
+    :param default: Hub name used when nothing local is found
+    :param max_length: Truncation length
+    :return: FastTokenizer or HFTokenizer
+    """
+    path = find_tokenizer_file(tokenizer_path, model_dir)
+    if path:
+        return FastTokenizer(path, max_length)
+
+    name = tokenizer_path or default
+    logger.warning("No se encontró %s; se carga '%s' con transformers (arranque más lento).", TOKENIZER_FILE, name)
+    return HFTokenizer(name, max_length)
@@ -0,0 +1,78 @@
+import importlib.util
+import os
+import tempfile
+import zlib
+
+import numpy as np
+
+from app.services.cascade import CascadeClassifier, FEATURES_VERSION, N_FEATURES, hashed_features
+from app.services.batch_scheduler import classify_by_length
+
+_MODELTEST_FEATURES = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "..", "..", "modeltest", "src", "cascade_features.py"
+)
+
+class _FakeTransformer:
+    fixed_batch = None
+    fingerprint = "fake"
+    label_map = {0: "No observacion", 1: "observacion"}
+
+    def __init__(self):
+        self.seen = []
+
+    def encode(self, texts):
+        self.seen.extend(texts)
+        return [[0] * len(t.split()) for t in texts]
+
+    def run_batch(self, sequences):
+        return [len(seq) for seq in sequences]
+
+    def labels_from_logits(self, logits):
+        return ["observacion" if n > 3 else "No observacion" for n in logits]
+
+    def predict_batch(self, texts, batch_size=32):
+        return self.labels_from_logits(self.run_batch(self.encode(texts)))
+
+def _save_model(path, token_weights, bias):
+    weights = np.zeros(N_FEATURES, dtype=np.float32)
+    for token, weight in token_weights.items():
+        weights[zlib.crc32(token.encode("utf-8")) % N_FEATURES] = weight
+    np.savez(path, weights=weights, bias=np.float32(bias), n_features=np.int64(N_FEATURES),
+             version=np.int64(FEATURES_VERSION))
+
+def test_cascada_decide_solo_los_faciles():
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "cascade.npz")
+        _save_model(model_path, {"pagina": -40.0, "corregir": 40.0}, bias=0.0)
+        transformer = _FakeTransformer()
+        cascade = CascadeClassifier(transformer, model_path, low=0.05, high=0.99)
+
+        texts = ["pagina 3 de 10", "se debe corregir el plano", "revisar la cota del eje", "pagina 3 de 10"]
+        labels = classify_by_length(cascade, texts, max_tokens=64)
+
+        assert labels == ["No observacion", "observacion", "observacion", "No observacion"]
+        # Sólo el párrafo incierto llega al transformer
+        assert transformer.seen == ["revisar la cota del eje"]
+        assert cascade.stats()["decididos"] == 2 and cascade.stats()["al_transformer"] == 1
+        assert cascade.predict_batch(texts) == labels
+        assert cascade.fingerprint.startswith("fake|cascade:")
+    print("✅ Test cascada pasó correctamente")
+
+def test_featurizer_igual_al_de_entrenamiento():
+    if not os.path.exists(_MODELTEST_FEATURES):
+        print(f"⚠️ No se encontró {_MODELTEST_FEATURES}; se omite la comparación.")
+        return
+    spec = importlib.util.spec_from_file_location("cascade_features", _MODELTEST_FEATURES)
+    training = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(training)
+
+    assert training.N_FEATURES == N_FEATURES and training.FEATURES_VERSION == FEATURES_VERSION
+    for text in ["", "Se debe CORREGIR la señalización del eje 12.", "tabla 1 2 3 4", "página  3 de 10"]:
+        idx_a, val_a = hashed_features(text)
+        idx_b, val_b = training.hashed_features(text)
+        assert np.array_equal(idx_a, idx_b) and np.array_equal(val_a, val_b)
+    print("✅ Test featurizer sincronizado pasó correctamente")
+
+if __name__ == "__main__":
+    test_cascada_decide_solo_los_faciles()
+    test_featurizer_igual_al_de_entrenamiento()
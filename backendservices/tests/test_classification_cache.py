@@ -0,0 +1,73 @@
+import os
+import tempfile
+from app.services.classification_cache import ClassificationMemo
+from app.services.batch_scheduler import classify_by_length
+
+class _CountingClassifier:
+    fixed_batch = None
+
+    def __init__(self, memo=None):
+        self.memo = memo
+        self.seen = []
+
+    def encode(self, texts):
+        self.seen.extend(texts)
+        return [[0] * len(t.split()) for t in texts]
+
+    def run_batch(self, sequences):
+        return [len(seq) for seq in sequences]
+
+    def labels_from_logits(self, logits):
+        return ["observacion" if n > 2 else "No observacion" for n in logits]
+
+def test_parrafos_repetidos_se_clasifican_una_vez():
+    classifier = _CountingClassifier()
+    texts = ["aviso legal estandar", "x", "aviso legal estandar", "x"]
+    labels = classify_by_length(classifier, texts)
+    assert labels == ["observacion", "No observacion", "observacion", "No observacion"]
+    assert sorted(classifier.seen) == ["aviso legal estandar", "x"]
+
+def test_memo_en_disco_compartido_y_por_modelo():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "memo.db")
+
+        first = _CountingClassifier(ClassificationMemo("modelo-a", db_path=db))
+        classify_by_length(first, ["encabezado repetido del contratista"])
+
+        # Otro worker con el mismo modelo reutiliza la etiqueta desde SQLite
+        second = _CountingClassifier(ClassificationMemo("modelo-a", db_path=db))
+        assert classify_by_length(second, ["encabezado repetido del contratista"]) == ["observacion"]
+        assert second.seen == []
+        assert second.memo.stats()["hits"] == 1
+
+        # Un modelo nuevo no ve las etiquetas del anterior
+        third = _CountingClassifier(ClassificationMemo("modelo-b", db_path=db))
+        classify_by_length(third, ["encabezado repetido del contratista"])
+        assert third.seen == ["encabezado repetido del contratista"]
+
+        # Abrir la base con otro modelo no borra las etiquetas del primero (despliegue gradual)
+        again = _CountingClassifier(ClassificationMemo("modelo-a", db_path=db))
+        assert classify_by_length(again, ["encabezado repetido del contratista"]) == ["observacion"]
+        assert again.seen == []
+
+def test_memo_en_disco_acotado_por_uso():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "memo.db")
+        memo = ClassificationMemo("modelo-a", max_entries=1, db_path=db, db_max_entries=3)
+        memo.put_many({"a": "x"})
+        ClassificationMemo("modelo-b", db_path=db, db_max_entries=3).put_many({"b": "y"})
+        memo.put_many({"e": "v"})
+        # "a" se vuelve a usar desde disco (el LRU del proceso sólo guarda "e")
+        assert memo.get_many(["a"]) == {"a": "x"}
+        memo.put_many({"c": "z"})
+
+        # Sale la entrada usada hace más tiempo, sin importar el modelo
+        assert ClassificationMemo("modelo-a", db_path=db).get_many(["a", "c", "e"]) == {"a": "x", "c": "z", "e": "v"}
+        assert ClassificationMemo("modelo-b", db_path=db).get_many(["b"]) == {}
+
+if __name__ == "__main__":
+    test_parrafos_repetidos_se_clasifican_una_vez()
+    test_memo_en_disco_compartido_y_por_modelo()
+    test_memo_lru_acotado()
+    test_memo_en_disco_acotado_por_uso()
+    print("✅ Todos los tests pasaron correctamente.")
@@ -0,0 +1,113 @@
+import os
+import sys
+import tempfile
+import types
+from unittest import mock
+
+import numpy as np
+
+from app.services.classifier import TextClassifier
+
+class _StaticSession:
+    """
+    Sesión falsa con ejes estáticos [batch, width]: falla como onnxruntime si la forma no coincide.
+    """
+    def __init__(self, batch, width):
+        self.batch = batch
+        self.width = width
+        self.shapes = []
+
+    def run(self, outputs, feed):
+        shape = feed["input_ids"].shape
+        self.shapes.append(shape)
+        if shape != (self.batch, self.width):
+            raise ValueError(f"Got invalid dimensions for input: input_ids {shape}")
+        # Logit de "observacion" alto cuando la secuencia tiene más de 3 tokens
+        lengths = feed["attention_mask"].sum(axis=1)
+        return [np.stack([np.zeros(len(lengths)), np.where(lengths > 3, 5.0, -5.0)], axis=1)]
+
+class _WordTokenizer:
+    pad_token_id = 0
+
+    def encode(self, texts):
+        return [[1] * len(t.split()) for t in texts]
+
+def static_classifier(batch=4, width=16):
+    """
+    TextClassifier sin onnxruntime para un modelo exportado con ejes estáticos.
+    """
+    classifier = TextClassifier.__new__(TextClassifier)
+    classifier.session = _StaticSession(batch, width)
+    classifier.tokenizer = _WordTokenizer()
+    classifier.pad_token_id = 0
+    classifier.input_names = {"input_ids", "attention_mask"}
+    classifier.output_name = "logits"
+    classifier.fixed_batch = batch
+    classifier.fixed_width = width
+    classifier.threshold = 0.85
+    classifier.max_length = width
+    classifier.label_map = {0: "No observacion", 1: "observacion"}
+    return classifier
+
+def test_lote_estatico_se_rellena_hasta_su_tamano():
+    classifier = static_classifier(batch=4)
+    texts = ["a b c d e", "a", "a b c d", "a b", "a b c d e f"]
+
+    # 5 textos con lotes de 4: el último lleva 3 filas de relleno
+    assert classifier.predict_batch(texts) == ["observacion", "No observacion", "observacion", "No observacion", "observacion"]
+    assert classifier.session.shapes == [(4, 16), (4, 16)]
+
+    # El calentamiento también respeta el eje estático
+    classifier.warm_up(batches=2, batch_size=3)
+    assert set(classifier.session.shapes) == {(4, 16)}
+    print("✅ Test modelo con eje de lote estático pasó correctamente")
+
+def _fake_ort(loads):
+    """
+    onnxruntime mínimo: la sesión escribe `optimized_model_filepath` como lo hace ORT.
+    """
+    ort = types.ModuleType("onnxruntime")
+    ort.__version__ = "1.99.0"
+    ort.GraphOptimizationLevel = types.SimpleNamespace(
+        ORT_DISABLE_ALL=0, ORT_ENABLE_BASIC=1, ORT_ENABLE_EXTENDED=2, ORT_ENABLE_ALL=99
+    )
+
+    class SessionOptions:
+        optimized_model_filepath = ""
+
+    def InferenceSession(path, sess_options, providers):
+        loads.append((os.path.basename(path), sess_options.graph_optimization_level))
+        if sess_options.optimized_model_filepath:
+            with open(sess_options.optimized_model_filepath, "wb") as f:
+                f.write(b"grafo optimizado")
+        return object()
+
+    ort.SessionOptions = SessionOptions
+    ort.InferenceSession = InferenceSession
+    return ort
+
+def test_cache_de_modelo_optimizado_se_escribe_atomicamente():
+    with tempfile.TemporaryDirectory() as tmp:
+        model = os.path.join(tmp, "model.onnx")
+        with open(model, "wb") as f:
+            f.write(b"modelo")
+        cache = os.path.join(tmp, "optimized")
+        classifier = TextClassifier.__new__(TextClassifier)
+        classifier.model_path = model
+
+        loads = []
+        with mock.patch.dict(sys.modules, {"onnxruntime": _fake_ort(loads)}):
+            classifier._create_session("all", 0, 0, True, True, cache)
+            # Se guarda a nivel "extended" con un nombre temporal, y la sesión usa "all"
+            saved = os.listdir(cache)
+            assert len(saved) == 1 and ".extended.ort1.99.0." in saved[0] and ".tmp" not in saved[0]
+            assert loads == [("model.onnx", 2), (saved[0], 99)]
+
+            loads.clear()
+            classifier._create_session("all", 0, 0, True, True, cache)
+            assert loads == [(saved[0], 99)], "❌ Debe reutilizarse el grafo guardado"
+    print("✅ Test caché de modelo optimizado pasó correctamente")
+
+if __name__ == "__main__":
+    test_lote_estatico_se_rellena_hasta_su_tamano()
+    test_cache_de_modelo_optimizado_se_escribe_atomicamente()
@@ -1,5 +1,5 @@
 import os
-from app.services.especialidad_extractor import extraer_especialidades
+from app.services.especialidad_extractor import extraer_especialidades, especialidades_en_pagina
 
 PDF_PATH = "docs/ejemplo.pdf"
 
@@ -17,5 +17,28 @@ def test_extraer_especialidades():
         for esp in especialidades:
             print(f"📘 Página {esp['pagina']} → {esp['especialidad_raw']} → {esp['especialidad_std']} → {esp['sublabel_std']}")
 
+def test_especialidades_en_pagina():
+    texto = (
+        "INDICE\n"
+        "1.2 ESPECIALIDAD E (Eléctrica) ....... 15\n"
+        "  Comentarios de la especialidad de Señalización Horizontal, es necesario revisar\n"
+        "ESPECIALIDADES VARIAS\n"
+        "ESPECIALIDAD\n"
+        "especialidad BIM  \r\n"
+        "ESPECIALIDAD BIM\n"
+    )
+    ocurrencias = []
+    agregadas = especialidades_en_pagina(4, texto, ocurrencias)
+
+    assert agregadas == ocurrencias
+    assert [(o["especialidad_std"], o["sublabel_std"]) for o in ocurrencias] == [
+        ("ELECTRICA", "ELECTRICA"),
+        ("SENALIZACION HORIZONTAL", None),
+        ("BIM", None),
+    ]
+    assert ocurrencias[1]["especialidad_raw"] == "de Señalización Horizontal, es necesario revisar"
+    print("✅ Test especialidades_en_pagina pasó correctamente")
+
 if __name__ == "__main__":
-    test_extraer_especialidades()
\ No newline at end of file
+    test_extraer_especialidades()
+    test_especialidades_en_pagina()
\ No newline at end of file
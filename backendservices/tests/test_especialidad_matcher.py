@@ -1,4 +1,4 @@
-from app.services.especialidad_matcher import asignar_especialidad
+from app.services.especialidad_matcher import SpecialtyIndex, asignar_especialidad, asignar_especialidad_ext
 
 def test_asignar_especialidad():
     especialidades = [
@@ -23,5 +23,26 @@ def test_asignar_especialidad():
         assert resultado == esperado, f"❌ Error en página {pagina}: esperado {esperado}, obtenido {resultado}"
     print("✅ Todos los tests pasaron correctamente.")
 
+def test_specialty_index_vectorizado():
+    especialidades = [
+        {"especialidad_std": "BIM", "pagina": 12},
+        {"especialidad_std": "ELECTRICA", "sublabel_std": "LADO AIRE", "pagina": 3},
+        {"especialidad_std": "ELECTRICA", "sublabel_std": "LADO AIRE", "pagina": 3},
+        {"especialidad_std": None, "pagina": 5},
+    ]
+    index = SpecialtyIndex(especialidades)
+    paginas = [1, 3, 5, 11, 12, 40]
+
+    assert len(index) == 2
+    assert index.assign(paginas) == ["DESCONOCIDA", "ELECTRICA", "ELECTRICA", "ELECTRICA", "BIM", "BIM"]
+    assert index.assign_ext(paginas)[1] == {"principal": "ELECTRICA", "sublabel": "LADO AIRE"}
+    # Los wrappers devuelven lo mismo con la lista o con el índice ya construido
+    for pagina in paginas:
+        assert asignar_especialidad(pagina, especialidades) == asignar_especialidad(pagina, index)
+        assert asignar_especialidad_ext(pagina, especialidades) == asignar_especialidad_ext(pagina, index)
+    assert SpecialtyIndex([]).assign(paginas) == ["DESCONOCIDA"] * len(paginas)
+    print("✅ Test SpecialtyIndex pasó correctamente")
+
 if __name__ == "__main__":
-    test_asignar_especialidad()
\ No newline at end of file
+    test_asignar_especialidad()
+    test_specialty_index_vectorizado()
\ No newline at end of file
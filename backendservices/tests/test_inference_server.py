@@ -0,0 +1,98 @@
+import os
+import stat
+import tempfile
+import threading
+from multiprocessing.connection import AuthenticationError
+
+from app.services.batch_scheduler import classify_by_length
+from app.services.inference_client import RemoteTextClassifier
+from app.services.inference_server import InferenceServer
+
+class _FakeClassifier:
+    fixed_batch = None
+    fingerprint = "fake"
+    threshold = 0.85
+    max_length = 128
+    label_map = {0: "No observacion", 1: "observacion"}
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        return [[0] * len(t.split()) for t in texts]
+
+    def run_batch(self, sequences):
+        return [len(seq) for seq in sequences]
+
+    def labels_from_logits(self, logits):
+        return ["observacion" if n > 3 else "No observacion" for n in logits]
+
+def test_servidor_agrupa_solicitudes_de_varios_workers():
+    folder = tempfile.mkdtemp()
+    address = os.path.join(folder, "inference.sock")
+    fake = _FakeClassifier()
+    # Latencia amplia para que las solicitudes concurrentes caigan en el mismo micro-lote
+    server = InferenceServer(fake, address, authkey=b"secreto", max_batch_texts=1000, max_latency_ms=200)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    assert server.wait_ready(5)
+
+    try:
+        remote = RemoteTextClassifier(address, authkey=b"secreto", connect_timeout=5)
+        assert remote.fingerprint == "fake" and remote.label_map == fake.label_map
+
+        textos = [f"parrafo {i} " + "palabra " * (i % 6) for i in range(8)]
+        esperado = [fake.labels_from_logits([len(t.split())])[0] for t in textos]
+        resultados = [None] * 4
+
+        def worker(n):
+            resultados[n] = classify_by_length(remote, textos)
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join(10)
+
+        assert all(r == esperado for r in resultados)
+        assert server.requests == 4
+        assert server.batches < 4
+        assert remote.predict("uno dos tres cuatro cinco") == "observacion"
+    finally:
+        server.close()
+        thread.join(5)
+
+    assert not thread.is_alive()
+    print("✅ Test servidor de inferencia pasó correctamente")
+
+def test_sin_authkey_el_servidor_genera_una_clave_privada():
+    folder = tempfile.mkdtemp()
+    address = os.path.join(folder, "inference.sock")
+    server = InferenceServer(_FakeClassifier(), address)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    assert server.wait_ready(5)
+
+    try:
+        # Socket y clave sólo accesibles para el usuario del servidor
+        assert stat.S_IMODE(os.stat(address).st_mode) == 0o600
+        assert stat.S_IMODE(os.stat(address + ".key").st_mode) == 0o600
+
+        # El worker sin INFERENCE_AUTHKEY usa la clave generada
+        assert RemoteTextClassifier(address, connect_timeout=5).predict("uno dos tres cuatro cinco") == "observacion"
+
+        # Una clave incorrecta no llega a enviar mensajes
+        try:
+            RemoteTextClassifier(address, authkey=b"otra", connect_timeout=5)
+            raise AssertionError("❌ Debe rechazarse una clave incorrecta")
+        except AuthenticationError:
+            pass
+    finally:
+        server.close()
+        thread.join(5)
+    print("✅ Test clave del servidor de inferencia pasó correctamente")
+
+if __name__ == "__main__":
+    test_servidor_agrupa_solicitudes_de_varios_workers()
+    test_sin_authkey_el_servidor_genera_una_clave_privada()
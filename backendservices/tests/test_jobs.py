@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import closing
+from app.services.job_store import JobStore, EN_COLA, PROCESANDO, COMPLETADO, ERROR
+from app.services.job_queue import JobQueue
+
+def _wait(store, job_id, timeout=5.0):
+    limit = time.time() + timeout
+    while time.time() < limit:
+        job = store.get(job_id)
+        if job["estado"] in (COMPLETADO, ERROR):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"❌ El trabajo {job_id} no terminó")
+
+def test_job_queue_procesa_y_reporta_progreso():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(os.path.join(tmp, "jobs.db"))
+
+        def handler(job, progress):
+            progress("extraccion", 3, 3)
+            return {"resultados": [], "pdf": job["payload"]["pdf_path"]}
+
+        queue = JobQueue(store, handler, workers=1, max_pending=1)
+        store.create("a", {"pdf_path": "a.pdf"})
+        assert queue.submit("a")
+
+        job = _wait(store, "a")
+        queue.shutdown()
+        assert job["estado"] == COMPLETADO
+        assert job["resultado"] == {"resultados": [], "pdf": "a.pdf"}
+        assert (job["etapa"], job["hecho"], job["total"]) == ("extraccion", 3, 3)
+
+def test_job_queue_registra_errores():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(os.path.join(tmp, "jobs.db"))
+
+        def handler(job, progress):
+            raise ValueError("PDF corrupto")
+
+        queue = JobQueue(store, handler, workers=1)
+        store.create("b", {})
+        queue.submit("b")
+        job = _wait(store, "b")
+        queue.shutdown()
+        assert job["estado"] == ERROR and job["error"] == "PDF corrupto"
+
+def test_requeue_stale_reanuda_trabajos_interrumpidos():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(os.path.join(tmp, "jobs.db"))
+        store.create("c", {})
+        assert store.claim("c")
+        assert not store.claim("c"), "❌ Un trabajo no debe tomarse dos veces"
+        assert store.get("c")["estado"] == PROCESANDO
+
+        # Su worker (este proceso) sigue vivo: aunque no reporte progreso, no se re-encola
+        assert store.requeue_stale(stale_seconds=3600) == []
+        assert store.get("c")["estado"] == PROCESANDO
+
+        def set_owner(**fields):
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            with closing(sqlite3.connect(store.db_path)) as conn, conn:
+                conn.execute(f"UPDATE jobs SET {assignments} WHERE id = 'c'", tuple(fields.values()))
+
+        # Simula un worker que murió: el pid registrado ya no existe
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        set_owner(owner_pid=dead.pid)
+        assert store.requeue_stale(stale_seconds=3600) == ["c"]
+        assert store.get("c")["estado"] == EN_COLA
+        assert store.claim("c")
+
+        # Reinicio del contenedor: mismo equipo, arranque y pid, pero otro proceso
+        set_owner(owner_token="proceso-anterior")
+        assert store.requeue_stale(stale_seconds=3600) == ["c"]
+        assert store.claim("c")
+
+        # Otro arranque del equipo: el trabajo también se considera abandonado
+        set_owner(owner_boot="otro-arranque")
+        store.boot_id = store.boot_id or "arranque-actual"
+        assert store.requeue_stale(stale_seconds=3600) == ["c"]
+        assert store.claim("c")
+
+        # Cota: un dueño que parece vivo pero dejó de enviar latidos
+        set_owner(owner_pid=1, actualizado=time.time() - 120)
+        assert store.requeue_stale(stale_seconds=60) == ["c"]
+        assert store.claim("c")
+
+        # Los latidos del worker mantienen activo el trabajo
+        set_owner(actualizado=time.time() - 120)
+        store.heartbeat(["c"])
+        assert store.requeue_stale(stale_seconds=60) == []
+
+def test_resume_envia_todos_los_trabajos_aunque_la_cola_este_llena():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(os.path.join(tmp, "jobs.db"))
+        for job_id in ("d1", "d2", "d3"):
+            store.create(job_id, {})
+
+        queue = JobQueue(store, lambda job, progress: {"id": job["id"]}, workers=1, max_pending=0)
+        assert queue.resume(stale_seconds=3600) == 3
+        jobs = [_wait(store, job_id) for job_id in ("d1", "d2", "d3")]
+        queue.shutdown()
+        assert [job["estado"] for job in jobs] == [COMPLETADO] * 3
+
+if __name__ == "__main__":
+    test_job_queue_procesa_y_reporta_progreso()
+    test_job_queue_registra_errores()
+    test_requeue_stale_reanuda_trabajos_interrumpidos()
+    test_resume_envia_todos_los_trabajos_aunque_la_cola_este_llena()
+    print("✅ Todos los tests pasaron correctamente.")
@@ -0,0 +1,39 @@
+from app.core import metrics
+from app.core.metrics import Counter, Histogram, StageClock
+
+def test_histograma_formato_prometheus():
+    h = Histogram("demo_seconds", "Demo.", ["stage"], buckets=(0.1, 1.0))
+    h.observe(0.05, stage="cleaning")
+    h.observe(0.5, stage="cleaning")
+    h.observe(3.0, stage="cleaning")
+
+    lines = h.render()
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{stage="cleaning",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="cleaning",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{stage="cleaning",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{stage="cleaning"} 3' in lines
+    assert 'demo_seconds_sum{stage="cleaning"} 3.55' in lines
+
+    c = Counter("demo_total", "Demo.", ["kind"])
+    c.inc(2, kind='pa"ges')
+    assert 'demo_total{kind="pa\\"ges"} 2' in c.render()
+    print("✅ Test formato Prometheus pasó correctamente")
+
+def test_reloj_de_etapas_y_aciertos_de_cache():
+    clock = StageClock()
+    antes = metrics.STAGE_SECONDS.count(stage="test_extraction")
+    assert list(clock.timed("test_extraction", [1, 2, 3])) == [1, 2, 3]
+    with clock("test_extraction"):
+        pass
+    clock.record()
+    # Todo el tiempo intercalado queda en una sola observación
+    assert metrics.STAGE_SECONDS.count(stage="test_extraction") == antes + 1
+
+    metrics.cache_lookup("test_cache", hits=3, misses=1)
+    assert 'observeflow_cache_hit_ratio{cache="test_cache"} 0.75' in metrics.REGISTRY.render()
+    print("✅ Test reloj de etapas pasó correctamente")
+
+if __name__ == "__main__":
+    test_histograma_formato_prometheus()
+    test_reloj_de_etapas_y_aciertos_de_cache()
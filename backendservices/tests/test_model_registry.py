@@ -0,0 +1,64 @@
+import threading
+
+from app.services.model_registry import ModelRegistry
+
+class _FakeClassifier:
+    fingerprint = "fake"
+
+    def __init__(self):
+        self.memo = None
+        self.warmups = []
+
+    def warm_up(self, batches=3, batch_size=8):
+        self.warmups.append((batches, batch_size))
+        return 0.0
+
+def test_carga_diferida_y_calentamiento():
+    creados = []
+
+    def factory():
+        creados.append(_FakeClassifier())
+        return creados[-1]
+
+    models = ModelRegistry(factory)
+    models.start({'MODEL_WARMUP': "lazy", 'MODEL_WARMUP_BATCHES': 2, 'CLASSIFIER_BATCH_SIZE': 4, 'MEMO_ENABLED': False})
+    assert not creados and not models.ready.is_set()
+
+    # Varias solicitudes simultáneas construyen el modelo una sola vez
+    hilos = [threading.Thread(target=models.get) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    assert len(creados) == 1
+    assert creados[0].warmups == [(2, 4)]
+    assert models.status()["ready"] and models.status()["error"] is None
+    print("✅ Test carga diferida pasó correctamente")
+
+def test_error_de_carga_queda_en_el_estado():
+    intentos = []
+
+    def factory():
+        intentos.append(1)
+        if len(intentos) == 1:
+            raise FileNotFoundError("ONNX model not found")
+        return _FakeClassifier()
+
+    models = ModelRegistry(factory)
+    models.start({'MODEL_WARMUP': "lazy", 'MODEL_WARMUP_BATCHES': 0, 'MEMO_ENABLED': False})
+    try:
+        models.get()
+        assert False, "debió fallar"
+    except FileNotFoundError:
+        pass
+    assert not models.status()["ready"] and "ONNX" in models.status()["error"]
+
+    # La siguiente solicitud reintenta
+    assert models.get().warmups == []
+    assert models.status()["ready"] and models.status()["error"] is None
+    print("✅ Test error de carga pasó correctamente")
+
+if __name__ == "__main__":
+    test_carga_diferida_y_calentamiento()
+    test_error_de_carga_queda_en_el_estado()
@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+from app.services.near_duplicate import NearDuplicateIndex, lsh_params, NUM_PERM
+
+OBS = "Se debe corregir la cota del eje 12 en el plano de planta general del edificio terminal."
+
+def test_detecta_casi_duplicados():
+    index = NearDuplicateIndex(None, threshold=0.8)
+    index.add(OBS)
+
+    # Re-puntuada / con acentos y espacios distintos
+    assert index.contains("se debe corregir la cota del eje 12, en el plano de planta general del edificio terminal")
+    assert index.contains("Se debe  corregir la cota del eje 12 en el plano de planta general del edificio términal")
+    # Otra observación
+    assert not index.contains("Falta la memoria de cálculo de la estructura metálica de la cubierta.")
+    assert not index.contains("")
+
+    bands, rows = lsh_params(0.8)
+    assert bands * rows == NUM_PERM and (1 / bands) ** (1 / rows) <= 0.8
+    print("✅ Test casi duplicados pasó correctamente")
+
+def test_persistencia_por_contenido_del_libro():
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, ".obs_index")
+        excel = os.path.join(tmp, "ELECTRICA.xlsx")
+        with open(excel, "wb") as f:
+            f.write(b"libro v1")
+
+        assert NearDuplicateIndex.load(folder, excel, 0.8) is None
+        NearDuplicateIndex.build(folder, excel, [OBS], 0.8).save(excel)
+
+        # El umbral no forma parte del índice guardado
+        loaded = NearDuplicateIndex.load(folder, excel, 0.9)
+        assert loaded is not None and len(loaded) == 1
+        assert loaded.contains(OBS.upper())
+
+        with open(excel, "wb") as f:
+            f.write(b"libro editado a mano")
+        assert NearDuplicateIndex.load(folder, excel, 0.8) is None
+    print("✅ Test persistencia del índice de casi duplicados pasó correctamente")
+
+if __name__ == "__main__":
+    test_detecta_casi_duplicados()
+    test_persistencia_por_contenido_del_libro()
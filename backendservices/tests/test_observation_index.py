@@ -0,0 +1,63 @@
+import os
+import tempfile
+from unittest import mock
+
+import openpyxl
+
+from app.benchmarks.synthetic_report import generate_matrix
+from app.services.observation_checker import excel_observation_cheker
+from app.services.observation_index import ObservationIndex
+
+def _write(path, content: bytes):
+    with open(path, "wb") as f:
+        f.write(content)
+
+def test_indice_valido_solo_para_el_mismo_contenido():
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, ".obs_index")
+        excel = os.path.join(tmp, "ELECTRICA.xlsx")
+        _write(excel, b"libro v1")
+
+        assert ObservationIndex.load(folder, excel) is None
+
+        index = ObservationIndex.build(folder, excel, {"obs existente"}, next_row=20)
+        index.save(excel)
+
+        # Simula que el servicio agrega una fila y guarda el libro
+        loaded = ObservationIndex.load(folder, excel)
+        assert loaded is not None and loaded.next_row == 20
+        assert loaded.contains("obs existente") and not loaded.contains("obs nueva")
+
+        loaded.add("obs nueva")
+        loaded.next_row = 21
+        _write(excel, b"libro v2")
+        loaded.save(excel)
+
+        reloaded = ObservationIndex.load(folder, excel)
+        assert reloaded.contains("obs nueva") and reloaded.next_row == 21
+        assert len(os.listdir(folder)) == 1, "❌ El índice de la versión anterior debe eliminarse"
+
+        # Editado fuera del servicio: no hay índice para ese contenido
+        _write(excel, b"libro editado a mano")
+        assert ObservationIndex.load(folder, excel) is None
+
+def test_con_indice_valido_no_se_abre_el_libro_si_no_hay_textos_nuevos():
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, ".obs_index")
+        excel = os.path.join(tmp, "ELECTRICA_matriz.xlsx")
+        _write(excel, generate_matrix(rows=50, include=["Obs existente."]))
+
+        # Primera pasada: construye el índice y agrega la fila nueva
+        assert excel_observation_cheker(excel, ["Obs existente.", "Obs nueva."], index_folder=folder) == {"Obs nueva."}
+
+        with mock.patch.object(openpyxl, "load_workbook", wraps=openpyxl.load_workbook) as load:
+            assert excel_observation_cheker(excel, ["Obs existente.", " Obs nueva. "], index_folder=folder) == set()
+            assert load.call_count == 0, "❌ Sin textos nuevos no debe cargarse el libro"
+
+            assert excel_observation_cheker(excel, ["Otra obs."], index_folder=folder) == {"Otra obs."}
+            assert load.call_count == 1
+
+if __name__ == "__main__":
+    test_indice_valido_solo_para_el_mismo_contenido()
+    test_con_indice_valido_no_se_abre_el_libro_si_no_hay_textos_nuevos()
+    print("✅ Todos los tests pasaron correctamente.")
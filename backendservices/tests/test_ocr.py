@@ -0,0 +1,90 @@
+import os
+import tempfile
+from unittest import mock
+
+from app.benchmarks.synthetic_report import write_pdf
+from app.services.ocr import OcrFallback, adaptive_dpi
+from app.services.page_text import PageTextProvider
+from app.services.pipeline import cached_classify_report
+from app.services.result_cache import ResultCache
+from app.services.text_cleaner import TextCleaner
+
+class _FakeEngine:
+    cache_id = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, image):
+        self.calls += 1
+        return f"Se debe corregir el plano escaneado de {image.size[0]}x{image.size[1]} px."
+
+class _Classifier:
+    fingerprint = "modelo-a"
+
+    def encode(self, texts):
+        return [[0] * len(t.split()) for t in texts]
+
+    def classify_texts(self, texts, **kwargs):
+        return ["observacion" if t.lower().startswith("se ") else "No observacion" for t in texts]
+
+def _pdf(folder):
+    # Páginas 1 y 3 "escaneadas" (casi sin texto nativo); la 2 con texto suficiente
+    path = os.path.join(folder, "reporte.pdf")
+    with open(path, "wb") as f:
+        f.write(write_pdf([["Anexo 1"], ["Texto nativo de la página con observaciones suficientes para no pasar por OCR."], []]))
+    return path
+
+def test_resolucion_adaptativa():
+    assert adaptive_dpi(612, 792) == 300            # carta
+    assert adaptive_dpi(2384, 3370) == 150          # A0: acotado por el mínimo
+    assert adaptive_dpi(298, 420) == 400            # A6: acotado por el máximo
+    print("✅ Test resolución adaptativa pasó correctamente")
+
+def test_ocr_solo_en_paginas_con_poco_texto_y_con_cache():
+    folder = tempfile.mkdtemp()
+    pdf = _pdf(folder)
+    cache = os.path.join(folder, "ocr")
+
+    engine = _FakeEngine()
+    texts = PageTextProvider(pdf, ocr=OcrFallback(engine, cache_folder=cache, workers=1))._load()
+    assert engine.calls == 2
+    # Carta a 300 dpi
+    assert texts[0] == texts[2] and texts[0].startswith("Se debe corregir el plano escaneado de 2550x")
+    assert texts[1].startswith("Texto nativo")
+
+    # Re-subida: el texto sale de la caché por hash de imagen, sin llamar al motor
+    engine = _FakeEngine()
+    assert PageTextProvider(pdf, ocr=OcrFallback(engine, cache_folder=cache, workers=1))._load() == texts
+    assert engine.calls == 0
+
+    # En el pool de procesos el resultado es el mismo
+    assert PageTextProvider(pdf, ocr=OcrFallback(_FakeEngine(), workers=2))._load() == texts
+    print("✅ Test OCR de respaldo pasó correctamente")
+
+def test_habilitar_ocr_invalida_la_cache_de_resultados():
+    folder = tempfile.mkdtemp()
+    pdf = _pdf(folder)
+    cache = ResultCache(os.path.join(folder, "resultados"))
+    config = {
+        "EXTRACTION_WORKERS": 1, "EXTRACTION_MIN_PAGES_PER_CHUNK": 25,
+        "CLASSIFIER_BATCH_SIZE": 32, "CLASSIFIER_MAX_TOKENS_PER_BATCH": 8192,
+        "OCR_ENABLED": False, "OCR_WORKERS": 1,
+    }
+
+    # Reporte escaneado procesado (y guardado en la caché) sin OCR
+    results, _ = cached_classify_report(pdf, TextCleaner(), _Classifier(), config, result_cache=cache)
+    assert not any("plano escaneado" in p["texto"] for p in results)
+
+    # Con el OCR habilitado la entrada anterior no sirve: se extrae de nuevo
+    config["OCR_ENABLED"] = True
+    with mock.patch("app.services.ocr.make_engine", lambda config: _FakeEngine()):
+        results, _ = cached_classify_report(pdf, TextCleaner(), _Classifier(), config, result_cache=cache)
+    assert [p["etiqueta"] for p in results if "plano escaneado" in p["texto"]] == ["observacion", "observacion"]
+    assert cache.stats()["hits"] == 0
+    print("✅ Test caché de resultados con OCR pasó correctamente")
+
+if __name__ == "__main__":
+    test_resolucion_adaptativa()
+    test_ocr_solo_en_paginas_con_poco_texto_y_con_cache()
+    test_habilitar_ocr_invalida_la_cache_de_resultados()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+
+from app.benchmarks.synthetic_report import generate_report, write_pdf
+from app.services.page_store import PageStore
+from app.services.pipeline import classify_report
+from app.services.text_cleaner import TextCleaner
+
+_CONFIG = {
+    "EXTRACTION_WORKERS": 1, "EXTRACTION_MIN_PAGES_PER_CHUNK": 25,
+    "CLASSIFIER_BATCH_SIZE": 32, "CLASSIFIER_MAX_TOKENS_PER_BATCH": 8192,
+}
+
+class _CountingClassifier:
+    fingerprint = "modelo-a"
+
+    def __init__(self):
+        self.classified = 0
+
+    def encode(self, texts):
+        return [[0] * len(t.split()) for t in texts]
+
+    def classify_texts(self, texts, **kwargs):
+        self.classified += len(texts)
+        return ["observacion" if t.lower().startswith("se ") else "No observacion" for t in texts]
+
+def test_version_revisada_solo_recalcula_paginas_cambiadas():
+    store = PageStore(os.path.join(tempfile.mkdtemp(), "pages.db"))
+    report = generate_report(pages=5, pages_per_specialty=5, seed=2)
+    original = write_pdf(report["paginas"])
+    revisado = [list(lines) for lines in report["paginas"]]
+    revisado[2][-1] = revisado[2][-1][:-1] + " en la revisión."
+
+    classifier = _CountingClassifier()
+    stats = {}
+    first, _ = classify_report(original, TextCleaner(), classifier, _CONFIG, page_store=store, stats=stats)
+    assert stats == {"paginas_reutilizadas": 0, "paginas_recalculadas": 5}
+    assert classifier.classified == len(first)
+
+    classifier.classified = 0
+    stats = {}
+    results, especialidades = classify_report(write_pdf(revisado), TextCleaner(), classifier, _CONFIG, page_store=store, stats=stats)
+    assert stats == {"paginas_reutilizadas": 4, "paginas_recalculadas": 1}
+    assert classifier.classified == sum(1 for p in results if p["pagina"] == 3)
+    assert [p["etiqueta"] for p in results] == [p["etiqueta"] for p in first]
+    assert results[-1]["texto"] == first[-1]["texto"] and especialidades[0]["especialidad_std"] == "ESTRUCTURA"
+
+    # Otro modelo reutiliza el texto pero vuelve a clasificar
+    otro = _CountingClassifier()
+    otro.fingerprint = "modelo-b"
+    stats = {}
+    classify_report(original, TextCleaner(), otro, _CONFIG, page_store=store, stats=stats)
+    assert stats == {"paginas_reutilizadas": 0, "paginas_recalculadas": 5} and otro.classified == len(first)
+    print("✅ Test reprocesamiento incremental por página pasó correctamente")
+
+def test_tienda_elimina_paginas_menos_usadas():
+    store = PageStore(os.path.join(tempfile.mkdtemp(), "pages.db"), max_pages=2)
+    store.put_texts({"a": "uno"})
+    store.put_labels({"a": ["observacion"]}, "m")
+    store.put_texts({"b": "dos"})
+    assert store.get_texts(["a"]) == {"a": "uno"}
+    store.put_texts({"c": "tres"})
+    assert store.get_texts(["a", "b", "c"]) == {"a": "uno", "c": "tres"}
+    assert store.get_labels(["a"], "m") == {"a": ["observacion"]}
+    print("✅ Test límite de la tienda de páginas pasó correctamente")
+
+if __name__ == "__main__":
+    test_version_revisada_solo_recalcula_paginas_cambiadas()
+    test_tienda_elimina_paginas_menos_usadas()
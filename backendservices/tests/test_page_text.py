@@ -0,0 +1,17 @@
+from app.services.page_text import page_ranges
+
+def test_page_ranges_cubre_todas_las_paginas():
+    ranges = page_ranges(103, workers=4, min_pages_per_chunk=25)
+    assert len(ranges) == 4
+    assert ranges[0][0] == 0 and ranges[-1][1] == 103
+    for (_, stop), (start, _) in zip(ranges, ranges[1:]):
+        assert stop == start, f"❌ Rangos no contiguos: {ranges}"
+
+def test_page_ranges_pdf_pequeno_es_serial():
+    assert page_ranges(30, workers=8, min_pages_per_chunk=25) == [(0, 30)]
+    assert page_ranges(0, workers=8, min_pages_per_chunk=25) == []
+
+if __name__ == "__main__":
+    test_page_ranges_cubre_todas_las_paginas()
+    test_page_ranges_pdf_pequeno_es_serial()
+    print("✅ Todos los tests pasaron correctamente.")
@@ -0,0 +1,102 @@
+import os
+
+import app.services.pipeline as pipeline
+
+def _obs(texto, esp, excel):
+    return {"pagina": 1, "texto": texto, "etiqueta": "observacion", "especialidad": esp,
+            "excel_file": excel, "observacion_agregada": False}
+
+def test_update_matrices_concurrente_aisla_errores(monkeypatch, tmp_path):
+    def fake_checker(excel_path, textos, index_folder=None, output_path=None, near_duplicate_threshold=None):
+        if excel_path.endswith("corrupto.xlsx"):
+            raise ValueError("Worksheet Matriz Obs does not exist.")
+        with open(excel_path, "a") as f:
+            f.write(textos[0])
+        return {textos[0]}
+
+    monkeypatch.setattr(pipeline, "excel_observation_cheker", fake_checker)
+    electrica, corrupto, fads = (str(tmp_path / n) for n in ("electrica.xlsx", "corrupto.xlsx", "fads.xlsx"))
+    results = [
+        _obs("obs 1", "ELECTRICA", electrica),
+        _obs("obs 2", "ELECTRICA", electrica),
+        _obs("obs 3", "BIM", corrupto),
+        _obs("obs 4", "FADS", fads),
+    ]
+
+    errores, escritos = pipeline.update_matrices(results, workers=3)
+
+    assert set(errores) == {"BIM"}
+    assert escritos == {electrica: 5, fads: 5}
+    assert [p["observacion_agregada"] for p in results] == [True, False, False, True]
+    print("✅ Test update_matrices concurrente pasó correctamente")
+
+def test_write_matrices_exporta_solo_modificadas(monkeypatch, tmp_path):
+    def fake_checker(source, textos, index_folder=None, output_path=None, near_duplicate_threshold=None):
+        if b"sin cambios" in source:
+            return set()
+        with open(output_path, "wb") as f:
+            f.write(source + b"|" + textos[0].encode())
+        return {textos[0]}
+
+    monkeypatch.setattr(pipeline, "excel_observation_cheker", fake_checker)
+    excel_index = {
+        "ELECTRICA": pipeline.UploadedMatrix("ELECTRICA_matriz.xlsx", data=b"libro"),
+        "FADS": pipeline.UploadedMatrix("FADS_matriz.xlsx", data=b"sin cambios"),
+    }
+    results = [_obs("obs 1", "ELECTRICA", ""), _obs("obs 2", "FADS", "")]
+    pipeline.map_excel_files(results, excel_index)
+    config = {"OBS_INDEX_ENABLED": False, "EXCEL_WORKERS": 2}
+
+    errores, written = pipeline.write_matrices(results, excel_index, str(tmp_path), config)
+
+    exportados = os.listdir(tmp_path)
+    assert errores == {}
+    assert len(exportados) == 1 and exportados[0].startswith("ELECTRICA_")
+    assert (tmp_path / exportados[0]).read_bytes() == b"libro|obs 1"
+    assert written == len(b"libro|obs 1")
+
+    # Con EXPORT_UNCHANGED también se exporta la matriz sin cambios
+    errores, written = pipeline.write_matrices(results, excel_index, str(tmp_path), {**config, "EXPORT_UNCHANGED": True})
+    assert errores == {}
+    assert sum(n.startswith("FADS_") for n in os.listdir(tmp_path)) == 1
+    print("✅ Test write_matrices exporta sólo matrices modificadas pasó correctamente")
+
+class _ObservationClassifier:
+    # Observación = párrafo que empieza como las observaciones del generador sintético
+    def encode(self, texts):
+        return [[0] * len(t.split()) for t in texts]
+
+    def classify_texts(self, texts, **kwargs):
+        return ["observacion" if t.lower().startswith(("se ", "es ", "falta", "no se")) else "No observacion" for t in texts]
+
+def test_process_batch_escribe_cada_matriz_una_vez(monkeypatch, tmp_path):
+    from app.benchmarks.synthetic_report import generate_matrix, generate_report, write_pdf
+    from app.services.text_cleaner import TextCleaner
+
+    report = generate_report(pages=2, pages_per_specialty=2, seed=1)
+    pdf = write_pdf(report["paginas"])
+    matrix = tmp_path / "ESTRUCTURA_matriz.xlsx"
+    matrix.write_bytes(generate_matrix(20, seed=1))
+    (tmp_path / "export").mkdir()
+
+    calls = []
+    checker = pipeline.excel_observation_cheker
+    monkeypatch.setattr(pipeline, "excel_observation_cheker", lambda source, textos, *a: calls.append(len(textos)) or checker(source, textos, *a))
+    reports = [("a.pdf", pdf), ("roto.pdf", b"no es un pdf"), ("b.pdf", pdf)]
+    config = {
+        "BATCH_WORKERS": 2, "EXTRACTION_WORKERS": 1, "EXTRACTION_MIN_PAGES_PER_CHUNK": 25,
+        "CLASSIFIER_BATCH_SIZE": 32, "CLASSIFIER_MAX_TOKENS_PER_BATCH": 8192, "OBS_INDEX_ENABLED": False,
+    }
+
+    outcome = pipeline.process_batch(
+        reports, {"ESTRUCTURA": str(matrix)}, str(tmp_path / "export"), TextCleaner(), _ObservationClassifier(), config
+    )
+
+    a, roto, b = outcome["reportes"]
+    assert a["observaciones"] == b["observaciones"] > 0
+    # Un solo guardado de la matriz con las observaciones de todos los reportes; las repetidas se atribuyen al primero
+    assert calls == [a["observaciones"] + b["observaciones"]]
+    assert a["agregadas"] == a["observaciones"] and b["agregadas"] == 0
+    assert roto["error"] and roto["resultados"] == []
+    assert outcome["especialidades"]["ESTRUCTURA"]["agregadas"] == a["observaciones"]
+    assert len(os.listdir(tmp_path / "export")) == 1
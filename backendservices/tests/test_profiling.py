@@ -0,0 +1,64 @@
+import json
+import tempfile
+import time
+
+from app.core import metrics
+from app.core.profiling import RequestProfile, activate, current, requested_profile
+from app.services.batch_scheduler import classify_by_length
+
+class _FakeClassifier:
+    fixed_batch = None
+
+    def encode(self, texts):
+        return [[0] * len(t.split()) for t in texts]
+
+    def run_batch(self, sequences):
+        return [len(seq) for seq in sequences]
+
+    def labels_from_logits(self, logits):
+        return ["observacion" if n > 3 else "No observacion" for n in logits]
+
+class _FakeRequest:
+    def __init__(self, headers=None, args=None):
+        self.headers = headers or {}
+        self.args = args or {}
+
+def test_perfil_registra_etapas_lotes_y_muestras():
+    profile = RequestProfile(sample_interval=0.001, top=2)
+    with activate(profile):
+        assert current() is profile
+        with metrics.stage("classification"):
+            classify_by_length(_FakeClassifier(), [f"texto {'x ' * i}" for i in range(10)], max_tokens=16)
+        with metrics.stage("excel_check"):
+            time.sleep(0.02)
+        profile.add_page(1, 0.5, 0.4, 1200, 3)
+        profile.add_page(2, 2.0, 1.9, 90000, 15000)
+        profile.add_page(3, 0.1, 0.1, 10, 0)
+    assert current() is None
+
+    report = json.load(open(profile.save(tempfile.mkdtemp()), encoding="utf-8"))
+    assert set(report["etapas"]) == {"classification", "excel_check"}
+    assert report["etapas"]["excel_check"]["wall"] >= 0.02
+    assert report["etapas"]["excel_check"]["cpu"] < report["etapas"]["excel_check"]["wall"]
+    assert report["lotes_clasificador"]["total"] > 1
+    assert [p["pagina"] for p in report["paginas"]["mas_lentas"]] == [2, 1]
+    assert report["muestreo"]["muestras"] > 0
+    assert any("test_perfil_registra_etapas_lotes_y_muestras" in pila for pila in report["muestreo"]["pilas"])
+    print("✅ Test perfil de solicitud pasó correctamente")
+
+def test_perfilado_restringido_por_configuracion():
+    pedido = _FakeRequest(headers={"X-Profile": "1"})
+    assert requested_profile(pedido, {'PROFILING_ENABLED': False}) is None
+    assert requested_profile(pedido, {'PROFILING_ENABLED': True}) is not None
+    assert requested_profile(_FakeRequest(), {'PROFILING_ENABLED': True}) is None
+
+    # Con token, el valor del encabezado o del parámetro debe coincidir
+    config = {'PROFILING_ENABLED': True, 'PROFILING_TOKEN': "s3creto"}
+    assert requested_profile(pedido, config) is None
+    perfil = requested_profile(_FakeRequest(args={"profile": "s3creto", "profile_sample": "1"}), config)
+    assert perfil is not None and perfil.sample_interval == 0.005
+    print("✅ Test perfilado restringido pasó correctamente")
+
+if __name__ == "__main__":
+    test_perfil_registra_etapas_lotes_y_muestras()
+    test_perfilado_restringido_por_configuracion()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import time
+from app.services.result_cache import ResultCache
+
+def test_result_cache_hit_miss():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(tmp)
+        key = ResultCache.make_key("pdf-sha", "modelo:0.85")
+        assert key != ResultCache.make_key("pdf-sha", "modelo:0.9"), "❌ El umbral debe cambiar la clave"
+
+        assert cache.get(key) is None
+        payload = {"resultados": [{"pagina": 1, "texto": "x", "etiqueta": "observacion", "especialidad": "BIM"}],
+                   "especialidades": []}
+        cache.put(key, payload)
+        assert cache.get(key) == payload
+        assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0}
+
+def test_result_cache_evicta_lru():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(tmp, max_bytes=350)
+        blob = {"resultados": ["x" * 100], "especialidades": []}
+
+        cache.put("a", blob)
+        cache.put("b", blob)
+        # 'a' se usa después de 'b': la menos reciente pasa a ser 'b'
+        past = time.time() - 60
+        os.utime(os.path.join(tmp, "b.json"), (past, past))
+        os.utime(os.path.join(tmp, "a.json"), (past + 30, past + 30))
+        cache.put("c", blob)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+
+if __name__ == "__main__":
+    test_result_cache_hit_miss()
+    test_result_cache_evicta_lru()
+    print("✅ Todos los tests pasaron correctamente.")
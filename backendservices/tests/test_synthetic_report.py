@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+from app.benchmarks.bench_suite import check_regressions
+from app.benchmarks.synthetic_report import generate_dataset, generate_report
+from app.services.especialidad_extractor import extraer_especialidades
+from app.services.observation_checker import excel_observation_cheker
+from app.services.pdf_extractor import extract_paragraphs
+
+def test_reporte_sintetico_se_lee_como_se_genero():
+    folder = tempfile.mkdtemp()
+    manifest = generate_dataset(folder, pages=6, matrix_rows=30, overlap=0.5, seed=3, pages_per_specialty=3)
+    esperado = generate_report(pages=6, seed=3, pages_per_specialty=3)
+
+    parrafos = extract_paragraphs(manifest["pdf"])
+    assert [(p["pagina"], p["texto"]) for p in parrafos] == [(p["pagina"], p["texto"]) for p in esperado["parrafos"]]
+    assert [(e["pagina"], e["especialidad_std"]) for e in extraer_especialidades(manifest["pdf"])] == [
+        (1, "ESTRUCTURA"), (4, "ELECTRICA")
+    ]
+
+    # La mitad de las observaciones de la especialidad ya está en su matriz
+    matriz = manifest["matrices"]["ESTRUCTURA"]
+    observaciones = [p["texto"] for p in esperado["parrafos"] if p["observacion"] and p["especialidad"] == "ESTRUCTURA"]
+    agregados = excel_observation_cheker(matriz, observaciones, output_path=os.path.join(folder, "salida.xlsx"))
+    assert len(agregados) == len(observaciones) - len(observaciones) // 2
+    print("✅ Test reporte sintético pasó correctamente")
+
+def test_control_de_regresiones():
+    referencia = {"benchmarks": {"clean_text": {"por_segundo": 1000.0}, "classifier": {"por_segundo": 50.0}}}
+    actual = {"benchmarks": {"clean_text": {"por_segundo": 800.0, "unidad": "parrafos"}}}
+    assert check_regressions(actual, referencia, tolerance=0.25) == []
+    fallas = check_regressions(actual, referencia, tolerance=0.1)
+    assert len(fallas) == 1 and fallas[0].startswith("clean_text")
+    print("✅ Test control de regresiones pasó correctamente")
+
+if __name__ == "__main__":
+    test_reporte_sintetico_se_lee_como_se_genero()
+    test_control_de_regresiones()
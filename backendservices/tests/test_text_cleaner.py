@@ -0,0 +1,34 @@
+import random
+
+from app.services.text_cleaner import TextCleaner, _clean_text_reference
+
+_FRAGMENTS = [
+    "Observación", "ESPECIALIDAD ELÉCTRICA", "niño", "Ångström", "İstanbul", "ǅemal", "ﬁnal",
+    "<b>negrita</b>", "<a href='x'>", "<sin cierre", "http://odinsa.com/x?y=1", "HTTPS://A.B",
+    "ver https://x.y/z.", " ", " ", "\x1c", "\x1f", "\x85", "\t", "\n", "\r\n", "​",
+    "😀", "한국어", "日本語", "Ελληνικά", "кириллица", "½", "²", "№ 5", "$1.000,50", "—", "…", "(a)", "-", "_",
+]
+
+def _corpus(size=5000, seed=7):
+    rng = random.Random(seed)
+    textos = [None, "", " ", "　", "ABC def 123", "a  b\t\tc\n"]
+    for _ in range(size):
+        partes = rng.choices(_FRAGMENTS, k=rng.randint(1, 12))
+        textos.append(rng.choice(["", " ", "  "]).join(partes))
+    # Todos los puntos de código, en bloques
+    for start in range(0, 0x110000, 2048):
+        textos.append(" x ".join(chr(c) for c in range(start, min(start + 2048, 0x110000))))
+    return textos
+
+def test_clean_batch_equivalente_a_referencia():
+    cleaner = TextCleaner()
+    textos = _corpus()
+    esperados = [_clean_text_reference(t) for t in textos]
+
+    assert cleaner.clean_batch(textos) == esperados
+    # Segunda pasada con la tabla ya memorizada
+    assert [cleaner.clean_text(t) for t in textos] == esperados
+    print(f"✅ Test clean_batch equivalente pasó correctamente ({len(textos)} textos)")
+
+if __name__ == "__main__":
+    test_clean_batch_equivalente_a_referencia()
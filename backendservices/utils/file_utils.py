@@ -1,5 +1,6 @@
 import os 
 import re
+import hashlib
 
 ALLOWED_EXTENSIONS = {'pdf'}
 
@@ -61,4 +62,30 @@ def _first_empty_row(ws, col=7, start=13):
 
 
 def _norm(s: str) -> str:
-    return (s or "").strip()
\ No newline at end of file
+    return (s or "").strip()
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 (hex) of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def content_sha256(source) -> str:
+    """
+    SHA-256 (hex) of a file path or of an in-memory buffer (bytes).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    return file_sha256(source)
+
+def content_size(source) -> int:
+    """
+    Size in bytes of a file path or of an in-memory buffer.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    return os.path.getsize(source)
@@ -1,5 +1,6 @@
-import re 
+import re
 import unicodedata
+from functools import lru_cache
 
 _ABBREV_MAP = {
     r"^E(\b|[\s(])": "ELECTRICA",
@@ -9,16 +10,31 @@ _ABBREV_MAP = {
     r"^FADS\b": "FADS",
 }
 
+# Reglas precompiladas (mismo orden que _ABBREV_MAP)
+_ABBREV_RULES = [(re.compile(pat), repl) for pat, repl in _ABBREV_MAP.items()]
+
+_QUOTES = re.compile(r"[“”\"']")
+_SPACES = re.compile(r"\s+")
+_TOC_DOTS = re.compile(r"\.{2,}\s*\d+\s*$")
+_DASHES = re.compile(r"[–—]")
+_TRAILING_NUMBER = re.compile(r"\s\d+$")
+_PARENTHESES = re.compile(r"^(.*?)[\s]*\((.+)\)\s*$")
+_UNCLOSED_TAIL = re.compile(r"[)\s]+$")
+_DASH_SEPARATOR = re.compile(r"\s-\s")
+_DE_PREFIX = re.compile(r"^\s*de\s+", re.IGNORECASE)
+_TRAILING_PUNCT = re.compile(r"[,:.\s]+$")
+
 def _strip_accents(speciality: str) -> str:
     return unicodedata.normalize("NFD", speciality).encode("ascii", "ignore").decode("utf-8")
 
 def _clean_basic(speciality: str) -> str:
     # remove quotes/guillements and trailing punctuation noise
     speciality = speciality.replace("«", "").replace("»", "")
-    speciality = re.sub(r"[“”\"']", "", speciality)
-    speciality = re.sub(r"\s+", " ", speciality).strip()
+    speciality = _QUOTES.sub("", speciality)
+    speciality = _SPACES.sub(" ", speciality).strip()
     return speciality
 
+@lru_cache(maxsize=4096)
 def normalize_especialidad(name: str):
     """
     Returns (principal_std, sublabel_std, original_clean)
@@ -32,22 +48,24 @@ def normalize_especialidad(name: str):
       - Remove leading 'DE ' (e.g., 'De Diseño Aeroportuario' -> 'Diseño Aeroportuario')
       - Map abbreviations like 'E (Eléctrica)' -> principal 'ELECTRICA'
       - Uppercase + strip accents for standardized fields
+
+    The same headings repeat across a report, so results are memoized.
     """
     original = _clean_basic(name)
 
-    # remove '............. 152' 
-    original = re.sub(r"\.{2,}\s*\d+\s*$", "", original)
+    # remove '............. 152'
+    original = _TOC_DOTS.sub("", original)
 
-    original = re.sub(r"[–—]", "-", original)
+    original = _DASHES.sub("-", original)
 
-    original = re.sub(r"\s\d+$", "", original)
+    original = _TRAILING_NUMBER.sub("", original)
 
     # Split principal vs sublabel
     principal, sublabel = original, None
 
 
     # A) paréntesis balanceados
-    speciality_cleanned = re.match(r"^(.*?)[\s]*\((.+)\)\s*$", principal)
+    speciality_cleanned = _PARENTHESES.match(principal)
     if speciality_cleanned:
         principal = speciality_cleanned.group(1).strip()
         sublabel = speciality_cleanned.group(2).strip()
@@ -56,14 +74,14 @@ def normalize_especialidad(name: str):
         if "(" in principal and ")" not in principal:
             left, right = principal.split("(", 1)
             principal = left.strip()
-            sublabel = re.sub(r"[)\s]+$", "", right.strip()) or None
+            sublabel = _UNCLOSED_TAIL.sub("", right.strip()) or None
         else:
             # fallback: ' A - B ' como sublabel
-            parts = re.split(r"\s-\s", principal)
+            parts = _DASH_SEPARATOR.split(principal)
             if len(parts) > 1:
                 principal, sublabel = parts[0].strip(), " - ".join(parts[1:]).strip()
 
-    # (C) cortar en la primera coma si hay texto oracional: 
+    # (C) cortar en la primera coma si hay texto oracional:
     #     "de Señalización Horizontal, es necesario..." -> "de Señalización Horizontal"
     if "," in principal:
         principal = principal.split(",", 1)[0].strip()
@@ -72,12 +90,12 @@ def normalize_especialidad(name: str):
         principal = principal.split(";", 1)[0].strip()
 
     # Quitar prefijo 'De ' del principal
-    principal = re.sub(r"^\s*de\s+", "", principal, flags=re.IGNORECASE)
+    principal = _DE_PREFIX.sub("", principal)
 
     # Limpiar colas de puntuación/espacios
-    principal = re.sub(r"[,:.\s]+$", "", principal).strip()
+    principal = _TRAILING_PUNCT.sub("", principal).strip()
     if sublabel:
-        sublabel = re.sub(r"[,:.\s]+$", "", sublabel).strip()
+        sublabel = _TRAILING_PUNCT.sub("", sublabel).strip()
 
     principal_up = principal.upper()
 
@@ -86,19 +104,19 @@ def normalize_especialidad(name: str):
         return None, None, original  # 👈 señal de “descartar”
 
     # Abreviaturas
-    for pat, repl in _ABBREV_MAP.items():
-        if re.match(pat, principal_up):
+    for pat, repl in _ABBREV_RULES:
+        if pat.match(principal_up):
             principal_up = repl
             break
 
     # Abreviatura + sublabel -> usa sublabel como principal estándar
     if principal_up in {"E", "S", "B"} and sublabel:
         override = _strip_accents(sublabel).upper()
-        principal_up = re.sub(r"\s+", " ", override).strip()
+        principal_up = _SPACES.sub(" ", override).strip()
 
-    principal_std = re.sub(r"\s+", " ", _strip_accents(principal_up)).strip().upper()
+    principal_std = _SPACES.sub(" ", _strip_accents(principal_up)).strip().upper()
     sublabel_std = None
     if sublabel:
-        sublabel_std = re.sub(r"\s+", " ", _strip_accents(sublabel)).strip().upper()
+        sublabel_std = _SPACES.sub(" ", _strip_accents(sublabel)).strip().upper()
 
-    return principal_std, sublabel_std, original
\ No newline at end of file
+    return principal_std, sublabel_std, original
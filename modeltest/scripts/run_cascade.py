@@ -0,0 +1,22 @@
+import sys
+import os
+
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from training_module import build_cascade
+
+def cli():
+    if len(sys.argv) < 2:
+        print("Uso: run_cascade.py <labeled.csv> [output.npz] [model_output] [low] [high] [threshold]")
+        sys.exit(1)
+    labeled_csv = sys.argv[1]
+    output_path = sys.argv[2] if len(sys.argv) > 2 else "cascade.npz"
+    model_dir   = sys.argv[3] if len(sys.argv) > 3 and sys.argv[3] else None
+    low         = float(sys.argv[4]) if len(sys.argv) > 4 else 0.05
+    high        = float(sys.argv[5]) if len(sys.argv) > 5 else 0.99
+    threshold   = float(sys.argv[6]) if len(sys.argv) > 6 else 0.85
+    build_cascade(labeled_csv, output_path, model_dir, low, high, threshold=threshold)
+
+if __name__ == "__main__":
+    cli()
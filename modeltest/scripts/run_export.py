@@ -0,0 +1,20 @@
+import sys
+import os
+
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from export_module import build_artifact, VARIANTS
+
+def cli():
+    if len(sys.argv) < 3:
+        print(f"Uso: run_export.py <model_output> <artifact_dir> [{'|'.join(VARIANTS)}] [max_length]")
+        sys.exit(1)
+    model_dir  = sys.argv[1]
+    output_dir = sys.argv[2]
+    variant    = sys.argv[3] if len(sys.argv) > 3 else "fused-int8"
+    max_length = int(sys.argv[4]) if len(sys.argv) > 4 else 256
+    build_artifact(model_dir, output_dir, variant, max_length)
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,64 @@
+# src/cascade_features.py
+#
+# Featurizer del primer nivel de la cascada (modelo lineal sobre n-gramas
+# con hashing). El backend tiene una copia en
+# backendservices/services/cascade.py: cualquier cambio aquí debe replicarse
+# allá, o el modelo entrenado dejará de coincidir con el que se sirve.
+
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+N_FEATURES = 2 ** 18
+FEATURES_VERSION = 1
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def _tokens(text: str) -> list:
+    text = unicodedata.normalize("NFD", (text or "").lower()).encode("ascii", "ignore").decode("ascii")
+    return _TOKEN.findall(text)
+
+def _grams(text: str) -> list:
+    """
+    Unigramas y bigramas de palabras, trigramas de caracteres y dos rasgos de
+    forma (longitud y proporción de números) que separan fragmentos de tablas,
+    pies de página y leyendas cortas.
+    """
+    tokens = _tokens(text)
+    grams = list(tokens)
+    grams += [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    joined = f" {' '.join(tokens)} "
+    grams += [f"#{joined[i:i + 3]}" for i in range(len(joined) - 2)]
+
+    digits = sum(token.isdigit() for token in tokens)
+    grams.append(f"__len_{min(len(tokens) // 4, 16)}")
+    grams.append(f"__num_{(10 * digits) // len(tokens) if tokens else 0}")
+    return grams
+
+def hashed_features(text: str, n_features: int = N_FEATURES):
+    """
+    Vector disperso (índices ordenados, valores) de un texto: conteos con
+    hashing CRC32, escala logarítmica y norma L2.
+    """
+    counts = {}
+    for gram in _grams(text):
+        idx = zlib.crc32(gram.encode("utf-8")) % n_features
+        counts[idx] = counts.get(idx, 0) + 1
+
+    indices = np.fromiter(sorted(counts), dtype=np.int64, count=len(counts))
+    values = np.log1p(np.array([counts[i] for i in indices.tolist()], dtype=np.float32))
+    norm = float(np.linalg.norm(values))
+    if norm:
+        values /= norm
+    return indices, values
+
+def save_linear_model(path: str, weights: np.ndarray, bias: float, n_features: int = N_FEATURES) -> None:
+    np.savez_compressed(
+        path,
+        weights=np.asarray(weights, dtype=np.float32),
+        bias=np.float32(bias),
+        n_features=np.int64(n_features),
+        version=np.int64(FEATURES_VERSION),
+    )
@@ -0,0 +1,119 @@
+import os
+import json
+import shutil
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+VARIANTS = ("fp32", "fused", "int8", "fused-int8")
+
+def export_fp32(model_dir: str, onnx_path: str, max_length: int = 256, opset: int = 14) -> str:
+    """
+    Exporta el modelo fine-tuned a ONNX FP32 con ejes dinámicos (lote y secuencia).
+    """
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+
+    sample = tokenizer(["texto de ejemplo"], return_tensors="pt", truncation=True, max_length=max_length)
+    input_names = ["input_ids", "attention_mask"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            onnx_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    return onnx_path
+
+def fuse_graph(onnx_path: str, output_path: str, config) -> str:
+    """
+    Fusiona atención, LayerNorm y GELU con el optimizador de transformers de onnxruntime.
+    """
+    from onnxruntime.transformers import optimizer
+
+    optimized = optimizer.optimize_model(
+        onnx_path,
+        model_type="bert",
+        num_heads=getattr(config, "n_heads", getattr(config, "num_attention_heads", 0)),
+        hidden_size=getattr(config, "dim", getattr(config, "hidden_size", 0)),
+    )
+    optimized.save_model_to_file(output_path)
+    return output_path
+
+def quantize_int8(onnx_path: str, output_path: str) -> str:
+    """
+    Cuantización dinámica de pesos a INT8 (activaciones en FP32 calculadas en tiempo de ejecución).
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QInt8)
+    return output_path
+
+def build_artifact(
+    model_dir: str,
+    output_dir: str,
+    variant: str = "fused-int8",
+    max_length: int = 256,
+    opset: int = 14
+) -> str:
+    """
+    Construye el artefacto que consume el backend:
+        <output_dir>/model.onnx       modelo en la variante pedida
+        <output_dir>/tokenizer/       tokenizador del mismo fine-tuning
+        <output_dir>/artifact.json    manifiesto (variante, max_length, etiquetas)
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"Variante no soportada: {variant}. Usa una de {', '.join(VARIANTS)}")
+    if not os.path.isdir(model_dir):
+        raise FileNotFoundError(f"No existe el directorio del modelo: '{model_dir}'")
+
+    os.makedirs(output_dir, exist_ok=True)
+    work_dir = os.path.join(output_dir, "_build")
+    os.makedirs(work_dir, exist_ok=True)
+
+    config = AutoModelForSequenceClassification.from_pretrained(model_dir).config
+
+    current = export_fp32(model_dir, os.path.join(work_dir, "model.fp32.onnx"), max_length, opset)
+    if variant in ("fused", "fused-int8"):
+        current = fuse_graph(current, os.path.join(work_dir, "model.fused.onnx"), config)
+    if variant in ("int8", "fused-int8"):
+        current = quantize_int8(current, os.path.join(work_dir, "model.int8.onnx"))
+
+    shutil.copyfile(current, os.path.join(output_dir, "model.onnx"))
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    tokenizer.save_pretrained(os.path.join(output_dir, "tokenizer"))
+
+    manifest = {
+        "model_file": "model.onnx",
+        "tokenizer_dir": "tokenizer",
+        "variant": variant,
+        "max_length": max_length,
+        "opset": opset,
+        "source_model": os.path.abspath(model_dir),
+        "labels": {str(k): v for k, v in (config.id2label or {}).items()},
+    }
+    with open(os.path.join(output_dir, "artifact.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+
+    print(f"✅ Artefacto ONNX ({variant}) guardado en {output_dir}")
+    return output_dir
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print(f"Uso: python export_module.py <model_output> <artifact_dir> [{'|'.join(VARIANTS)}] [max_length]")
+        sys.exit(1)
+    model_dir  = sys.argv[1]
+    output_dir = sys.argv[2]
+    variant    = sys.argv[3] if len(sys.argv) > 3 else "fused-int8"
+    max_length = int(sys.argv[4]) if len(sys.argv) > 4 else 256
+    build_artifact(model_dir, output_dir, variant, max_length)
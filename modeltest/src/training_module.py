@@ -1,6 +1,9 @@
 import os
+import json
 import pandas as pd
 import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from datasets import Dataset
 from transformers import (
@@ -10,6 +13,8 @@ from transformers import (
     TrainingArguments
 )
 
+from cascade_features import N_FEATURES, hashed_features, save_linear_model
+
 def load_labeled_dataset(path: str) -> Dataset:
     """
     Carga un CSV etiquetado con columnas 'contenido' y 'label' (0 o 1).
@@ -99,6 +104,146 @@ def main(
     tokenizer.save_pretrained(output_dir)
     print(f"✅ Modelo entrenado y guardado en {output_dir}")
 
+# --- Cascada: primer nivel lineal sobre n-gramas con hashing ---------------
+
+def split_labeled(labeled_csv: str):
+    """
+    Misma partición train/eval que `main` (80/20, estratificada, semilla 42).
+    """
+    df = load_labeled_dataset(labeled_csv).to_pandas()
+    return train_test_split(df, test_size=0.2, random_state=42, stratify=df['label'])
+
+def featurize(texts, n_features: int = N_FEATURES) -> csr_matrix:
+    """
+    Matriz dispersa de rasgos (una fila por texto) con el featurizer de la cascada.
+    """
+    indptr, indices, values = [0], [], []
+    for text in texts:
+        idx, vals = hashed_features(text, n_features)
+        indices.extend(idx.tolist())
+        values.extend(vals.tolist())
+        indptr.append(len(indices))
+    return csr_matrix((np.array(values, dtype=np.float32), indices, indptr), shape=(len(texts), n_features))
+
+def train_cascade(texts, labels, C: float = 4.0, n_features: int = N_FEATURES):
+    """
+    Entrena la regresión logística del primer nivel. Devuelve (pesos, sesgo).
+    """
+    model = LogisticRegression(C=C, solver="liblinear", max_iter=1000)
+    model.fit(featurize(texts, n_features), np.asarray(labels, dtype=int))
+    return model.coef_[0].astype(np.float32), float(model.intercept_[0])
+
+def cascade_probabilities(weights: np.ndarray, bias: float, texts, n_features: int = N_FEATURES) -> np.ndarray:
+    scores = featurize(texts, n_features) @ weights + bias
+    return 1 / (1 + np.exp(-np.asarray(scores, dtype=np.float64)))
+
+def labels_from_logits(logits: np.ndarray, threshold: float = 0.85) -> np.ndarray:
+    """
+    Misma regla que `TextClassifier.labels_from_logits` del backend: sigmoid,
+    argmax y, por debajo del umbral (CLASSIFIER_THRESHOLD), "No observacion" (0).
+    """
+    probabilities = 1 / (1 + np.exp(-np.asarray(logits, dtype=np.float64)))
+    predicted = np.argmax(probabilities, axis=1)
+    confident = probabilities[np.arange(len(predicted)), predicted] >= threshold
+    return np.where(confident, predicted, 0)
+
+def transformer_predictions(
+    model_dir: str,
+    texts,
+    batch_size: int = 32,
+    max_length: int = 256,
+    threshold: float = 0.85
+) -> np.ndarray:
+    """
+    Predicciones del transformer entrenado con la regla del servicio
+    (`labels_from_logits`), para que la cascada se compare con lo que realmente
+    devuelve el backend.
+    """
+    import torch
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    preds = []
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            batch = tokenizer(list(texts[start:start + batch_size]), padding=True, truncation=True,
+                              max_length=max_length, return_tensors="pt")
+            preds.append(labels_from_logits(model(**batch).logits.numpy(), threshold))
+    return np.concatenate(preds) if preds else np.array([], dtype=int)
+
+def cascade_report(probabilities: np.ndarray, labels, low: float, high: float, transformer_preds=None) -> dict:
+    """
+    Fracción de párrafos que decide el primer nivel y, con las predicciones del
+    transformer, la exactitud de la cascada frente al transformer solo.
+    """
+    labels = np.asarray(labels, dtype=int)
+    negative = probabilities <= low
+    positive = probabilities >= high
+    decided = negative | positive
+    first_stage = positive.astype(int)
+
+    report = {
+        "low": low,
+        "high": high,
+        "eval": int(len(labels)),
+        "fraccion_omitida": float(decided.mean()) if len(labels) else 0.0,
+        "exactitud_primer_nivel_decididos": float((first_stage[decided] == labels[decided]).mean()) if decided.any() else None,
+    }
+    if transformer_preds is not None:
+        transformer_preds = np.asarray(transformer_preds, dtype=int)
+        combined = np.where(decided, first_stage, transformer_preds)
+        report["exactitud_transformer"] = float((transformer_preds == labels).mean())
+        report["exactitud_cascada"] = float((combined == labels).mean())
+        report["delta_exactitud"] = report["exactitud_cascada"] - report["exactitud_transformer"]
+    return report
+
+def build_cascade(
+    labeled_csv: str,
+    output_path: str = "cascade.npz",
+    model_dir: str = None,
+    low: float = 0.05,
+    high: float = 0.99,
+    C: float = 4.0,
+    threshold: float = 0.85
+) -> dict:
+    """
+    Entrena el primer nivel de la cascada con el CSV etiquetado, lo guarda en
+    `output_path` (CASCADE_MODEL_PATH del backend) y escribe junto a él un
+    reporte JSON sobre la partición de evaluación. Con `model_dir` (salida de
+    `main`) el reporte incluye la diferencia de exactitud frente al transformer
+    con el umbral `threshold` (el CLASSIFIER_THRESHOLD del backend);
+    además se evalúan algunas bandas alternativas para elegir CASCADE_LOW/HIGH.
+    """
+    train_df, eval_df = split_labeled(labeled_csv)
+    weights, bias = train_cascade(train_df['text'].tolist(), train_df['label'].tolist(), C)
+    save_linear_model(output_path, weights, bias)
+
+    eval_texts = eval_df['text'].tolist()
+    probabilities = cascade_probabilities(weights, bias, eval_texts)
+    transformer_preds = transformer_predictions(model_dir, eval_texts, threshold=threshold) if model_dir else None
+
+    report = cascade_report(probabilities, eval_df['label'], low, high, transformer_preds)
+    if transformer_preds is not None:
+        report["umbral_transformer"] = threshold
+    report["bandas"] = [
+        cascade_report(probabilities, eval_df['label'], band_low, band_high, transformer_preds)
+        for band_low in (0.01, 0.02, 0.05, 0.1)
+        for band_high in (0.95, 0.99, 1.0)
+    ]
+
+    report_path = os.path.splitext(output_path)[0] + "_report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+
+    print(f"✅ Cascada guardada en {output_path}")
+    print(f"   Omitidos por el primer nivel: {report['fraccion_omitida']:.1%}")
+    if "delta_exactitud" in report:
+        print(f"   Exactitud transformer {report['exactitud_transformer']:.4f} -> cascada "
+              f"{report['exactitud_cascada']:.4f} (delta {report['delta_exactitud']:+.4f})")
+    print(f"   Reporte: {report_path}")
+    return report
+
 if __name__ == "__main__":
     import sys
     if len(sys.argv) < 2: